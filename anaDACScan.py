@@ -40,6 +40,10 @@ Arguments
 
     Name of the output root file. Default is DACFitData.root.
 
+.. option:: --noPlots
+
+    Do not write the summary images, only the output TFile and text files are produced.
+
 .. option:: --print
 
     If provided prints a summary table to terminal for each DAC showing for each VFAT position the nominal value that was found
@@ -62,6 +66,7 @@ if __name__ == '__main__':
     parser.add_argument('--assignXErrors', dest='assignXErrors', action='store_true', help="If this flag is set then an uncertain on the DAC register value is assumed, otherwise the DAC register value is assumed to be a fixed unchanging value (almost always the case).")
     parser.add_argument("--calFileList", type=str, help="File specifying which calFile to use for each OH. Format of each line: <shelf> <slot> <link> /path/to/my/cal/file.txt")
     parser.add_argument('-o','--outfilename', dest='outfilename', type=str, default="DACFitData.root", help="Filename to which output information is written")
+    parser.add_argument("--noPlots", action="store_true", help="Do not write the summary images")
     parser.add_argument("-p","--print",dest="printSum", action="store_true", help="If provided prints a summary table to terminal for each DAC showing for each VFAT position the nominal value that was found")
     args = parser.parse_args()
 
@@ -51,6 +51,10 @@ Arguments
 
     Rate provided in Hertz to define the cut off rate.  One the SBIT Rate reaches below this number the ``CFG_THR_ARM_DAC`` when this occurs will be stored and in the output ``vfatConfig.txt`` file.
 
+.. option:: --noPlots
+
+    Do not write the summary images, only the output TFile and text files are produced.
+
 Example
 -------
 
@@ -68,6 +72,7 @@ if __name__ == '__main__':
     parser.add_argument('-o','--outfilename', type=str, default="SBitRatePlots.root", help="Filename to which analyzed data is written")
     parser.add_argument("-m","--maxNoiseRate", type=float, dest="maxNoiseRate", default=0,
                     help="Max Noise Rate allowed in Hz")
+    parser.add_argument("--noPlots", action="store_true", help="Do not write the summary images")
     args = parser.parse_args()
 
     from gempython.utils.wrappers import envCheck
@@ -92,6 +97,7 @@ if __name__ == '__main__':
         cutOffRate = args.maxNoiseRate,
         debug = args.debug,
         outfilename = args.outfilename,
-        scandate = scandate)
+        scandate = scandate,
+        noPlots = args.noPlots)
 
     print('Analysis Completed Successfully')
@@ -8,8 +8,8 @@ anaUltraScurve
 if __name__ == '__main__':
     # Define the parser
     import argparse
-    from gempython.gemplotting.utils.anaoptions import parent_parser, parser_scurveChanMasks
-    parser = argparse.ArgumentParser(description="Options to give to anaUltraScurve.py", parents=[parent_parser,parser_scurveChanMasks])
+    from gempython.gemplotting.utils.anaoptions import parent_parser, parser_scurveChanMasks, parser_scurveFitting
+    parser = argparse.ArgumentParser(description="Options to give to anaUltraScurve.py", parents=[parent_parser,parser_scurveChanMasks,parser_scurveFitting])
     
     # Positional arguments
     parser.add_argument("GEBtype",type=str,help="Specify GEB type, options are 'long,short,m1,...,m8', if analyzing data from an ME0 detector write 'null'")
@@ -21,12 +21,19 @@ if __name__ == '__main__':
                       help="Physical filename of a custom, non-default, channel mapping (optional)")
     parser.add_argument("--doNotFit", action="store_true", help="Do not attempt to fit scurves; only the summary plot showing the 2D scurve data will be generated")
     parser.add_argument("--isVFAT2", action="store_true", help="Provide this argument if input data was acquired from vfat2")
+    parser.add_argument("--noPlots", action="store_true", help="Do not write the output images, only the output TFile and text files are produced")
+    parser.add_argument("--remaskOnly", action="store_true", help="Do not analyze the scurves again, only compute the channel masks of the existing output with the given cuts and update the masks, chConfig.txt and the plots without masked channels in place")
+    parser.add_argument("--streaming", action="store_true", help="Analyze the VFATs one at a time, the objects of a VFAT are freed before the next one is read, the outputs are then merged. The input file is read once, by chunks of entries, and the memory used does not grow with the number of VFATs")
     parser.add_argument("-v", "--vfatList", type=str, default=None, help="Comma separated list of VFAT positions to consider for analysis.  If not provided default will be all positions")
     parser.add_argument("-z", "--zscore", type=float, default=3.5, help="Z-Score for Outlier Identification in MAD Algo")
 
-    from gempython.gemplotting.utils.scurveAlgos import anaUltraScurve 
+    from gempython.gemplotting.utils.scurveAlgos import anaUltraScurve, anaUltraScurveRemask, anaUltraScurveStreaming
     parser.set_defaults(func=anaUltraScurve, outfilename="SCurveFitData.root")
     args = parser.parse_args()
+    if args.remaskOnly:
+        args.func = anaUltraScurveRemask
+    elif args.streaming:
+        args.func = anaUltraScurveStreaming
     
     # Make output directory
     from gempython.utils.wrappers import runCommand
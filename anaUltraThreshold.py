@@ -18,7 +18,7 @@ if __name__ == '__main__':
     parser.add_argument("--fileScurveFitTree", type=str, default=None, help="TFile containing scurveFitTree from this detector, if provided this will provide an updated chConfig file taking into account analysis here and data stored in the scurveFitTree")
     parser.add_argument("--isVFAT2", action="store_true", default=False, help="Provide this argument if input data was acquired from vfat2")
     parser.add_argument("--pervfat", action="store_true", help="Analysis for a per-VFAT scan (default is per-channel)")
-    parser.add_argument("--doNotSavePlots", action="store_true", help="If provided output plots will not be made")
+    parser.add_argument("--doNotSavePlots", "--noPlots", dest="doNotSavePlots", action="store_true", help="If provided output plots will not be made")
     parser.add_argument("--zscore", type=float, default=3.5, help="Z-Score for Outlier Identification in MAD Algo")
 
     from gempython.gemplotting.utils.threshAlgos import anaUltraThreshold
@@ -110,7 +110,8 @@ def anaSBITThresh(args):
             rateTree = sbitThreshFile.rateTree,
             cutOffRate = args.maxNoiseRate,
             debug = args.debug,
-            scandate = args.scandate)
+            scandate = args.scandate,
+            noPlots = args.noPlots)
 
     printGreen("Analysis Completed Successfully")
     return
@@ -125,6 +126,9 @@ def calArmDACParallelAna(args):
     have been analyzed; if they have not been analyzed this will analyze each one in parallel
     based on the CPU usage case that the user requests.  After all scurves have been analyzed
     this will call calibrateThrDac in parallel on the listOfScandates files that have been found.
+    The detectors for which the analysis of a scurve failed are not calibrated.
+
+    Returns the list of the input files whose analysis failed, including the raw scurve files
 
     args - object returned by argparse.ArgumentParser.parse_args()
     """
@@ -141,6 +145,7 @@ def calArmDACParallelAna(args):
     # Check that input listOfScandates files are valid
     dictOfFiles = getFileList("armDacCal",chamber_config,args.scandate,args.debug,GEBtype,args.inputfilename,args.listOfScandatesFile)
     dictOfScurvesWithoutAna = {}
+    dictOfScurveAnaFiles = {} # analyzed scurve files read by the calibration of each detector
     import os
     from gempython.gemplotting.utils.anautilities import getDirByAnaType, getGEBTypeFromFilename, parseListOfScanDatesFile
     from gempython.gemplotting.utils.anaInfo import tree_names
@@ -179,11 +184,13 @@ def calArmDACParallelAna(args):
                     thisScandate,
                     listOfScandatesFile))
                 continue
+            dictOfScurveAnaFiles.setdefault(geoAddr, []).append(fullPath2File)
             pass # End loop over listOfScurveTuples
         pass # End loop over dictOfFiles
 
     # Analyze any raw scurve files needing analysis
     from gempython.utils.wrappers import runCommand
+    failedScurveFiles = []
     if len(dictOfScurvesWithoutAna) > 0:
         if args.debug:
             msg="Following scurve files need analysis:\n"
@@ -196,24 +203,35 @@ def calArmDACParallelAna(args):
         makeOutDirectories(dictOfScurvesWithoutAna)
 
         # Launch the pool processes
-        scurveMultiProcessing(args,dictOfScurvesWithoutAna)
+        failedScurveFiles = scurveMultiProcessing(args,dictOfScurvesWithoutAna)
 
         pass # End analyze un-analyzed scurves
 
-    # Setup a pool
-    from multiprocessing import Pool
-    from gempython.gemplotting.utils.anautilities import getNumCores2Use, init_worker
-    pool = Pool(getNumCores2Use(args), initializer=init_worker) # Allocate number of CPU's based on getNumCores2Use()
+    # The detectors with a failed scurve analysis are not calibrated
+    failedGeoAddrs = set([ newGeoAddr[0:3] for newGeoAddr,infoTuple in dictOfScurvesWithoutAna.iteritems() if infoTuple[0] in failedScurveFiles ])
+    for geoAddr in failedGeoAddrs:
+        printRed("calibrateArmDAC() - The scurve analysis of {0} failed, skipping its calibration".format(chamber_config[geoAddr]))
+        pass
+
+    # Only calibrate the detectors whose output is not up to date, the analyzed
+    # scurve files are taken into account as inputs of each calibration
+    dictOfCalFiles = dict( (geoAddr, (calInfoTuple[0].format(DETECTOR=calInfoTuple[1]),calInfoTuple[1],calInfoTuple[2]))
+            for geoAddr,calInfoTuple in dictOfFiles.iteritems() if geoAddr not in failedGeoAddrs )
+    dictOfCalFiles, dictOfManifests = filterUpToDateFiles(args, "armDacCal", dictOfCalFiles, tree_names["armDacCalAna"][0],
+            dictOfScurveAnaFiles,
+            dict( (geoAddr, calInfoTuple[0][0:calInfoTuple[0].rfind("/")]) for geoAddr,calInfoTuple in dictOfCalFiles.iteritems() ))
+    if len(dictOfCalFiles) == 0:
+        printGreen("All outputs are up to date, nothing to calibrate")
+        return failedScurveFiles
 
     # Perform ARM DAC calibration analysis
-    from gempython.gemplotting.utils.threshAlgos import calibrateThrDACStar
-    import itertools, sys, traceback
+    from gempython.gemplotting.utils.threshAlgos import calibrateThrDAC
     from gempython.gemplotting.utils.namespace import Namespace
 
     namespaces = []
-    for calInfoTuple in dictOfFiles.values():
+    for calInfoTuple in dictOfCalFiles.values():
         namespaces.append(Namespace(
-            inputFile = calInfoTuple[0].format(DETECTOR=calInfoTuple[1]),
+            inputFile = calInfoTuple[0],
             fitRange = "0,255",
             listOfVFATs = None,
             noLeg = args.noLeg,
@@ -224,34 +242,109 @@ def calArmDACParallelAna(args):
 
     try:
         print("Calibration CFG_THR_ARM_DAC; please be patient")
-        pool.map_async(calibrateThrDACStar,
-                itertools.izip(namespaces)
-                ).get(1800) # wait at most 30 minutes, this should be "relatively" quick
+        results, failures = runParallelTasks(args,
+                calibrateThrDAC,
+                [ (namespace,) for namespace in namespaces ],
+                [ namespace.inputFile for namespace in namespaces ])
     except KeyboardInterrupt:
+        import os, sys
         printRed("Caught KeyboardInterrupt, terminating workers")
-        pool.terminate()
-        printRed("Analysis Failed")
-    except Exception as err:
-        printRed("Caught {0}: {1}, terminating workers".format(type(err), err.message))
-        pool.terminate()
-        traceback.print_exc(file=sys.stdout)
-        printRed("Analysis Failed")
-    except: # catch *all* exceptions
-        e = sys.exc_info()[0]
-        printRed("Caught non-Python Exception %s"%(e))
-        pool.terminate()
-        traceback.print_exc(file=sys.stdout)
         printRed("Analysis Failed")
+        sys.exit(os.EX_SOFTWARE)
     else:
-        printGreen("Analysis Completed Successfully")
-        pool.close()
-        pool.join()
+        printParallelSummary(failures, len(namespaces))
     finally:
         # Ensure permissions of all files in subdirectories have group read and write
         setPermissions(dictOfFiles)
         pass # End calibration of CFG_THR_ARM_DAC
 
-    return
+    failedFiles = [ namespaces[idx].inputFile for idx in failures.keys() ]
+    writeAnaManifests(dictOfManifests, failedFiles)
+
+    return failedScurveFiles + failedFiles
+
+def filterUpToDateFiles(args, anaType, dictOfFiles, outputFilename, dictOfDependencies=None, dictOfOutputDirs=None):
+    """
+    Removes from dictOfFiles the input files whose output is up to date, i.e. whose output directory
+    holds outputFilename and an analysis manifest made from identical input files, options and
+    version of gemplotting, see makeAnaManifest() of anautilities.py.  Nothing is removed if
+    args.force is true.
+
+    Returns a tuple (dictOfFiles, dictOfManifests) where dictOfFiles holds the input files to analyze
+    and dictOfManifests holds, for each of them, a tuple (outputDir, manifest) to be stored with
+    writeAnaManifests() once they are analyzed.
+
+    args               - object returned by argparse.ArgumentParser.parse_args()
+    anaType            - ana_scans.py subcommand, e.g. "scurve"
+    dictOfFiles        - dictionary of tuples (filename,chamberName,GEBtype) where filename is the
+                         name of an input file, see documentation for getFileList()
+    outputFilename     - Name of the output TFile written in the output directory of each input file,
+                         "{DETECTOR}" is replaced by the chamberName of the input file
+    dictOfDependencies - Optional, dictionary whose keys are the keys of dictOfFiles and whose values
+                         are the name of another file, or a list of names of other files, read by the
+                         analysis of that input file, or None
+    dictOfOutputDirs   - Optional, dictionary whose keys are the keys of dictOfFiles and whose values
+                         are the output directory of that input file.  By default the output directory
+                         is the name of the input file without its .root extension
+    """
+
+    # Check attributes of input args
+    # If not present assign appropriate default arguments
+    if hasattr(args,'force') is False:
+        args.force = False
+
+    # Options which do not change the outputs, e.g. how the work is split
+    listOfExecutionArgs = [
+            "chamberConfig", "cNameAndAddr", "debug", "deferPlots", "fitCacheFile", "fitWorkers",
+            "force", "func", "heavy", "inputfilename", "jobs", "journal", "light", "listOfScandatesFile",
+            "mappingFile", "medium", "noFitCache", "remaskOnly", "resume", "scandate", "server",
+            "serverSocket", "shardByVFAT", "streaming", "taskRetries", "taskTimeout"]
+    options = dict( (key,value) for key,value in vars(args).iteritems() if key not in listOfExecutionArgs )
+
+    from gempython.gemplotting.utils.anautilities import getAnaManifest, makeAnaManifest
+    import os
+    dictOfFilesToAnalyze = {}
+    dictOfManifests = {}
+    listOfSkippedFiles = []
+    for geoAddr,infoTuple in dictOfFiles.iteritems():
+        outputDir = infoTuple[0].replace(".root","")
+        if dictOfOutputDirs is not None:
+            outputDir = dictOfOutputDirs[geoAddr]
+        thisOutputFilename = outputFilename.format(DETECTOR=infoTuple[1])
+        inputFiles = [ infoTuple[0] ]
+        if dictOfDependencies is not None and dictOfDependencies.get(geoAddr) is not None:
+            if isinstance(dictOfDependencies[geoAddr], list):
+                inputFiles.extend(dictOfDependencies[geoAddr])
+            else:
+                inputFiles.append(dictOfDependencies[geoAddr])
+
+        previousManifest = getAnaManifest(outputDir)
+        try:
+            manifest = makeAnaManifest(anaType, inputFiles, options, previousManifest)
+        except (IOError, OSError):
+            # e.g. a missing input file, the analysis reports it
+            dictOfFilesToAnalyze[geoAddr] = infoTuple
+            continue
+
+        isUpToDate = (previousManifest is not None
+                and previousManifest.get("key") == manifest["key"]
+                and os.path.isfile("{0}/{1}".format(outputDir,thisOutputFilename)))
+        if isUpToDate and not args.force:
+            listOfSkippedFiles.append(infoTuple[0])
+            continue
+        manifest["outputs"] = [ thisOutputFilename ]
+        dictOfFilesToAnalyze[geoAddr] = infoTuple
+        dictOfManifests[infoTuple[0]] = (outputDir, manifest)
+        pass
+
+    if len(listOfSkippedFiles) > 0:
+        print("Skipping {0} input file(s) whose outputs are up to date, use --force to analyze them again".format(len(listOfSkippedFiles)))
+        if args.debug:
+            print("\t{0}".format("\n\t".join(sorted(listOfSkippedFiles))))
+            pass
+        pass
+
+    return (dictOfFilesToAnalyze, dictOfManifests)
 
 def getChamberConfig(args):
     """
@@ -468,6 +561,8 @@ def latencyParallelAna(args):
     This launches a call of anaUltraLatency in parallel on each of the 
     input files that have been found.
 
+    Returns the list of the input files whose analysis failed
+
     args - object returned by argparse.ArgumentParser.parse_args() 
     """
 
@@ -478,21 +573,23 @@ def latencyParallelAna(args):
 
     # Get list of input files
     dictOfFiles = getFileList("latency",chamber_config,args.scandate,args.debug,GEBtype,args.inputfilename,args.listOfScandatesFile)
+
+    # Only analyze the files whose output is not up to date
+    dictOfFiles, dictOfManifests = filterUpToDateFiles(args, "lat", dictOfFiles, "latencyAna.root")
+    if len(dictOfFiles) == 0:
+        printGreen("All outputs are up to date, nothing to analyze")
+        return []
     
     # Make output directories and set permissions
     makeOutDirectories(dictOfFiles)
 
-    # Setup a pool
-    from multiprocessing import Pool
-    from gempython.gemplotting.utils.anautilities import getNumCores2Use, init_worker
-    pool = Pool(getNumCores2Use(args), initializer=init_worker) # Allocate number of CPU's based on getNumCores2Use()
-
-    # Launch the pool processes
-    from gempython.gemplotting.utils.latAlgos import anaUltraLatencyStar
-    import itertools, sys, traceback
+    # Launch the analysis processes
+    from gempython.gemplotting.utils.latAlgos import anaUltraLatency
+    import itertools
     try:
-        pool.map_async(anaUltraLatencyStar,
-                itertools.izip(
+        results, failures = runParallelTasks(args,
+                anaUltraLatency,
+                list(itertools.izip(
                     [latFile[0] for latFile in dictOfFiles.values()],                       # infilename
                     [args.debug for latFile in dictOfFiles.values()],                       # debug
                     [args.latSigMaskRange for geoAddr in dictOfFiles.keys()],               # latSigMaskRange
@@ -500,32 +597,22 @@ def latencyParallelAna(args):
                     [latFile[0].replace(".root","") for latFile in dictOfFiles.values()],   # outputDir
                     ["latencyAna.root" for geoAddr in dictOfFiles.keys()],                  # outfilename
                     [args.performFit for geoAddr in dictOfFiles.keys()]                     # performFit
-                    )
-                ).get(7200) # wait at most 2 hours
+                    )),
+                [latFile[0] for latFile in dictOfFiles.values()])
     except KeyboardInterrupt:
+        import os, sys
         printRed("Caught KeyboardInterrupt, terminating workers")
-        pool.terminate()
-        printRed("Analysis Failed")
-    except Exception as err:
-        printRed("Caught {0}: {1}, terminating workers".format(type(err), err.message))
-        pool.terminate()
-        traceback.print_exc(file=sys.stdout)
-        printRed("Analysis Failed")
-    except: # catch *all* exceptions
-        e = sys.exc_info()[0]
-        printRed("Caught non-Python Exception %s"%(e))
-        pool.terminate()
-        traceback.print_exc(file=sys.stdout)
         printRed("Analysis Failed")
+        sys.exit(os.EX_SOFTWARE)
     else:
-        printGreen("Analysis Completed Successfully")
-        pool.close()
-        pool.join()
+        printParallelSummary(failures, len(dictOfFiles))
+        failedFiles = [ dictOfFiles.values()[idx][0] for idx in failures.keys() ]
+        writeAnaManifests(dictOfManifests, failedFiles)
     finally:
         # Ensure permissions of all files in subdirectories have group read and write
         setPermissions(dictOfFiles)
 
-    return
+    return failedFiles
 
 def makeOutDirectories(dictOfFiles, permissions="g+rw"):
     """
@@ -547,9 +634,187 @@ def makeOutDirectories(dictOfFiles, permissions="g+rw"):
         pass
     return
 
+def openRunJournal(args):
+    """
+    Returns the RunJournal recording the progress of this run, see runJournal.py, or None if the
+    progress is not recorded
+
+    args - object returned by argparse.ArgumentParser.parse_args(), journal is the name of the journal file
+    """
+
+    if hasattr(args,'journal') is False or args.journal is None:
+        return None
+
+    from gempython.gemplotting.utils.runJournal import RunJournal
+    return RunJournal(args.journal)
+
+def printParallelSummary(failures, nInputs):
+    """
+    Prints the outcome of an analysis of nInputs input files run with runParallelTasks()
+
+    failures - dictionary whose keys identify the failed input files, see runTasks() of multiprocUtils.py
+    nInputs  - number of analyzed input files
+    """
+
+    if len(failures) == 0:
+        printGreen("Analysis Completed Successfully")
+    else:
+        printRed("Analysis Failed for {0} of {1} input files, see the summary above".format(len(failures),nInputs))
+    return
+
+def renderDeferredPlots(args, dictOfFiles):
+    """
+    Writes the output images of analyses run with args.deferPlots set, using
+    a pool of processes.  See renderQueue.py
+
+    args        - object returned by argparse.ArgumentParser.parse_args() 
+    dictOfFiles - dictionary of tuples where the first element of each tuple is the name of
+                  an analyzed TFile, see documentation for getFileList()
+    """
+
+    if args.noPlots:
+        return
+
+    from gempython.gemplotting.utils.anautilities import getNumCores2Use
+    from gempython.gemplotting.utils.renderQueue import renderQueueFilename, renderQueues
+    import os
+    storeNames = [ "{0}/{1}".format(infoTuple[0].replace(".root",""), renderQueueFilename) for infoTuple in dictOfFiles.values() ]
+    renderQueues([ storeName for storeName in storeNames if os.path.isfile(storeName) ], nWorkers=getNumCores2Use(args))
+    return
+
+def runInProcessTask(args, func, taskArgs, taskName):
+    """
+    Calls func(*taskArgs) in this process, e.g. for a task which starts its own worker processes,
+    with the same timeout, retries and run journal as the tasks of runParallelTasks().  An
+    exception raised by func does not stop the run, it is reported as a failure.  Returns a
+    dictionary with the same format as the failures returned by runTasks() of multiprocUtils.py:
+    empty if the task succeeded, otherwise {0: reason}
+
+    args     - object returned by argparse.ArgumentParser.parse_args(), see runParallelTasks()
+    func     - Function called by the task
+    taskArgs - Tuple of the arguments of the task
+    taskName - Name of the task, e.g. its input file
+    """
+
+    # Check attributes of input args
+    # If not present assign appropriate default arguments
+    if hasattr(args,'taskTimeout') is False:
+        args.taskTimeout = 7200
+    if hasattr(args,'taskRetries') is False:
+        args.taskRetries = 1
+
+    journal = openRunJournal(args)
+    if journal is not None and journal.isDone(taskName):
+        print("Skipping {0}, already done according to {1}".format(taskName, args.journal))
+        return {}
+
+    # The timeout interrupts the task, a call to ROOT in progress is finished first
+    import math, sys, traceback
+    def onTimeout(signum, frame):
+        raise RuntimeError("Timed out after {0} seconds".format(args.taskTimeout))
+    previousHandler = signal.signal(signal.SIGALRM, onTimeout)
+    failures = {}
+    try:
+        for attempt in range(1 + max(0, args.taskRetries)):
+            signal.alarm(int(math.ceil(args.taskTimeout)) if args.taskTimeout > 0 else 0)
+            try:
+                func(*taskArgs)
+            except Exception as err:
+                signal.alarm(0)
+                traceback.print_exc(file=sys.stdout)
+                failures[0] = "{0}: {1}".format(type(err).__name__, err)
+                if attempt < args.taskRetries:
+                    printYellow("{0} failed, starting it again: {1}".format(taskName, failures[0]))
+                continue
+            else:
+                failures = {}
+                break
+            finally:
+                signal.alarm(0)
+            pass
+    finally:
+        signal.signal(signal.SIGALRM, previousHandler)
+
+    if len(failures) > 0:
+        printRed("1 of 1 tasks failed:")
+        printRed("\t{0}: {1}".format(taskName, failures[0]))
+        if journal is not None:
+            journal.markFailed(taskName, failures[0])
+    elif journal is not None:
+        journal.markDone(taskName)
+    return failures
+
+def runParallelTasks(args, func, listOfTaskArgs, taskNames, taskSizes=None):
+    """
+    Calls func(*taskArgs) for each tuple taskArgs of listOfTaskArgs in getNumCores2Use(args)
+    parallel processes with runTasks() of multiprocUtils.py.  A failed task does not stop the
+    others, the failures are reported once all tasks are done.  With "--jobs auto" a task is
+    only started if there is enough free memory for it.  If the run has a journal, see
+    openRunJournal(), the tasks it records as done are skipped and the outcome of the others is
+    recorded as soon as they complete.  Returns the output of runTasks(), the results of the
+    skipped tasks are None
+
+    args           - object returned by argparse.ArgumentParser.parse_args(), taskTimeout and
+                     taskRetries are the maximum duration in seconds (0 for no limit) and the
+                     number of retries of each task
+    func           - Function called by each task
+    listOfTaskArgs - List of tuples of the arguments of each task
+    taskNames      - List of the names of the tasks, e.g. their input file
+    taskSizes      - List of the sizes of the tasks, the largest are started first; if None
+                     the size of the file named by the name of the task is used
+    """
+
+    # Check attributes of input args
+    # If not present assign appropriate default arguments
+    if hasattr(args,'taskTimeout') is False:
+        args.taskTimeout = 7200
+    if hasattr(args,'taskRetries') is False:
+        args.taskRetries = 1
+
+    from gempython.gemplotting.utils.anautilities import getNumCores2Use, init_worker
+    from gempython.gemplotting.utils.multiprocUtils import defaultTaskMemory, getFileSize, runTasks
+    if taskSizes is None:
+        taskSizes = [ getFileSize(taskName) for taskName in taskNames ]
+    isAuto = (hasattr(args,'jobs') and args.jobs == "auto")
+
+    # Only run the tasks not done in a previous attempt of this run
+    journal = openRunJournal(args)
+    taskIndices = range(len(listOfTaskArgs))
+    onTaskDone = None
+    if journal is not None:
+        taskIndices = [ idx for idx in taskIndices if not journal.isDone(taskNames[idx]) ]
+        if len(taskIndices) < len(listOfTaskArgs):
+            print("Skipping {0} task(s) already done according to {1}".format(len(listOfTaskArgs) - len(taskIndices), args.journal))
+        def onTaskDone(idx, error):
+            if error is None:
+                journal.markDone(taskNames[taskIndices[idx]])
+            else:
+                journal.markFailed(taskNames[taskIndices[idx]], error)
+            return
+
+    results, failures = runTasks(
+            func,
+            [ listOfTaskArgs[idx] for idx in taskIndices ],
+            getNumCores2Use(args, max(1, len(taskIndices))),
+            [ taskNames[idx] for idx in taskIndices ],
+            [ taskSizes[idx] for idx in taskIndices ],
+            timeout=(args.taskTimeout if args.taskTimeout > 0 else None),
+            retries=args.taskRetries,
+            initializer=init_worker,
+            taskMemory=(defaultTaskMemory if isAuto else None),
+            onTaskDone=onTaskDone)
+
+    # Indices of the tasks in listOfTaskArgs
+    allResults = [ None for taskArgs in listOfTaskArgs ]
+    for taskIdx,idx in enumerate(taskIndices):
+        allResults[idx] = results[taskIdx]
+        pass
+    return (allResults, dict( (taskIndices[taskIdx], reason) for taskIdx,reason in failures.iteritems() ))
+
 def scurveMultiProcessing(args, dictOfFiles):
     """
-    Analyze a set of scurve measurements in parallel with anaUltraScurve
+    Analyze a set of scurve measurements in parallel with anaUltraScurve.  Returns the list of
+    the input files whose analysis failed
 
     args        - object returned by argparse.ArgumentParser.parse_args() 
     dictOfFiles - dictionary where keys are a tuple of the geographic address (shelf,slot,link) and
@@ -557,60 +822,88 @@ def scurveMultiProcessing(args, dictOfFiles):
                   gemVariants dictionary of gempython.tools.hw_constants for possible GEBtype values
     """
 
-    # Setup a pool
-    from multiprocessing import Pool
-    from gempython.gemplotting.utils.anautilities import getNumCores2Use, init_worker
-    pool = Pool(getNumCores2Use(args), initializer=init_worker) # Allocate number of CPU's based on getNumCores2Use()
+    # Analyze the VFATs of each detector one at a time if requested
+    from gempython.gemplotting.utils.scurveAlgos import anaUltraScurve, anaUltraScurveRemask, anaUltraScurveStreaming
+    if hasattr(args,'remaskOnly') and args.remaskOnly:
+        # Only the masks of the previous outputs are computed again
+        if (hasattr(args,'shardByVFAT') and args.shardByVFAT > 1) or (hasattr(args,'streaming') and args.streaming):
+            printYellow("--shardByVFAT and --streaming are ignored with --remaskOnly")
+        anaFunc = anaUltraScurveRemask
+    elif hasattr(args,'streaming') and args.streaming:
+        if hasattr(args,'shardByVFAT') and args.shardByVFAT > 1:
+            printYellow("--shardByVFAT is ignored with --streaming")
+        anaFunc = anaUltraScurveStreaming
+    elif hasattr(args,'shardByVFAT') and args.shardByVFAT > 1:
+        # Split the VFATs of each detector across the processes if requested
+        return scurveShardedMultiProcessing(args, dictOfFiles)
+    else:
+        anaFunc = anaUltraScurve
 
-    # Launch the pool processes
-    from gempython.gemplotting.utils.scurveAlgos import anaUltraScurveStar
-    import itertools, sys, traceback
+    from gempython.gemplotting.utils.anautilities import getNumCores2Use
+    import os, sys
+
+    # With a single detector a pool of chambers would use one core, analyze
+    # it here instead and split the fit of its VFATs across the cores
+    if len(dictOfFiles) == 1:
+        scurveFile = list(dictOfFiles.values())[0]
+        args.fitWorkers = getNumCores2Use(args)
+        try:
+            print("Launching scurve analysis with {0} fit processes, this may take some time, please be patient".format(args.fitWorkers))
+            failures = runInProcessTask(args,
+                    anaFunc,
+                    (args, scurveFile[0], None, scurveFile[2], scurveFile[0].replace(".root",""), None),
+                    scurveFile[0])
+        except KeyboardInterrupt:
+            printRed("Caught KeyboardInterrupt")
+            printRed("Analysis Failed")
+            sys.exit(os.EX_SOFTWARE)
+        else:
+            printParallelSummary(failures, 1)
+        finally:
+            # Ensure permissions of all files in subdirectories have group read and write
+            setPermissions(dictOfFiles)
+            pass
+        return [ scurveFile[0] for idx in failures.keys() ]
+
+    # Fits inside the worker processes always use a single process and
+    # the output images are written once all detectors are analyzed
+    args.deferPlots = True
+
+    # Launch the analysis processes
+    import itertools
     try:
         print("Launching scurve analysis processes, this may take some time, please be patient")
-        pool.map_async(anaUltraScurveStar,
-            itertools.izip(
+        results, failures = runParallelTasks(args,
+            anaFunc,
+            list(itertools.izip(
                 [args for geoAddr in dictOfFiles.keys()],                                    # args namespace
                 [scurveFile[0] for scurveFile in dictOfFiles.values()],                      # scurveFilename
                 [None for geoAddr in dictOfFiles.keys()],                                    # calFile
                 [scurveFile[2] for scurveFile in dictOfFiles.values()],                      # GEBtype
                 [scurveFile[0].replace(".root","") for scurveFile in dictOfFiles.values()],  # outputDir
                 [None for geoAddr in dictOfFiles.keys()]                                     # vfatList
-                )
-            ).get(7200) # wait at most 2 hours
+                )),
+            [scurveFile[0] for scurveFile in dictOfFiles.values()])
     except KeyboardInterrupt:
         printRed("Caught KeyboardInterrupt, terminating workers")
-        pool.terminate()
         printRed("Analysis Failed")
-        sys.exit()
-    except Exception as err:
-        printRed("Caught {0}: {1}, terminating workers".format(type(err), err.message))
-        pool.terminate()
-        traceback.print_exc(file=sys.stdout)
-        printRed("Analysis Failed")
-        sys.exit()
-    except: # catch *all* exceptions
-        e = sys.exc_info()[0]
-        printRed("Caught non-Python Exception %s"%(e))
-        pool.terminate()
-        traceback.print_exc(file=sys.stdout)
-        printRed("Analysis Failed")
-        sys.exit()
+        sys.exit(os.EX_SOFTWARE)
     else:
-        printGreen("Analysis Completed Successfully")
-        pool.close()
-        pool.join()
-        analysisPassed = True
+        renderDeferredPlots(args, dictOfFiles)
+        printParallelSummary(failures, len(dictOfFiles))
     finally:
         # Ensure permissions of all files in subdirectories have group read and write
         setPermissions(dictOfFiles)
         pass
 
-    return
+    return [ scurveFile[0] for idx,scurveFile in enumerate(dictOfFiles.values()) if idx in failures ]
 
 def scurveParallelAna(args):
     """
     This will find all input files and launch a call of scurveMultiProcessing.
     
+    Returns the list of the input files whose analysis failed
+
     args - object returned by argparse.ArgumentParser.parse_args() 
     """
 
@@ -622,13 +915,108 @@ def scurveParallelAna(args):
     # Get list of input files
     dictOfFiles = getFileList("scurve",chamber_config,args.scandate,args.debug,GEBtype,args.inputfilename,args.listOfScandatesFile)
 
+    # Files holding several links are analyzed one link per task
+    dictOfFiles = splitScurveFilesByLink(dictOfFiles,chamber_config,GEBtype)
+
+    # Only analyze the files whose output is not up to date
+    dictOfFiles, dictOfManifests = filterUpToDateFiles(args, "scurve", dictOfFiles, "SCurveFitData.root")
+    if len(dictOfFiles) == 0:
+        printGreen("All outputs are up to date, nothing to analyze")
+        return []
+
     # Make output directories and set permissions
     makeOutDirectories(dictOfFiles)
 
     # Launch the pool processes
-    scurveMultiProcessing(args,dictOfFiles)
+    failedFiles = scurveMultiProcessing(args,dictOfFiles)
+    writeAnaManifests(dictOfManifests, failedFiles)
     
-    return
+    return failedFiles
+
+def scurveShardedMultiProcessing(args, dictOfFiles):
+    """
+    Analyze a set of scurve measurements in parallel with anaUltraScurve, the VFATs of each
+    detector are split in args.shardByVFAT disjoint vfatLists analyzed by separate pool
+    processes.  The partial outputs of each detector are then merged with mergeScurveShards
+    into a single output, as if the detector had been analyzed by one process.  The detectors
+    for which a shard failed are not merged.  Returns the list of the input files whose analysis
+    failed
+
+    args        - object returned by argparse.ArgumentParser.parse_args() 
+    dictOfFiles - dictionary where keys are a tuple of the geographic address (shelf,slot,link) and
+                  whose values are a tuple (filename,chamberName,GEBtype). See the values of the
+                  gemVariants dictionary of gempython.tools.hw_constants for possible GEBtype values
+    """
+
+    from gempython.gemplotting.utils.multiprocUtils import getFileSize
+    from gempython.gemplotting.utils.scurveAlgos import getScurveShardVFATLists
+    import copy, os, shutil, sys
+
+    # The shards only produce the TFile and text files of their VFATs, the
+    # images are made from the merged output once all detectors are analyzed
+    args.deferPlots = True
+    args.fitWorkers = 1
+    shardArgs = copy.copy(args)
+    shardArgs.noPlots = True
+
+    shardTasks = []
+    shardNames = []
+    shardSizes = []
+    shardOwners = [] # index in mergeTasks of the detector of each shard
+    mergeTasks = []
+    for scurveFile in dictOfFiles.values():
+        outputDir = scurveFile[0].replace(".root","")
+        shardDirs = []
+        for idx,vfatList in enumerate(getScurveShardVFATLists(scurveFile[0], args.shardByVFAT)):
+            shardDir = "{0}/vfatShard{1}".format(outputDir,idx)
+            if not os.path.isdir(shardDir):
+                os.makedirs(shardDir)
+            shardDirs.append(shardDir)
+            shardTasks.append((shardArgs, scurveFile[0], None, scurveFile[2], shardDir, vfatList))
+            shardNames.append("{0} VFATs {1}".format(scurveFile[0], vfatList))
+            shardSizes.append(getFileSize(scurveFile[0]) * len(vfatList))
+            shardOwners.append(len(mergeTasks))
+            pass
+        mergeTasks.append((args, scurveFile[0], shardDirs, outputDir))
+        pass
+
+    # Launch the analysis processes, a detector is merged only if all its shards succeeded
+    from gempython.gemplotting.utils.scurveAlgos import anaUltraScurve, mergeScurveShards
+    try:
+        print("Launching {0} scurve analysis processes for {1} detector(s), this may take some time, please be patient".format(len(shardTasks),len(mergeTasks)))
+        results, shardFailures = runParallelTasks(args, anaUltraScurve, shardTasks, shardNames, shardSizes)
+        failedDetectors = set([ shardOwners[idx] for idx in shardFailures.keys() ])
+        mergeIndices = [ idx for idx in range(len(mergeTasks)) if idx not in failedDetectors ]
+        print("Merging the outputs of each detector")
+        results, mergeFailures = runParallelTasks(args,
+                mergeScurveShards,
+                [ mergeTasks[idx] for idx in mergeIndices ],
+                [ mergeTasks[idx][1] for idx in mergeIndices ])
+        failedDetectors.update([ mergeIndices[idx] for idx in mergeFailures.keys() ])
+    except KeyboardInterrupt:
+        printRed("Caught KeyboardInterrupt, terminating workers")
+        printRed("Analysis Failed")
+        sys.exit(os.EX_SOFTWARE)
+    else:
+        # Keep the log of each shard, the rest of its output is in the merged
+        # files.  The shards of the failed detectors are left for inspection
+        for detIdx,mergeTask in enumerate(mergeTasks):
+            if detIdx in failedDetectors:
+                continue
+            for idx,shardDir in enumerate(mergeTask[2]):
+                if os.path.isfile("{0}/anaLog.log".format(shardDir)):
+                    shutil.move("{0}/anaLog.log".format(shardDir), "{0}/anaLog_vfatShard{1}.log".format(mergeTask[3],idx))
+                shutil.rmtree(shardDir)
+                pass
+            pass
+        renderDeferredPlots(args, dictOfFiles)
+        printParallelSummary(dict( (idx, mergeTasks[idx][1]) for idx in failedDetectors ), len(mergeTasks))
+    finally:
+        # Ensure permissions of all files in subdirectories have group read and write
+        setPermissions(dictOfFiles)
+        pass
+
+    return [ mergeTasks[idx][1] for idx in failedDetectors ]
 
 def setPermissions(dictOfFiles, permissions="g+rw"):
     """
@@ -646,11 +1034,60 @@ def setPermissions(dictOfFiles, permissions="g+rw"):
         pass
     return
 
+def splitScurveFilesByLink(dictOfFiles, chamber_config, GEBtype=None):
+    """
+    Replaces the scurve files of dictOfFiles that hold the data of several links, e.g. taken
+    on a full AMC, by one file per link made with splitScurveFileByLink, so that each link is
+    analyzed as its own task of the pool.  Each of these input files is read once, the files
+    of its links are written in its output directory.  If a link is provided by several files,
+    a file holding only this link is used first, then the split file of the lowest geographic
+    address.
+
+    Returns a dictionary with the same format as dictOfFiles.
+
+    dictOfFiles     - dictionary where keys are a tuple of the geographic address (shelf,slot,link) and
+                      whose values are a tuple (filename,chamberName,GEBtype), see getFileList()
+    chamber_config  - Dictionary whose key values are geographic address, e.g. (shelf,slot,link), and values are detector serial numbers
+    GEBtype         - Optional, dictionary whose key values are geographic address, e.g. (shelf,slot,link), and values are GEB type (e.g. detector type)
+    """
+
+    from gempython.gemplotting.utils.scurveAlgos import splitScurveFileByLink
+    splitDictOfFiles = {}
+    dictOfLinkFiles = {}
+    for geoAddr,infoTuple in dictOfFiles.iteritems():
+        # The files of each link are written in the output directory of the input file
+        linkFiles = splitScurveFileByLink(infoTuple[0], infoTuple[0].replace(".root",""))
+        if len(linkFiles) == 0:
+            splitDictOfFiles[geoAddr] = infoTuple
+        else:
+            print("Split {0} in {1} files, one per link".format(infoTuple[0],len(linkFiles)))
+            dictOfLinkFiles[geoAddr] = linkFiles
+            setPermissions({geoAddr:infoTuple})
+        pass
+
+    # The files holding a single link take precedence over the links of split files
+    for geoAddr in sorted(dictOfLinkFiles.keys()):
+        infoTuple = dictOfFiles[geoAddr]
+        linkFiles = dictOfLinkFiles[geoAddr]
+        for ohKey,(linkFilename,detName) in linkFiles.iteritems():
+            if ohKey in splitDictOfFiles:
+                printYellow("Link {0} of {1} is also provided by {2}. Skipping".format(ohKey,infoTuple[0],splitDictOfFiles[ohKey][0]))
+                continue
+            cName = chamber_config[ohKey] if ohKey in chamber_config else detName
+            detType = GEBtype[ohKey] if ((GEBtype is not None) and (ohKey in GEBtype)) else infoTuple[2]
+            splitDictOfFiles[ohKey] = (linkFilename,cName,detType)
+            pass
+        pass
+
+    return splitDictOfFiles
+
 def threshTrkParallelAna(args):
     """
     This launches a call of anaUltraThreshold in parallel on each of the 
     input files that have been found.
 
+    Returns the list of the input files whose analysis failed
+
     args - object returned by argparse.ArgumentParser.parse_args() 
     """
 
@@ -662,11 +1099,6 @@ def threshTrkParallelAna(args):
     # Get list of input files for threshold analysis
     dictOfFiles = getFileList("thresholdch",chamber_config,args.scandate,args.debug,GEBtype,args.inputfilename,args.listOfScandatesFile)
     
-    # Setup a pool
-    from multiprocessing import Pool
-    from gempython.gemplotting.utils.anautilities import getNumCores2Use, init_worker
-    pool = Pool(getNumCores2Use(args), initializer=init_worker) # Allocate number of CPU's based on getNumCores2Use()
-
     # Should the chConfig.txt file produced in the threshold analysis include updates from a completed scurve analysis?
     if args.scurveScandate is not None:
         dictOfScurveAnaFiles = getFileList("scurveAna",chamber_config,args.scurveScandate,args.debug,GEBtype,args.inputfilename,None)
@@ -678,48 +1110,49 @@ def threshTrkParallelAna(args):
     else:
         dictOfScurveAnaFiles = {geoAddr:(None,None) for geoAddr,thrFile in dictOfFiles.iteritems()}
 
+    # Only analyze the files whose output is not up to date, the scurve fit
+    # results are taken into account as an input of each analysis
+    dictOfFiles, dictOfManifests = filterUpToDateFiles(args, "thrDac", dictOfFiles, "ThresholdPlots.root",
+            dict( (geoAddr, dictOfScurveAnaFiles[geoAddr][0]) for geoAddr in dictOfFiles.keys() ))
+    if len(dictOfFiles) == 0:
+        printGreen("All outputs are up to date, nothing to analyze")
+        return []
+
     # Make output directories and set permissions
     makeOutDirectories(dictOfFiles)
 
-    # Launch the pool processes
-    from gempython.gemplotting.utils.threshAlgos import anaUltraThresholdStar
-    import itertools, sys, traceback
+    # Launch the analysis processes, the output images are written once all detectors are analyzed
+    from gempython.gemplotting.utils.threshAlgos import anaUltraThreshold
+    import itertools
+    args.deferPlots = True
     try:
         print("Launching threshold analysis processes, this may take some time, please be patient")
-        pool.map_async(anaUltraThresholdStar,
-                itertools.izip(
+        results, failures = runParallelTasks(args,
+                anaUltraThreshold,
+                list(itertools.izip(
                     [args for geoAddr in dictOfFiles.keys()],                               # args namespace
                     [thrFile[0] for thrFile in dictOfFiles.values()],                       # thrFilename
                     [GEBtype[geoAddr] for geoAddr in dictOfFiles.keys()],                   # GEBtype
                     [thrFile[0].replace(".root","") for thrFile in dictOfFiles.values()],   # outputDir
-                    [scurveFile[0] for scurveFile in dictOfScurveAnaFiles.values()]         # fileScurveFitTree
-                    )
-                ).get(7200) # wait at most 2 hours
+                    [dictOfScurveAnaFiles[geoAddr][0] for geoAddr in dictOfFiles.keys()]    # fileScurveFitTree
+                    )),
+                [thrFile[0] for thrFile in dictOfFiles.values()])
     except KeyboardInterrupt:
+        import os, sys
         printRed("Caught KeyboardInterrupt, terminating workers")
-        pool.terminate()
-        printRed("Analysis Failed")
-    except Exception as err:
-        printRed("Caught {0}: {1}, terminating workers".format(type(err), err.message))
-        pool.terminate()
-        traceback.print_exc(file=sys.stdout)
-        printRed("Analysis Failed")
-    except: # catch *all* exceptions
-        e = sys.exc_info()[0]
-        printRed("Caught non-Python Exception %s"%(e))
-        pool.terminate()
-        traceback.print_exc(file=sys.stdout)
         printRed("Analysis Failed")
+        sys.exit(os.EX_SOFTWARE)
     else:
-        printGreen("Analysis Completed Successfully")
-        pool.close()
-        pool.join()
+        renderDeferredPlots(args, dictOfFiles)
+        printParallelSummary(failures, len(dictOfFiles))
+        failedFiles = [ dictOfFiles.values()[idx][0] for idx in failures.keys() ]
+        writeAnaManifests(dictOfManifests, failedFiles)
     finally:
         # Ensure permissions of all files in subdirectories have group read and write
         setPermissions(dictOfFiles)
         pass
 
-    return
+    return failedFiles
 
 def trimParallelAna(args):
     """
@@ -727,6 +1160,8 @@ def trimParallelAna(args):
     is None and args.trimPoints is not None this will also analyze the selected scurves taken at each
     point in args.trimPoints in addition to the 'Trimmed' scurve for each of the input scandates. 
     
+    Returns the list of the input files whose analysis failed
+
     args - object returned by argparse.ArgumentParser.parse_args() 
     """
 
@@ -783,12 +1218,40 @@ def trimParallelAna(args):
             pass
         pass
 
+    # Only analyze the files whose output is not up to date
+    dictOfFiles, dictOfManifests = filterUpToDateFiles(args, "trim", dictOfFiles, "SCurveFitData.root")
+    if len(dictOfFiles) == 0:
+        printGreen("All outputs are up to date, nothing to analyze")
+        return []
+
     # Make output directories and set permissions
     makeOutDirectories(dictOfFiles)
 
     # Launch the pool processes
-    scurveMultiProcessing(args,dictOfFiles)
+    failedFiles = scurveMultiProcessing(args,dictOfFiles)
+    writeAnaManifests(dictOfManifests, failedFiles)
+
+    return failedFiles
+
+def writeAnaManifests(dictOfManifests, failedFiles):
+    """
+    Stores the analysis manifests returned by filterUpToDateFiles() in the output directory of
+    each input file that was successfully analyzed, i.e. that is not in failedFiles and whose
+    output TFile exists, so that it is skipped by the next analysis with the same inputs and
+    options.
+
+    dictOfManifests - dictionary returned by filterUpToDateFiles()
+    failedFiles     - list of the input files whose analysis failed
+    """
 
+    from gempython.gemplotting.utils.anautilities import writeJSONFile
+    import os, time
+    for inputFilename,(outputDir,manifest) in dictOfManifests.iteritems():
+        if inputFilename in failedFiles or not os.path.isfile("{0}/{1}".format(outputDir,manifest["outputs"][0])):
+            continue
+        manifest["created"] = time.strftime("%Y.%m.%d.%H.%M.%S")
+        writeJSONFile(manifest, "{0}/anaManifest.json".format(outputDir))
+        pass
     return
 
 if __name__ == '__main__':
@@ -797,6 +1260,7 @@ if __name__ == '__main__':
     # create the parent parser for input files and stand config
     parser_fileAndConfig = argparse.ArgumentParser(add_help = False)
     parser_fileAndConfig.add_argument("-d","--debug", action="store_true",help = "Print additional debugging information")
+    parser_fileAndConfig.add_argument("--noPlots", action="store_true",help = "Do not write the output images, only the output TFiles and text files are produced")
     
     inputFileGroup = parser_fileAndConfig.add_mutually_exclusive_group(required=True)
     inputFileGroup.add_argument("-s","--scandate",type=str,help="scandate in YYYY.MM.DD.hh.mm format of input data.  Will find all files associated to this scandate for the relevant command.")
@@ -815,6 +1279,13 @@ if __name__ == '__main__':
     cpuUsagee.add_argument("--light", action="store_true", help="Analysis uses only 25%% of available cores")
     cpuUsagee.add_argument("--medium", action="store_true", help="Analysis uses only 50%% of available cores")
     cpuUsagee.add_argument("--heavy", action="store_true", help="Analysis uses only 75%% of available cores")
+    cpuUsagee.add_argument("-j","--jobs", type=str, default=None, metavar="N|auto", help="Analysis uses N cores; with 'auto' the number of cores is determined from the idle cores, the available memory and the number of input files, and new analyses wait for enough free memory")
+    runJournal = parser_parallelAna.add_mutually_exclusive_group()
+    runJournal.add_argument("--journal", type=str, default=None, metavar="JOURNAL", help="Record the progress of this run in the file JOURNAL, so that it can be continued with --resume if it is interrupted. By default the progress is not recorded")
+    runJournal.add_argument("--resume", type=str, default=None, metavar="JOURNAL", help="Continue an interrupted run from the journal it recorded with --journal, the tasks the journal records as done are skipped. The other arguments should be the same as for the interrupted run")
+    parser_parallelAna.add_argument("--taskRetries", type=int, default=1, help="Number of times the analysis of an input file is started again if it fails")
+    parser_parallelAna.add_argument("--force", action="store_true", help="Analyze all input files, by default an input file is skipped if its output directory holds an analysis manifest (anaManifest.json) made from the same input files, options and version of gemplotting")
+    parser_parallelAna.add_argument("--taskTimeout", type=float, default=7200, help="Maximum duration in seconds of the analysis of an input file, it is then stopped and reported as failed. 0 for no limit")
 
     # create the parent parser for making output plots w.r.t ASIC channel or panasonic connector pin
     parser_stripChanOrPinType = argparse.ArgumentParser(add_help = False)
@@ -826,14 +1297,16 @@ if __name__ == '__main__':
     parser_zscore = argparse.ArgumentParser(add_help = False)
     parser_zscore.add_argument("-z","--zscore", type=float, default=10,help="Z-Score for Outlier Identification in MAD Algo, used to set HotChannel bit")
 
-    from gempython.gemplotting.utils.anaoptions import parser_scurveChanMasks
+    from gempython.gemplotting.utils.anaoptions import parser_scurveChanMasks, parser_scurveFitting
     
     # List of parent parsers specifically scurce analysis
-    listOfParentParsers4Scurves = [parser_fileAndConfig, parser_parallelAna, parser_scurveChanMasks, parser_stripChanOrPinType, parser_zscore]
+    listOfParentParsers4Scurves = [parser_fileAndConfig, parser_parallelAna, parser_scurveChanMasks, parser_scurveFitting, parser_stripChanOrPinType, parser_zscore]
 
     # create the parser that sub parsers will come from
     # =================================================
     parser = argparse.ArgumentParser(description='Arguments to supply to ana_scans.py')
+    parser.add_argument("--server", action="store_true", help="Run the analysis in the analysis server started with gemAnaServer.py, which has ROOT and the analysis modules already loaded, instead of starting new processes")
+    parser.add_argument("--serverSocket", type=str, default=None, help="Socket of the analysis server used with --server, default is $GEM_ANA_SERVER_SOCKET or /tmp/gemAnaServer-<uid>.sock")
 
     # Create sub parser
     # =================================================
@@ -878,6 +1351,9 @@ if __name__ == '__main__':
     # -------------------------------------------------
     parser_scurve = subparserCmds.add_parser("scurve", help="Analyzes scurve data taken with either ultraScurve.py or 'run_scans.py scurve'", parents = listOfParentParsers4Scurves)
     parser_scurve.add_argument("--doNotFit", action="store_true", help="Do not attempt to fit the scurves")
+    parser_scurve.add_argument("--remaskOnly", action="store_true", help="Do not analyze the scurves again, only compute the channel masks of the existing SCurveFitData.root with the given cuts and update the masks, chConfig.txt and the plots without masked channels in place. Meant for sweeping the cut values")
+    parser_scurve.add_argument("--shardByVFAT", type=int, default=1, metavar="K", help="Split the VFATs of each detector in K groups analyzed by separate processes, the outputs of each detector are then merged. Keeps all cores busy when there are fewer detectors than cores")
+    parser_scurve.add_argument("--streaming", action="store_true", help="Analyze the VFATs of each detector one at a time, the objects of a VFAT are freed before the next one is read, the outputs are then merged. The input file is read once, by chunks of entries, and the memory used by each process does not grow with the number of VFATs. Meant for large detectors or shared machines")
 
     parser_scurve.set_defaults(func=scurveParallelAna)
 
@@ -904,6 +1380,56 @@ if __name__ == '__main__':
     envCheck("ELOG_PATH")
 
     args = parser.parse_args()
-    args.func(args)
+
+    # Record the progress of the parallel analyses if requested, so an interrupted run can be resumed
+    if hasattr(args,'resume'):
+        import os, sys
+        from gempython.gemplotting.utils.runJournal import RunJournal
+        if args.resume is not None:
+            args.journal = args.resume
+            journal = RunJournal(args.journal)
+            print("Resuming the run started with '{0}', {1} task(s) done and {2} failed".format(journal.content["command"], *journal.getCounts()))
+        elif args.journal is not None:
+            if os.path.exists(args.journal):
+                printRed("Journal {0} already exists, use '--resume {0}' to continue its run".format(args.journal))
+                sys.exit(os.EX_USAGE)
+            RunJournal(args.journal, " ".join(sys.argv)).write()
+            print("Progress of this run is recorded in {0}, if it is interrupted call the same command with '--resume {0}' instead of '--journal {0}' to continue it".format(args.journal))
+            pass
+        pass
+
+    if args.server:
+        # The function is sent by name, the server loads this script itself
+        import os, sys
+        from gempython.gemplotting.utils.anaServer import submitJob
+        funcName = args.func.__name__
+        args.func = None
+        try:
+            outcome = submitJob(funcName, (args,), scriptPath=os.path.realpath(__file__), socketPath=args.serverSocket)
+        except IOError as err:
+            printRed(str(err))
+            sys.exit(os.EX_UNAVAILABLE)
+        if outcome["status"] != "done":
+            printRed("Analysis in the server failed: {0}".format(outcome["error"]))
+            sys.exit(os.EX_SOFTWARE)
+        print("Analysis in the server took {0:.1f} seconds".format(outcome["elapsed"]))
+        print("Good-bye")
+        sys.exit(os.EX_SOFTWARE if outcome["result"] else os.EX_OK)
+
+    # With several worker processes each of them uses a single thread, set before numpy is imported
+    if hasattr(args,'jobs'):
+        from gempython.gemplotting.utils.anautilities import getNumCores2Use
+        if getNumCores2Use(args) > 1:
+            from gempython.gemplotting.utils.multiprocUtils import limitWorkerThreads
+            limitWorkerThreads()
+            pass
+        pass
+    failedFiles = args.func(args)
+
+    # The parallel analyses report their failures instead of stopping the run
+    if failedFiles:
+        import os, sys
+        print("Good-bye")
+        sys.exit(os.EX_SOFTWARE)
 
     print("Good-bye")
@@ -242,8 +242,12 @@ man_pages = [
      authors, 1),
     ('man/anaDACScan', 'anaDACScan.py', u'Perform a DAC scan analysis',
      authors, 1),
+    ('man/benchmarkFitModels', 'benchmarkFitModels.py', u'Compare the speed of the S-curve model kernels',
+     authors, 1),
     ('man/clusterAnaScurve', 'clusterAnaScurve.py', u'Analyze S-curves using the LSF cluster',
      authors, 1),
+    ('man/gemAnaServer', 'gemAnaServer.py', u'Run the analysis tools in a persistent server',
+     authors, 1),
     ('man/gemPlotter', 'gemPlotter.py', u'Plot time evolution of scan results',
      authors, 1),
     ('man/gemSCurveAnaToolkit', 'gemSCurveAnaToolkit.py', u'Plot scan results vs time',
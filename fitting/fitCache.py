@@ -0,0 +1,133 @@
+r"""
+``fitCache`` --- On-disk cache of S-curve fit results
+=====================================================
+
+.. code-block:: python
+
+    import gempython.gemplotting.fitting.fitCache
+
+Documentation
+-------------
+"""
+
+import os
+import sqlite3
+import time
+
+def getDefaultFitCachePath():
+    """
+    Returns the default location of the fit cache, ``$HOME/.cache/gemplotting/scurveFitCache.sqlite``
+    """
+    return os.path.join(os.path.expanduser("~"), ".cache", "gemplotting", "scurveFitCache.sqlite")
+
+class FitCache(object):
+    r"""
+    Stores the fit results of single S-curves in an ``sqlite3`` database so
+    that they can be reused when the same data are fit again, e.g. when an
+    S-curve scan is re-analyzed with different mask cuts.
+
+    Entries are identified by a key computed by the fitter from the content
+    of the S-curve, the calibration, the fit model and the fit settings, see
+    :py:meth:`gempython.gemplotting.fitting.fitScanData.ScanDataFitter.fit`.
+    When the cache holds more than :py:attr:`maxEntries` entries the least
+    recently used ones are removed.
+
+    Example:
+        Typical usage:
+
+        .. code-block:: python
+
+            cache = FitCache()
+            fitter.fit(cache=cache)
+            cache.close()
+
+    Attributes:
+        path (str): Path of the database file
+
+        maxEntries (int): Maximum number of entries kept in the cache
+    """
+
+    def __init__(self, path=None, maxEntries=1000000):
+        if path is None:
+            path = getDefaultFitCachePath()
+        cacheDir = os.path.dirname(os.path.abspath(path))
+        if not os.path.isdir(cacheDir):
+            try:
+                os.makedirs(cacheDir)
+            except OSError:
+                # Another process may have created it in the meantime
+                if not os.path.isdir(cacheDir):
+                    raise
+
+        self.path = path
+        self.maxEntries = maxEntries
+
+        # Several analyses may use the cache at the same time, wait for the
+        # lock instead of failing
+        self._connection = sqlite3.connect(path, timeout=120)
+        self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS fits ("
+                "key TEXT PRIMARY KEY, p0 REAL, p1 REAL, p2 REAL, p3 REAL, "
+                "chi2 REAL, ndf REAL, valid INTEGER, lastUsed REAL)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS fitsLastUsed ON fits (lastUsed)")
+        self._connection.commit()
+        return
+
+    def get(self, keys):
+        """
+        Looks up the given keys in the cache, and marks the entries found as
+        recently used.
+
+        Args:
+            keys (iterable): Keys to look up
+
+        Returns: A dictionary mapping each key found to a tuple
+            ``(params, chi2, ndf, valid)`` where ``params`` is the list of the
+            four parameters of the fit function
+        """
+        keys = list(keys)
+        results = {}
+        # Stay below the maximum number of host parameters of sqlite
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start+500]
+            query = "SELECT key, p0, p1, p2, p3, chi2, ndf, valid FROM fits WHERE key IN ({0})".format(",".join("?"*len(chunk)))
+            for row in self._connection.execute(query, chunk):
+                results[row[0]] = (list(row[1:5]), row[5], row[6], bool(row[7]))
+                pass
+            pass
+
+        now = time.time()
+        self._connection.executemany("UPDATE fits SET lastUsed = ? WHERE key = ?", [ (now, key) for key in results ])
+        self._connection.commit()
+        return results
+
+    def put(self, results):
+        """
+        Stores fit results in the cache, then removes the least recently used
+        entries if there are more than :py:attr:`maxEntries`.
+
+        Args:
+            results (dict): Maps keys to tuples ``(params, chi2, ndf, valid)``,
+                as returned by :py:meth:`get`
+        """
+        now = time.time()
+        self._connection.executemany(
+                "INSERT OR REPLACE INTO fits VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [ (key, float(params[0]), float(params[1]), float(params[2]), float(params[3]), float(chi2), float(ndf), int(valid), now)
+                    for key, (params, chi2, ndf, valid) in results.items() ])
+
+        nEntries = self._connection.execute("SELECT COUNT(*) FROM fits").fetchone()[0]
+        if nEntries > self.maxEntries:
+            self._connection.execute(
+                    "DELETE FROM fits WHERE key IN (SELECT key FROM fits ORDER BY lastUsed ASC LIMIT ?)",
+                    (nEntries - self.maxEntries,))
+            pass
+        self._connection.commit()
+        return
+
+    def close(self):
+        """
+        Closes the database
+        """
+        self._connection.close()
+        return
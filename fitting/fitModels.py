@@ -0,0 +1,183 @@
+r"""
+``fitModels`` --- Fit models shared by the analysis tools
+=========================================================
+
+.. code-block:: python
+
+    import gempython.gemplotting.fitting.fitModels
+
+Each model is available in three forms:
+
+* a ``TFormula`` expression, used for the ``TF1`` objects written to the
+  output files,
+* a C++ function compiled once per process by the ROOT interpreter, see
+  :py:func:`makeModelTF1`, used for fitting with ``TH1::Fit`` or
+  ``TGraph::Fit``,
+* for the S-curve model, vectorized NumPy functions used by the ``"numpy"``
+  and ``"quickLook"`` engines of
+  :py:class:`gempython.gemplotting.fitting.fitScanData.ScanDataFitter`.
+
+The compiled and interpreted forms give the same results, but the compiled
+functions are several times faster to evaluate. They are compared by
+:program:`benchmarkFitModels.py`.
+
+Documentation
+-------------
+"""
+
+import numpy as np
+
+try:
+    from scipy.special import erf as _erf
+except ImportError:
+    def _erf(x):
+        r"""
+        Vectorized error function for when :py:mod:`scipy` is not available.
+        Uses formula 7.1.26 of Abramowitz and Stegun, the absolute error is
+        below :math:`1.5 \times 10^{-7}`.
+        """
+        sign = np.sign(x)
+        t = 1. / (1. + 0.3275911 * np.abs(x))
+        poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+        return sign * (1. - poly * np.exp(-x * x))
+
+#: ``TFormula`` of the S-curve model
+scurveFormula = '[3]*TMath::Erf((TMath::Max([2],x)-[0])/(TMath::Sqrt(2)*[1]))+[3]'
+
+#: ``TFormula`` of the scurve mean vs. ``CFG_THR_*_DAC`` calibration curve
+thrDacFormula = '[0]*x^4+[1]*x^3+[2]*x^2+[3]*x+[4]'
+
+#: Models known to :py:func:`makeModelTF1`, mapping their name to their
+#: ``TFormula`` and to the compiled function creating their ``TF1``
+fitModels = {
+        "scurve":(scurveFormula, "makeScurveTF1"),
+        "thrDac":(thrDacFormula, "makeThrDacTF1")
+        }
+
+# C++ version of the models, the functions must give the same results as the
+# formulas above
+_compiledModelsCode = """
+#include "TF1.h"
+#include "TMath.h"
+
+namespace gemplotting {
+    double scurveModel(double *x, double *p) {
+        return p[3]*TMath::Erf((TMath::Max(p[2],x[0])-p[0])/(TMath::Sqrt(2)*p[1]))+p[3];
+    }
+
+    double thrDacModel(double *x, double *p) {
+        return (((p[0]*x[0]+p[1])*x[0]+p[2])*x[0]+p[3])*x[0]+p[4];
+    }
+
+    TF1 *makeScurveTF1(const char *name, double xmin, double xmax) {
+        return new TF1(name, scurveModel, xmin, xmax, 4);
+    }
+
+    TF1 *makeThrDacTF1(const char *name, double xmin, double xmax) {
+        return new TF1(name, thrDacModel, xmin, xmax, 5);
+    }
+}
+"""
+
+_compiledModelsDeclared = None
+
+def declareCompiledModels():
+    """
+    Compiles the C++ version of the models with the ROOT interpreter. Only the
+    first call in a process does the work.
+
+    Returns: ``True`` if the compiled models are available
+    """
+    global _compiledModelsDeclared
+    if _compiledModelsDeclared is None:
+        import ROOT as r
+        _compiledModelsDeclared = bool(r.gInterpreter.Declare(_compiledModelsCode))
+        if not _compiledModelsDeclared:
+            from gempython.utils.gemlogger import printYellow
+            printYellow("declareCompiledModels(): unable to compile the fit models, falling back on TFormula")
+            pass
+        pass
+    return _compiledModelsDeclared
+
+def makeModelTF1(model, name, xmin, xmax, compiled=True):
+    """
+    Creates a ``TF1`` of one of the :py:data:`fitModels`.
+
+    A compiled ``TF1`` only keeps a sampling of the function when it is
+    written to a file, use ``compiled=False`` for the objects that are meant to
+    be stored.
+
+    Args:
+        model (str): Name of the model, a key of :py:data:`fitModels`
+        name (str): Name of the ``TF1``
+        xmin (float): Lower edge of the range of the ``TF1``
+        xmax (float): Upper edge of the range of the ``TF1``
+        compiled (bool): Use the compiled version of the model if available,
+            otherwise its ``TFormula``
+
+    Returns: A ``TF1``
+    """
+    import ROOT as r
+    if model not in fitModels:
+        raise ValueError("makeModelTF1(): model '{0}' not understood, available models are: {1}".format(model, list(fitModels.keys())))
+
+    formula, factory = fitModels[model]
+    if compiled and declareCompiledModels():
+        return getattr(r.gemplotting, factory)(name, xmin, xmax)
+    return r.TF1(name, formula, xmin, xmax)
+
+def scurveFunc(x, params):
+    r"""
+    Evaluates the S-curve model,
+
+    .. math::
+
+        f(x) = p_3 \, \mathrm{erf}\left(\frac{\max(p_2, x) - p_0}{\sqrt{2} p_1}\right) + p_3
+
+    for many channels at once.
+
+    Args:
+        x (numpy.ndarray): Charge values, shape ``(nChannels, nBins)``
+        params (numpy.ndarray): Parameters ``(p0, p1, p2, p3)`` of each channel,
+            shape ``(nChannels, 4)``
+
+    Returns: A ``numpy.ndarray`` of shape ``(nChannels, nBins)``
+    """
+    p0 = params[:, 0, np.newaxis]
+    p1 = params[:, 1, np.newaxis]
+    p2 = params[:, 2, np.newaxis]
+    p3 = params[:, 3, np.newaxis]
+    return p3 * _erf((np.maximum(p2, x) - p0) / (np.sqrt(2.) * p1)) + p3
+
+def scurveJacobian(x, params, values=None):
+    """
+    Analytic derivatives of :py:func:`scurveFunc` with respect to its
+    parameters.
+
+    Args:
+        x (numpy.ndarray): Charge values, shape ``(nChannels, nBins)``
+        params (numpy.ndarray): Parameters of each channel, shape
+            ``(nChannels, 4)``
+        values (numpy.ndarray): If given, the output of :py:func:`scurveFunc`
+            for the same arguments. The error function is then not evaluated
+            again.
+
+    Returns: A ``numpy.ndarray`` of shape ``(nChannels, nBins, 4)``
+    """
+    p0 = params[:, 0, np.newaxis]
+    p1 = params[:, 1, np.newaxis]
+    p2 = params[:, 2, np.newaxis]
+    p3 = params[:, 3, np.newaxis]
+
+    z = (np.maximum(p2, x) - p0) / (np.sqrt(2.) * p1)
+    gauss = p3 * 2. / np.sqrt(np.pi) * np.exp(-z * z)
+
+    jac = np.empty(x.shape + (4,))
+    jac[..., 0] = -gauss / (np.sqrt(2.) * p1)
+    jac[..., 1] = -gauss * z / p1
+    jac[..., 2] = np.where(x < p2, gauss / (np.sqrt(2.) * p1), 0.)
+    if values is None:
+        jac[..., 3] = _erf(z) + 1.
+    else:
+        jac[..., 3] = values / np.where(p3 != 0., p3, 1.)
+    return jac
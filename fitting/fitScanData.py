@@ -12,7 +12,222 @@ Documentation
 
 import numpy as np
 import ROOT as r
-from gempython.gemplotting.utils.anaInfo import dict_calSF
+import time
+from gempython.gemplotting.fitting.fitModels import makeModelTF1, scurveFormula, scurveFunc, scurveJacobian
+from gempython.gemplotting.utils.anaInfo import dict_calSF, fitEngines, fitInitGuesses
+
+#: Version of each fit engine, to be increased whenever a change modifies the
+#: fit results; entries of a :py:class:`gempython.gemplotting.fitting.fitCache.FitCache`
+#: made with another version are not used
+fitEngineVersions = {
+        "root":1,
+        "numpy":1,
+        "quickLook":1
+        }
+
+#: Fields of :py:attr:`ScanDataFitter.fitStats`
+fitStatsDtype = [
+        ("attempts", "i4"),  # number of fits of the channel
+        ("nInvalid", "i4"),  # fits with an invalid result
+        ("nEmpty", "i4"),    # fits with an empty result
+        ("normChi2", "f8"),  # chi2/NDF of the result, NaN if there is none
+        ("fitTime", "f8"),   # wall time spent fitting the channel, in seconds
+        ("fromCache", "?")   # result taken from the fit cache
+        ]
+
+def _medianAboveHalfMax(y):
+    """
+    Returns the median of the bins of each row of ``y`` above half of the
+    maximum of the row, NaN for the rows without such bins. Equivalent to
+    ``np.nanmedian``, which needs numpy 1.9.
+    """
+    yMax = np.max(y, axis=1)[:, np.newaxis]
+    isAbove = y >= 0.5 * yMax
+    nAbove = isAbove.sum(axis=1)
+    values = np.sort(np.where(isAbove, y, np.inf), axis=1)
+    rows = np.arange(len(y))
+    median = 0.5 * (values[rows, np.maximum(nAbove - 1, 0) // 2] + values[rows, np.minimum(nAbove // 2, y.shape[1] - 1)])
+    return np.where(nAbove > 0, median, np.nan)
+
+def scurveInitialGuess(x, y, amplitude, minWidth=0.):
+    r"""
+    Computes starting values for :py:func:`~gempython.gemplotting.fitting.fitModels.scurveFunc` from the S-curves
+    themselves:
+
+    * the amplitude :math:`p_3` is half of the plateau, taken as the median of
+      the bins above half of the maximum and kept within 25% of ``amplitude``,
+    * the mean :math:`p_0` is where the S-curve crosses 50% of the plateau,
+    * the width :math:`p_1` is half the distance between the 16% and 84%
+      crossings,
+    * the pedestal :math:`p_2` is zero.
+
+    Crossings are linearly interpolated between bins. The result only depends
+    on the input data.
+
+    Args:
+        x (numpy.ndarray): Charge values, shape ``(nChannels, nBins)``
+        y (numpy.ndarray): Number of hits, shape ``(nChannels, nBins)``
+        amplitude (numpy.ndarray): Nominal amplitude (half the number of
+            events) of each channel, shape ``(nChannels,)``
+        minWidth (float or numpy.ndarray): Smallest width to return, e.g. the
+            bin width
+
+    Returns: A ``numpy.ndarray`` of shape ``(nChannels, 4)``
+    """
+    rows = np.arange(len(x))[:, np.newaxis]
+    order = np.argsort(x, axis=1)
+    xSorted = x[rows, order]
+    ySorted = y[rows, order]
+
+    plateau = _medianAboveHalfMax(ySorted)
+
+    def crossing(fraction):
+        level = fraction * plateau
+        above = np.argmax(ySorted >= level[:, np.newaxis], axis=1)
+        below = np.maximum(above - 1, 0)
+        rowIdx = rows[:, 0]
+        x0, x1 = xSorted[rowIdx, below], xSorted[rowIdx, above]
+        y0, y1 = ySorted[rowIdx, below], ySorted[rowIdx, above]
+        slope = np.where(y1 > y0, (level - y0) / np.where(y1 > y0, y1 - y0, 1.), 0.)
+        return x0 + slope * (x1 - x0)
+
+    guess = np.empty((len(x), 4))
+    guess[:, 0] = crossing(0.5)
+    guess[:, 1] = np.maximum((crossing(0.84) - crossing(0.16)) / 2., minWidth)
+    guess[:, 2] = 0.
+    guess[:, 3] = np.clip(plateau / 2., 0.75 * amplitude, 1.25 * amplitude)
+    return guess
+
+def scurveQuickLook(x, y, amplitude, binWidth=0.):
+    r"""
+    Estimates the parameters of :py:func:`~gempython.gemplotting.fitting.fitModels.scurveFunc` without fitting, from
+    the discrete derivative of the S-curves:
+
+    * the amplitude :math:`p_3` is obtained as in :py:func:`scurveInitialGuess`,
+    * the mean :math:`p_0` and the width :math:`p_1` are the mean and the RMS
+      of the bin centers weighted by the positive increase of the number of
+      hits between consecutive bins,
+    * the pedestal :math:`p_2` is zero.
+
+    Only the rising edge contributes, from one bin before the S-curve
+    crosses 5% of the plateau to the bin where it reaches 95%, so that the
+    fluctuations of the plateau and of the noise do not bias the estimate.
+
+    Args:
+        x (numpy.ndarray): Charge values, shape ``(nChannels, nBins)``
+        y (numpy.ndarray): Number of hits, shape ``(nChannels, nBins)``
+        amplitude (numpy.ndarray): Nominal amplitude (half the number of
+            events) of each channel, shape ``(nChannels,)``
+        binWidth (float or numpy.ndarray): Bin width, the width returned is
+            at least a third of it
+
+    Returns: A tuple ``(params, valid)`` where ``params`` is a
+        ``numpy.ndarray`` of shape ``(nChannels, 4)`` and ``valid`` is ``True``
+        for the channels with a rising edge
+    """
+    rows = np.arange(len(x))[:, np.newaxis]
+    order = np.argsort(x, axis=1)
+    xSorted = x[rows, order]
+    ySorted = y[rows, order]
+
+    plateau = _medianAboveHalfMax(ySorted)
+
+    # Increase of the number of hits, at the middle of each pair of bins
+    deltaY = np.diff(ySorted, axis=1)
+    xMiddle = (xSorted[:, 1:] + xSorted[:, :-1]) / 2.
+
+    firstAbove = np.argmax(ySorted > 0.05 * plateau[:, np.newaxis], axis=1)
+    firstPlateau = np.argmax(ySorted >= 0.95 * plateau[:, np.newaxis], axis=1)
+    binIdx = np.arange(deltaY.shape[1])[np.newaxis, :]
+    isEdge = (binIdx >= firstAbove[:, np.newaxis] - 1) & (binIdx < firstPlateau[:, np.newaxis])
+    weights = np.where(isEdge, np.maximum(deltaY, 0.), 0.)
+
+    sumWeights = np.sum(weights, axis=1)
+    valid = sumWeights > 0
+    sumWeights[np.logical_not(valid)] = 1.
+    mean = np.sum(weights * xMiddle, axis=1) / sumWeights
+    rms = np.sqrt(np.sum(weights * (xMiddle - mean[:, np.newaxis])**2, axis=1) / sumWeights)
+
+    params = np.empty((len(x), 4))
+    params[:, 0] = mean
+    params[:, 1] = np.maximum(rms, binWidth / 3.)
+    params[:, 2] = 0.
+    params[:, 3] = np.clip(plateau / 2., 0.75 * amplitude, 1.25 * amplitude)
+    return params, valid & np.isfinite(plateau)
+
+def fitScurvesLM(x, y, yErr, guess, lower, upper, maxIter=200, tol=1e-6):
+    r"""
+    Fits :py:func:`~gempython.gemplotting.fitting.fitModels.scurveFunc` to many S-curves at once with a batched
+    Levenberg-Marquardt minimization of the :math:`\chi^2`.  Every channel
+    keeps its own damping factor and stops iterating as soon as it has
+    converged.  Parameters are kept inside ``[lower, upper]`` by clipping each
+    step.
+
+    Bins with ``yErr == 0`` do not contribute to the :math:`\chi^2`, as in
+    ``TH1::Fit``.
+
+    Args:
+        x (numpy.ndarray): Charge values, shape ``(nChannels, nBins)``
+        y (numpy.ndarray): Number of hits, shape ``(nChannels, nBins)``
+        yErr (numpy.ndarray): Uncertainty on ``y``, shape ``(nChannels, nBins)``
+        guess (numpy.ndarray): Initial parameters, shape ``(nChannels, 4)``
+        lower (numpy.ndarray): Lower parameter limits, shape ``(nChannels, 4)``
+        upper (numpy.ndarray): Upper parameter limits, shape ``(nChannels, 4)``
+        maxIter (int): Maximum number of iterations
+        tol (float): Relative :math:`\chi^2` improvement below which a channel
+            is considered to have converged
+
+    Returns: A tuple ``(params, chi2, ndf, converged)``
+    """
+    weights = np.zeros(y.shape)
+    weights[yErr > 0] = 1. / yErr[yErr > 0]
+    ndf = (weights != 0).sum(axis=1) - 4
+
+    nChannels = len(guess)
+    allIdx = np.arange(nChannels)
+    params = np.clip(guess, lower, upper)
+    # Values of the model at the current parameters, kept across iterations
+    # so that the error function is only evaluated once per iteration
+    values = scurveFunc(x, params)
+    chi2 = np.sum(((y - values) * weights)**2, axis=1)
+    damping = 1e-3 * np.ones(nChannels)
+    active = np.ones(nChannels, dtype=bool)
+    converged = np.zeros(nChannels, dtype=bool)
+    for iteration in range(maxIter):
+        idx = allIdx[active]
+        if len(idx) == 0:
+            break
+
+        thisParams = params[idx]
+        residuals = (y[idx] - values[idx]) * weights[idx]
+        jac = scurveJacobian(x[idx], thisParams, values[idx]) * weights[idx][..., np.newaxis]
+        alpha = np.einsum('nki,nkj->nij', jac, jac)
+        beta = np.einsum('nki,nk->ni', jac, residuals)
+
+        # Damp the diagonal, parameters without any gradient (e.g. p2 when
+        # below all charge values) get a small floor to keep alpha invertible
+        diag = np.diagonal(alpha, axis1=1, axis2=2)
+        alpha = alpha + (damping[idx, np.newaxis] * diag + 1e-12)[..., np.newaxis] * np.eye(4)
+        step = np.linalg.solve(alpha, beta[..., np.newaxis])[..., 0]
+
+        trialParams = np.clip(thisParams + step, lower[idx], upper[idx])
+        trialValues = scurveFunc(x[idx], trialParams)
+        trialChi2 = np.sum(((y[idx] - trialValues) * weights[idx])**2, axis=1)
+        improved = np.isfinite(trialChi2) & (trialChi2 <= chi2[idx])
+
+        relChange = np.abs(chi2[idx] - trialChi2) / np.maximum(chi2[idx], 1e-12)
+        params[idx[improved]] = trialParams[improved]
+        values[idx[improved]] = trialValues[improved]
+        chi2[idx[improved]] = trialChi2[improved]
+        damping[idx] = np.where(improved, damping[idx] / 10., damping[idx] * 10.)
+
+        done = (improved & (relChange < tol)) | (damping[idx] > 1e10)
+        converged[idx[done]] = True
+        active[idx[done]] = False
+        pass
+
+    converged &= np.isfinite(chi2)
+    return params, chi2, ndf, converged
 
 class DeadChannelFinder(object):
     r"""
@@ -39,7 +254,7 @@ class DeadChannelFinder(object):
             dead, ``False`` otherwise.
     """
     def __init__(self, nVFats=24):
-        self.isDead = [ np.ones(128, dtype=bool) for i in range(nVFats) ]
+        self.isDead = np.ones((nVFats, 128), dtype=bool)
 
     def feed(self, event):
         """
@@ -48,6 +263,14 @@ class DeadChannelFinder(object):
         """
         self.isDead[event.vfatN][event.vfatCH] = False
 
+    def feedArray(self, scanData):
+        """
+        Takes many entries of the S-curve tree at once, as a structured array
+        (e.g. from ``root_numpy.tree2array``) with at least the ``vfatN`` and
+        ``vfatCH`` fields, and updates the results accordingly.
+        """
+        self.isDead[scanData['vfatN'], scanData['vfatCH']] = False
+
 class ScanDataFitter(DeadChannelFinder):
     r"""
     Fits S-curves.
@@ -61,6 +284,11 @@ class ScanDataFitter(DeadChannelFinder):
     One cannot count on all attributes being present before calling
     :py:meth:`fit`.
 
+    The data are stored in the arrays :py:attr:`scanHits`,
+    :py:attr:`scanHitErrors` and :py:attr:`Nev`. The ``TH1`` and ``TF1`` of a
+    channel are only created when requested through :py:meth:`getHisto` and
+    :py:meth:`getFunc`.
+
     .. note::
 
         If the :py:attr:`calDAC2Q_m` and :py:attr:`calDAC2Q_b` were supplied at
@@ -69,11 +297,24 @@ class ScanDataFitter(DeadChannelFinder):
     See :program:`anaUltraScurve.py` for example usage.
 
     Attributes:
-        Nev (ndict): 2D array of ``int``, indexed as ``[vfat][channel]``.
+        Nev (numpy.ndarray): 2D array of ``float``, indexed as
+            ``[vfat][channel]``, that contains the number of pulses injected in
+            each channel.
+
+        scanHits (numpy.ndarray): 3D array of ``float``, indexed as
+            ``[vfat][channel][bin]``, that contains the S-curve results (number
+            of hits vs charge)
+
+        scanHitErrors (numpy.ndarray): Uncertainties on :py:attr:`scanHits`,
+            same shape
+
+        scanBinEdges (numpy.ndarray): 2D array of ``float``, indexed as
+            ``[vfat][edge]``, that contains the charge bin edges of the
+            S-curves of each VFAT
 
         scanFuncs (ndict): 2D array of ``TF1``, indexed as ``[vfat][channel]``.
-            After fitting, each entry contains the fit function for the
-            corresponding channel. The functions are color-coded:
+            Cache of the functions built by :py:meth:`getFunc`. The functions
+            are color-coded:
 
             ======= =====================================
             Color   Meaning
@@ -85,12 +326,12 @@ class ScanDataFitter(DeadChannelFinder):
             ======= =====================================
 
         scanHistos (ndict): 2D array of ``TH1``, indexed as
-            ``[vfat][channel]``, that contain the S-curve results (number of
-            events vs charge)
+            ``[vfat][channel]``. Cache of the histograms built by
+            :py:meth:`getHisto`.
 
-        scanCount (ndict): 2D array of ``int``, indexed as ``[vfat][channel]``.
-            Each entry contains the total number of events for the corresponding
-            channel.
+        scanCount (numpy.ndarray): 2D array of ``float``, indexed as
+            ``[vfat][channel]``. Each entry contains the total number of events
+            for the corresponding channel.
 
         scanFitResults (ndict): 3D array of ``float``, indexed as
             ``[idx][vfat][channel]``, that contain the fit results. ``idx`` has
@@ -107,6 +348,28 @@ class ScanDataFitter(DeadChannelFinder):
             5. Number of degrees of freedom (NDF) of the fit
             6. Value of ROOT::Fit::FitResult::IsValid()
 
+        fitParams (numpy.ndarray): 3D array of ``float``, indexed as
+            ``[vfat][channel][par]``, that contains the four parameters of the
+            fit function of each channel
+
+        fitValid (numpy.ndarray): 2D array of ``bool``, indexed as
+            ``[vfat][channel]``. Each entry is ``True`` if the fit of the
+            corresponding channel converged.
+
+        fitAttempts (numpy.ndarray): 2D array of ``int``, indexed as
+            ``[vfat][channel]``, that contains the number of times the fit of
+            each channel was attempted. This is a view of the ``attempts``
+            field of :py:attr:`fitStats`.
+
+        fitStats (numpy.ndarray): 2D structured array, indexed as
+            ``[vfat][channel]``, with the fields of :py:data:`fitStatsDtype`:
+            the number of attempts, of invalid and of empty fit results, the
+            final :math:`\chi^2/NDF`, the wall time spent fitting and whether
+            the result was taken from the fit cache. The ``"numpy"`` and
+            ``"quickLook"`` engines fit all channels at once, their time is
+            shared between the channels in proportion to their number of
+            attempts.
+
         calDAC2Q_m (numpy.ndarray): Calibration of ``calDAC`` to charge for each
             VFAT. This corresponds to :math:`m` in
 
@@ -130,18 +393,15 @@ class ScanDataFitter(DeadChannelFinder):
         isVFAT3 (bool): Whether the detector under consideration uses VFAT3
     """
 
-    def __init__(self, calDAC2Q_m=None, calDAC2Q_b=None, isVFAT3=False, nVFats=24):
+    def __init__(self, calDAC2Q_m=None, calDAC2Q_b=None, isVFAT3=False, nVFats=24, nBins=254):
         super(ScanDataFitter, self).__init__(nVFats)
 
         from gempython.utils.nesteddict import nesteddict as ndict
         from gempython.gemplotting.mapping.chamberInfo import CHANNELS_PER_VFAT as maxChans
         r.gStyle.SetOptStat(0)
 
-        self.Nev = ndict()
         self.scanFuncs  = ndict()
         self.scanHistos = ndict()
-        self.scanHistosChargeBins = ndict()
-        self.scanCount  = ndict()
         self.scanFitResults   = ndict()
 
         self.isVFAT3    = isVFAT3
@@ -155,32 +415,31 @@ class ScanDataFitter(DeadChannelFinder):
         if calDAC2Q_b is not None:
             self.calDAC2Q_b = calDAC2Q_b
 
-        for vfat in range(0,self.nVFats):
-            self.scanFitResults[0][vfat] = np.zeros(maxChans)
-            self.scanFitResults[1][vfat] = np.zeros(maxChans)
-            self.scanFitResults[2][vfat] = np.zeros(maxChans)
-            self.scanFitResults[3][vfat] = np.zeros(maxChans)
-            self.scanFitResults[4][vfat] = np.zeros(maxChans)
-            self.scanFitResults[5][vfat] = np.zeros(maxChans)
-            self.scanFitResults[6][vfat] = np.zeros(maxChans, dtype=bool)
-            for ch in range(0,maxChans):
-                self.scanCount[vfat][ch] = 0
-                if self.isVFAT3:
-                    self.scanFuncs[vfat][ch] = r.TF1('scurveFit_vfat{0}_chan{1}'.format(vfat,ch),'[3]*TMath::Erf((TMath::Max([2],x)-[0])/(TMath::Sqrt(2)*[1]))+[3]',
-                            self.calDAC2Q_m[vfat]*253+self.calDAC2Q_b[vfat],self.calDAC2Q_m[vfat]*1+self.calDAC2Q_b[vfat])
-                    self.scanHistos[vfat][ch] = r.TH1D('scurve_vfat{0}_chan{1}_h'.format(vfat,ch),'scurve_vfat{0}_chan{1}_h'.format(vfat,ch),
-                            254,self.calDAC2Q_m[vfat]*254.5+self.calDAC2Q_b[vfat],self.calDAC2Q_m[vfat]*0.5+self.calDAC2Q_b[vfat])
-                else:
-                    self.scanFuncs[vfat][ch] = r.TF1('scurveFit_vfat{0}_chan{1}'.format(vfat,ch),'[3]*TMath::Erf((TMath::Max([2],x)-[0])/(TMath::Sqrt(2)*[1]))+[3]',
-                            self.calDAC2Q_m[vfat]*1+self.calDAC2Q_b[vfat],self.calDAC2Q_m[vfat]*253+self.calDAC2Q_b[vfat])
-                    self.scanHistos[vfat][ch] = r.TH1D('scurve_vfat{0}_chan{1}_h'.format(vfat,ch),'scurve_vfat{0}_chan{1}_h'.format(vfat,ch),
-                            254,self.calDAC2Q_m[vfat]*0.5+self.calDAC2Q_b[vfat],self.calDAC2Q_m[vfat]*254.5+self.calDAC2Q_b[vfat])
-                    pass
-                self.scanHistosChargeBins[vfat][ch] = [self.scanHistos[vfat][ch].GetXaxis().GetBinLowEdge(binX) for binX in range(1,self.scanHistos[vfat][ch].GetNbinsX()+2) ] #Include overflow
-                pass
+        # Same binning as the historical TH1D's, low edge of the first bin to
+        # high edge of the last bin
+        calDAC2Q_m = np.asarray(self.calDAC2Q_m, dtype=float)[:, np.newaxis]
+        calDAC2Q_b = np.asarray(self.calDAC2Q_b, dtype=float)[:, np.newaxis]
+        if self.isVFAT3:
+            self.scanBinEdges = calDAC2Q_m*np.linspace(nBins+0.5, 0.5, nBins+1)+calDAC2Q_b
+        else:
+            self.scanBinEdges = calDAC2Q_m*np.linspace(0.5, nBins+0.5, nBins+1)+calDAC2Q_b
             pass
 
-        self.fitValid = [ np.zeros(maxChans, dtype=bool) for vfat in range(self.nVFats) ]
+        self.Nev = np.zeros((self.nVFats, maxChans))
+        self.scanHits = np.zeros((self.nVFats, maxChans, nBins))
+        self.scanHitErrors = np.zeros((self.nVFats, maxChans, nBins))
+        self.scanCount = np.zeros((self.nVFats, maxChans))
+
+        for idx in range(0,6):
+            self.scanFitResults[idx] = np.zeros((self.nVFats, maxChans))
+        self.scanFitResults[6] = np.zeros((self.nVFats, maxChans), dtype=bool)
+
+        self.fitValid = np.zeros((self.nVFats, maxChans), dtype=bool)
+        self.fitParams = np.zeros((self.nVFats, maxChans, 4))
+        self.fitStats = np.zeros((self.nVFats, maxChans), dtype=fitStatsDtype)
+        self.fitStats["normChi2"] = np.nan
+        self.fitAttempts = self.fitStats["attempts"]
+        self.engine = None
 
         return
 
@@ -205,15 +464,95 @@ class ScanDataFitter(DeadChannelFinder):
                 pass
             pass
 
-        from gempython.gemplotting.utils.anautilities import first_index_gt
-        from math import sqrt
-        chargeBin = first_index_gt(self.scanHistosChargeBins[event.vfatN][event.vfatCH], charge)-1
-        self.scanHistos[event.vfatN][event.vfatCH].SetBinContent(chargeBin,event.Nhits)
-        self.scanHistos[event.vfatN][event.vfatCH].SetBinError(chargeBin,sqrt(event.Nhits))
+        chargeBin = self._getChargeBins(event.vfatN, charge)
+        if chargeBin >= 0:
+            self.scanHits[event.vfatN][event.vfatCH][chargeBin] = event.Nhits
+            self.scanHitErrors[event.vfatN][event.vfatCH][chargeBin] = np.sqrt(event.Nhits)
+        self.scanHistos[event.vfatN].pop(event.vfatCH, None)
         self.Nev[event.vfatN][event.vfatCH] = event.Nev
 
         return
 
+    def feedArray(self, scanData):
+        """
+        Takes many entries of the S-curve tree at once and updates the results
+        accordingly. This is equivalent to calling :py:meth:`feed` on each
+        entry, but all entries are processed with vectorized operations.
+
+        Args:
+            scanData (numpy.ndarray): Structured array, e.g. the output of
+                ``root_numpy.tree2array``, with the fields ``vfatN``,
+                ``vfatCH``, ``vcal``, ``Nhits`` and ``Nev``. For VFAT3 the
+                ``isCurrentPulse`` and ``calSF`` fields are used if present.
+        """
+        super(ScanDataFitter, self).feedArray(scanData)
+        if len(scanData) == 0:
+            return
+
+        vfatN = scanData['vfatN'].astype(int)
+        vfatCH = scanData['vfatCH'].astype(int)
+        vcal = scanData['vcal'].astype(float)
+        Nhits = scanData['Nhits'].astype(float)
+
+        charge = np.asarray(self.calDAC2Q_m, dtype=float)[vfatN]*vcal+np.asarray(self.calDAC2Q_b, dtype=float)[vfatN]
+        if self.isVFAT3: #v3 electronics
+            isCount = (256-vcal) > 254
+            if 'isCurrentPulse' in scanData.dtype.names:
+                isCurrentPulse = scanData['isCurrentPulse'].astype(bool)
+                if np.any(isCurrentPulse):
+                    #Q = CAL_DUR * CAL_DAC * 10nA * CAL_FS
+                    calSF, calSFIdx = np.unique(scanData['calSF'], return_inverse=True)
+                    scaleFactor = np.array([ dict_calSF[sf] for sf in calSF ])[calSFIdx]
+                    charge = np.where(isCurrentPulse, (1./ 40079000) * vcal * (10 * 1e-9) * scaleFactor * 1e15, charge)
+                    isCount = np.where(isCurrentPulse, vcal > 254, isCount)
+                    pass
+                pass
+        else:
+            isCount = vcal > 250
+            pass
+
+        # Accumulate the scan count with a single bincount on the flat
+        # (vfat, channel) index
+        nChans = self.scanCount.shape[1]
+        flatIdx = vfatN*nChans+vfatCH
+        self.scanCount += np.bincount(
+                flatIdx[isCount],
+                weights=Nhits[isCount],
+                minlength=self.scanCount.size).reshape(self.scanCount.shape)
+
+        chargeBin = np.empty(len(scanData), dtype=int)
+        for vfat in np.unique(vfatN):
+            thisVFAT = (vfatN == vfat)
+            chargeBin[thisVFAT] = self._getChargeBins(vfat, charge[thisVFAT])
+            pass
+        inRange = chargeBin >= 0
+        self.scanHits[vfatN[inRange], vfatCH[inRange], chargeBin[inRange]] = Nhits[inRange]
+        self.scanHitErrors[vfatN[inRange], vfatCH[inRange], chargeBin[inRange]] = np.sqrt(Nhits[inRange])
+        self.Nev[vfatN, vfatCH] = scanData['Nev']
+
+        for idx in np.unique(flatIdx):
+            self.scanHistos[idx // nChans].pop(idx % nChans, None)
+            pass
+
+        return
+
+    def _getChargeBins(self, vfat, charge):
+        """
+        Returns the index in :py:attr:`scanHits` of the given charge value(s),
+        or a negative number if it should not be stored.
+
+        This follows the historical convention of ``feed``, based on
+        :py:func:`gempython.gemplotting.utils.anautilities.first_index_gt`:
+        values go one bin below the bin that contains them, values in the
+        first bin are dropped and values above the range go in the last bin.
+        """
+        edges = self.scanBinEdges[vfat]
+        if edges[-1] >= edges[0]:
+            firstIdxGt = np.searchsorted(edges, charge, side='right')
+        else:
+            firstIdxGt = np.where(charge < edges[0], 0, len(edges))
+        return firstIdxGt-2
+
     def feedHisto(self, vfatN, vfatCH, histo, nEvts=None):
         """
         Feed the fitter with data stored in an histogram.
@@ -221,41 +560,252 @@ class ScanDataFitter(DeadChannelFinder):
         Args:
             vfatN (int): The VFAT under consideration
             vfatCH (int): The channel under consideration
-            histo (int): The data for the channel under consideration
+            histo (int): The data for the channel under consideration, must
+                have the same number of bins as :py:attr:`scanHits`
             nEvts (int): Override :py:attr`Nev` for the channel under
                 consideration (else the maximum value in the histogram is used)
         """
+        nBins = self.scanHits.shape[2]
+        if histo.GetNbinsX() != nBins:
+            raise ValueError("feedHisto(): histogram {0} has {1} bins, expected {2}".format(histo.GetName(), histo.GetNbinsX(), nBins))
+
         self.scanHistos[vfatN][vfatCH] = histo
         self.isDead[vfatN][vfatCH] = False
+        self.scanHits[vfatN][vfatCH] = [ histo.GetBinContent(binX) for binX in range(1,nBins+1) ]
+        self.scanHitErrors[vfatN][vfatCH] = [ histo.GetBinError(binX) for binX in range(1,nBins+1) ]
         if nEvts is None:
-            maxBin = self.scanHistos[vfatN][vfatCH].GetMaximumBin()
-            self.Nev[vfatN][vfatCH] = self.scanHistos[vfatN][vfatCH].GetBinContent(maxBin)
+            self.Nev[vfatN][vfatCH] = np.max(self.scanHits[vfatN][vfatCH])
         else:
             self.Nev[vfatN][vfatCH] = nEvts
 
         return
 
-    def fit(self, debug=False):
+    def getHisto(self, vfat, ch):
+        """
+        Returns the S-curve histogram of the given VFAT and channel, the
+        ``TH1D`` is created from :py:attr:`scanHits` the first time it is
+        requested.
+        """
+        if ch not in self.scanHistos[vfat]:
+            nBins = self.scanHits.shape[2]
+            histo = r.TH1D('scurve_vfat{0}_chan{1}_h'.format(vfat,ch),'scurve_vfat{0}_chan{1}_h'.format(vfat,ch),
+                    nBins,self.scanBinEdges[vfat][0],self.scanBinEdges[vfat][-1])
+            for binX in range(1,nBins+1):
+                histo.SetBinContent(binX, self.scanHits[vfat][ch][binX-1])
+                histo.SetBinError(binX, self.scanHitErrors[vfat][ch][binX-1])
+                pass
+            self.scanHistos[vfat][ch] = histo
+            pass
+        return self.scanHistos[vfat][ch]
+
+    def _getFuncRange(self, vfat):
+        """
+        Returns the fit range ``(xmin, xmax)`` of the given VFAT.
         """
+        if self.isVFAT3:
+            return (self.calDAC2Q_m[vfat]*253+self.calDAC2Q_b[vfat],self.calDAC2Q_m[vfat]*1+self.calDAC2Q_b[vfat])
+        else:
+            return (self.calDAC2Q_m[vfat]*1+self.calDAC2Q_b[vfat],self.calDAC2Q_m[vfat]*253+self.calDAC2Q_b[vfat])
+
+    def _makeFunc(self, name, vfat, compiled=False):
+        """
+        Creates a ``TF1`` of the S-curve model with the fit range of the given
+        VFAT, see :py:func:`gempython.gemplotting.fitting.fitModels.makeModelTF1`.
+        """
+        xmin, xmax = self._getFuncRange(vfat)
+        return makeModelTF1("scurve", name, xmin, xmax, compiled)
+
+    def fit(self, debug=False, engine="root", initGuess="data", randomSeed=1, maxNormChi2=5., nWorkers=1, vfatList=None, cache=None, initParams=None):
+        r"""
         Iteratively fits all scurves, and populates the relevant class
         attributes.
 
+        Args:
+            debug (bool): Print additional information for each fit
+            engine (str): Fitting backend, one of
+                :py:data:`gempython.gemplotting.utils.anaInfo.fitEngines`.
+                ``"root"`` performs one ``TH1::Fit`` per channel with random
+                restarts. ``"numpy"`` fits all channels at once with
+                :py:func:`fitScurvesLM`; in this case the ``TF1`` returned by
+                :py:meth:`getFunc` are only updated when requested.
+                ``"quickLook"`` does not fit, the parameters are estimated
+                with :py:func:`scurveQuickLook`.
+            initGuess (str): How the ``"root"`` engine seeds the fit, one of
+                :py:data:`gempython.gemplotting.utils.anaInfo.fitInitGuesses`.
+                With ``"data"`` the first attempt starts from
+                :py:func:`scurveInitialGuess` and the random restarts are only
+                used if it fails; with ``"scan"`` only the random restarts are
+                used. The ``"numpy"`` engine always starts from
+                :py:func:`scurveInitialGuess`.
+            randomSeed (int): Positive seed of the random restarts. Each channel
+                uses its own seed derived from this value, so results are
+                reproducible.
+            maxNormChi2 (float): A fit started from :py:func:`scurveInitialGuess`
+                is considered failed, and restarted, if it is not valid or if
+                its :math:`\chi^2/NDF` is above this value
+            nWorkers (int): Number of processes to fit with. If larger than one
+                the VFATs are split across a ``multiprocessing.Pool``, see
+                :py:meth:`_fitParallel`. Inside a daemonic process, e.g. a
+                worker of the chamber level pool of :program:`ana_scans.py`,
+                a single process is always used.
+            vfatList (list): Only fit these VFATs, all VFATs if ``None``
+            cache (FitCache): If given, channels whose data, calibration and
+                fit settings are found in this
+                :py:class:`gempython.gemplotting.fitting.fitCache.FitCache`
+                are not fit again, and the new results are stored in it.
+                :py:attr:`fitAttempts` is zero for the channels taken from the
+                cache, and they are flagged in :py:attr:`fitStats`.
+            initParams (numpy.ndarray): Starting values of :math:`p_0`,
+                :math:`p_1` and :math:`p_2`, indexed as ``[vfat][channel][par]``,
+                e.g. the results of a previous scan of the same chips. They
+                replace the ``initGuess`` of the channels for which they are
+                finite, :math:`p_3` always starts from half of :py:attr:`Nev`.
+
         Returns: The filled :py:attr:`scanFitResults`
         """
 
+        if engine not in fitEngines:
+            raise ValueError("fit(): engine '{0}' not understood, available engines are: {1}".format(engine, fitEngines))
+        if initGuess not in fitInitGuesses:
+            raise ValueError("fit(): initGuess '{0}' not understood, available options are: {1}".format(initGuess, fitInitGuesses))
+        self.engine = engine
+        self.fitStats.fill(0)
+        self.fitStats["normChi2"] = np.nan
+        self.scanFuncs.clear()
+
+        # Only fit channels which are alive and have data
+        toFit = np.logical_not(self.isDead) & (np.sum(self.scanHits, axis=2) > 0)
+        if vfatList is not None:
+            isSelected = np.zeros(self.nVFats, dtype=bool)
+            isSelected[list(vfatList)] = True
+            toFit[np.logical_not(isSelected)] = False
+            pass
+        isRequested = toFit.copy()
+
+        fitSettings = (engine, fitEngineVersions[engine], initGuess, randomSeed, maxNormChi2)
+        if cache is not None:
+            cacheKeys = self._getCacheKeys(toFit, fitSettings, initParams)
+            cachedResults = cache.get(cacheKeys.values())
+            isCached = dict( (chanKey, cacheKeys[chanKey] in cachedResults) for chanKey in cacheKeys )
+            for (vfat, ch), cached in isCached.items():
+                toFit[vfat][ch] = not cached
+            print("found {0} of {1} channels in the fit cache".format(len(cachedResults), len(cacheKeys)))
+
+        self._fitChannels(toFit, debug=debug, engine=engine, initGuess=initGuess,
+                randomSeed=randomSeed, maxNormChi2=maxNormChi2, nWorkers=nWorkers, initParams=initParams)
+
+        if cache is not None:
+            newResults = {}
+            for (vfat, ch), key in cacheKeys.items():
+                if isCached[(vfat, ch)]:
+                    params, chi2, ndf, valid = cachedResults[key]
+                    self.fitParams[vfat][ch] = params
+                    self.fitValid[vfat][ch] = valid
+                    for idx in range(0,3):
+                        self.scanFitResults[idx][vfat][ch] = params[idx]
+                    self.scanFitResults[3][vfat][ch] = chi2
+                    self.scanFitResults[4][vfat][ch] = self.scanCount[vfat][ch]
+                    self.scanFitResults[5][vfat][ch] = ndf
+                    self.scanFitResults[6][vfat][ch] = valid
+                    self.fitStats["fromCache"][vfat][ch] = True
+                else:
+                    newResults[key] = (
+                            self.fitParams[vfat][ch],
+                            self.scanFitResults[3][vfat][ch],
+                            self.scanFitResults[5][vfat][ch],
+                            self.fitValid[vfat][ch])
+                    pass
+                pass
+            cache.put(newResults)
+            pass
+
+        ndf = self.scanFitResults[5]
+        hasNDF = isRequested & (ndf > 0)
+        self.fitStats["normChi2"][hasNDF] = self.scanFitResults[3][hasNDF] / ndf[hasNDF]
+
+        return self.scanFitResults
+
+    def _getCacheKeys(self, toFit, fitSettings, initParams=None):
+        """
+        Computes the :py:class:`gempython.gemplotting.fitting.fitCache.FitCache`
+        key of each channel to fit, a hash of its data, of the calibration of
+        its VFAT, of the fit model, of ``fitSettings`` and of its
+        ``initParams``, if any.
+
+        Returns: A dictionary mapping ``(vfat, channel)`` to the key
+        """
+        import hashlib
+
+        keys = {}
+        for vfat, ch in zip(*np.nonzero(toFit)):
+            channelHash = hashlib.sha1()
+            channelHash.update(repr((scurveFormula, self.isVFAT3, float(self.calDAC2Q_m[vfat]), float(self.calDAC2Q_b[vfat]), float(self.Nev[vfat][ch]), fitSettings)).encode())
+            channelHash.update(np.ascontiguousarray(self.scanHits[vfat][ch]).tobytes())
+            channelHash.update(np.ascontiguousarray(self.scanHitErrors[vfat][ch]).tobytes())
+            if initParams is not None and np.all(np.isfinite(initParams[vfat][ch][:3])):
+                channelHash.update(np.ascontiguousarray(initParams[vfat][ch][:3], dtype=float).tobytes())
+            keys[(vfat, ch)] = channelHash.hexdigest()
+            pass
+        return keys
+
+    def _fitChannels(self, toFit, debug=False, engine="root", initGuess="data", randomSeed=1, maxNormChi2=5., nWorkers=1, initParams=None):
+        """
+        Fits the channels for which ``toFit``, indexed as ``[vfat][channel]``,
+        is ``True`` with the given engine. See :py:meth:`fit` for the other
+        arguments.
+        """
+        if engine == "quickLook":
+            # Fast enough that additional processes would not help
+            return self._fitQuickLook(toFit, debug)
+
+        if nWorkers > 1:
+            import multiprocessing
+            if multiprocessing.current_process().daemon:
+                # Pool workers can't have children, and their cores are
+                # already accounted for by the parent pool
+                from gempython.utils.gemlogger import printYellow
+                printYellow("fit(): running inside a daemonic process, fitting with a single process instead of {0}".format(nWorkers))
+            else:
+                return self._fitParallel(nWorkers, toFit, debug=debug, engine=engine,
+                        initGuess=initGuess, randomSeed=randomSeed, maxNormChi2=maxNormChi2, initParams=initParams)
+            pass
+
+        if engine == "numpy":
+            return self._fitNumpy(toFit, debug, maxNormChi2, initParams)
+
         r.gROOT.SetBatch(True)
         r.gStyle.SetOptStat(0)
         from gempython.gemplotting.mapping.chamberInfo import CHANNELS_PER_VFAT as maxChans
-    
+
+        # Starting values of the first attempt, NaN if the random restarts
+        # should be used from the start
+        firstGuess = np.nan * np.ones((self.nVFats, maxChans, 4))
+        if initGuess == "data":
+            charge, hits, Nev = self._getScanArrays()
+            for vfat in range(0,self.nVFats):
+                firstGuess[vfat] = scurveInitialGuess(
+                        np.tile(charge[vfat], (maxChans, 1)),
+                        hits[vfat],
+                        Nev[vfat] / 2.,
+                        abs(self.calDAC2Q_m[vfat]))
+                pass
+            pass
+        if initParams is not None:
+            isWarm = np.all(np.isfinite(initParams[..., :3]), axis=-1)
+            firstGuess[isWarm, :3] = initParams[isWarm, :3]
+            firstGuess[isWarm, 3] = self.Nev[isWarm] / 2.
+            pass
+
+        # The compiled model is only used for fitting, the TF1 returned by
+        # getFunc() are built from the TFormula so that they can be stored
+        fitTF1 = self._makeFunc('myERF', 0, compiled=True)
+
         random = r.TRandom3()
-        random.SetSeed(0)
         for vfat in range(0,self.nVFats):
-            if self.isVFAT3:
-                fitTF1 = r.TF1('myERF','[3]*TMath::Erf((TMath::Max([2],x)-[0])/(TMath::Sqrt(2)*[1]))+[3]',
-                            self.calDAC2Q_m[vfat]*253+self.calDAC2Q_b[vfat],self.calDAC2Q_m[vfat]*1+self.calDAC2Q_b[vfat])
-            else:
-                fitTF1 = r.TF1('myERF','[3]*TMath::Erf((TMath::Max([2],x)-[0])/(TMath::Sqrt(2)*[1]))+[3]',
-                            self.calDAC2Q_m[vfat]*1+self.calDAC2Q_b[vfat],self.calDAC2Q_m[vfat]*253+self.calDAC2Q_b[vfat])
+            if not np.any(toFit[vfat]):
+                continue
+
+            fitTF1.SetRange(*self._getFuncRange(vfat))
             fitTF1.SetLineColor(r.kBlack)
             
             if not debug:
@@ -268,33 +818,47 @@ class ScanDataFitter(DeadChannelFinder):
                 if self.isDead[vfat][ch]:
                     fitTF1.SetLineColor(r.kGray)
                     continue # Don't try to fit dead channels
-                elif not (self.scanHistos[vfat][ch].Integral() > 0):
+                elif not (np.sum(self.scanHits[vfat][ch]) > 0):
                     fitTF1.SetLineColor(r.kGray)
                     continue # Don't try to fit with 0 entries
+                elif not toFit[vfat][ch]:
+                    continue # Not requested, e.g. already in the cache
                 
                 fitChi2 = 0
                 MinChi2Temp = 99999999
                 stepN = 0
+                chanStartTime = time.time()
+
+                # Seed per channel so that results don't depend on which
+                # channels were fit before
+                random.SetSeed(randomSeed + vfat*maxChans + ch)
+                firstAttempt = np.all(np.isfinite(firstGuess[vfat][ch]))
                 
                 if debug:
                     print("| stepN | vfatN | vfatCH | isVFAT3 | p0_low | p0 | p0_high | p1_low | p1 | p1_high | p2_low | p2 | p2_high |")
                     print("| ----- | ----- | ------ | ------- | ------ | -- | ------- | ------ | -- | ------- | ------ | -- | ------- |")
                 while(stepN < 30):
-                    #rand = max(0.0, random.Gaus(10, 5)) # do not accept negative numbers
-                    rand = abs(random.Gaus(10, 5)) # take positive definite numbers
-
-                    # Make sure the input parameters are positive
-                    if rand > 100: continue
-                    if (self.calDAC2Q_m[vfat]*(8+stepN*8)+self.calDAC2Q_b[vfat]) < 0:
-                        stepN +=1
-                        continue
-                    #if (self.calDAC2Q_m[vfat]*(rand)+self.calDAC2Q_b[vfat]) < 0: continue
-
-                    # Provide an initial guess
-                    init_guess_p0 = self.calDAC2Q_m[vfat]*(8+stepN*8)+self.calDAC2Q_b[vfat] 
-                    init_guess_p1 = abs(self.calDAC2Q_m[vfat]*rand) #self.calDAC2Q_m[vfat] might be negative (e.g. VFAT3 case)
-                    init_guess_p2 = 0.
-                    init_guess_p3 = self.Nev[vfat][ch]/2.
+                    if firstAttempt:
+                        # Start from the values computed from the histogram
+                        # or given by the caller
+                        init_guess_p0, init_guess_p1, init_guess_p2, init_guess_p3 = firstGuess[vfat][ch]
+                    else:
+                        #rand = max(0.0, random.Gaus(10, 5)) # do not accept negative numbers
+                        rand = abs(random.Gaus(10, 5)) # take positive definite numbers
+
+                        # Make sure the input parameters are positive
+                        if rand > 100: continue
+                        if (self.calDAC2Q_m[vfat]*(8+stepN*8)+self.calDAC2Q_b[vfat]) < 0:
+                            stepN +=1
+                            continue
+                        #if (self.calDAC2Q_m[vfat]*(rand)+self.calDAC2Q_b[vfat]) < 0: continue
+
+                        # Provide an initial guess
+                        init_guess_p0 = self.calDAC2Q_m[vfat]*(8+stepN*8)+self.calDAC2Q_b[vfat] 
+                        init_guess_p1 = abs(self.calDAC2Q_m[vfat]*rand) #self.calDAC2Q_m[vfat] might be negative (e.g. VFAT3 case)
+                        init_guess_p2 = 0.
+                        init_guess_p3 = self.Nev[vfat][ch]/2.
+                        pass
 
                     fitTF1.SetParameter(0, init_guess_p0)
                     fitTF1.SetParameter(1, init_guess_p1)
@@ -312,7 +876,7 @@ class ScanDataFitter(DeadChannelFinder):
                         fitTF1.SetParLimits(2, -0.01, self.calDAC2Q_m[vfat]*(256)+self.calDAC2Q_b[vfat])
                         pass
 
-                    fitTF1.SetParLimits(3, 0.75*init_guess_p3, 1.25*init_guess_p3)
+                    fitTF1.SetParLimits(3, 0.75*self.Nev[vfat][ch]/2., 1.25*self.Nev[vfat][ch]/2.)
                     
                     if debug:
                         if self.isVFAT3:
@@ -348,21 +912,29 @@ class ScanDataFitter(DeadChannelFinder):
                                         self.Nev[vfat][ch]
                                     ))
                     # Fit
-                    fitResult = self.scanHistos[vfat][ch].Fit('myERF','SQ')
+                    fitResult = self.getHisto(vfat,ch).Fit(fitTF1,'SQ')
+                    self.fitAttempts[vfat][ch] += 1
                     fitEmpty = fitResult.IsEmpty()
                     if fitEmpty:
-                        fitTF1.SetLineColor(kOrange-2)
+                        self.fitStats["nEmpty"][vfat][ch] += 1
+                        fitTF1.SetLineColor(r.kOrange-2)
                         # Don't try to fit empty data again
                         break
                     fitValid = fitResult.IsValid()
                     if not fitValid:
+                        self.fitStats["nInvalid"][vfat][ch] += 1
+                        # Fall back on the random restarts
+                        firstAttempt = False
                         continue
                     fitChi2 = fitTF1.GetChisquare()
                     fitNDF = fitTF1.GetNDF()
-                    stepN +=1
+                    isFirstFit = firstAttempt
+                    if firstAttempt:
+                        firstAttempt = False
+                    else:
+                        stepN +=1
+                        pass
                     if (fitChi2 < MinChi2Temp and fitChi2 > 0.0):
-                        self.scanFuncs[vfat][ch] = fitTF1.Clone('scurveFit_vfat{0}_chan{1}_h'.format(vfat,ch))
-                        self.scanFuncs[vfat][ch].SetLineColor(r.kBlue-2)
                         self.scanFitResults[0][vfat][ch] = fitTF1.GetParameter(0)
                         self.scanFitResults[1][vfat][ch] = fitTF1.GetParameter(1)
                         self.scanFitResults[2][vfat][ch] = fitTF1.GetParameter(2)
@@ -371,10 +943,14 @@ class ScanDataFitter(DeadChannelFinder):
                         self.scanFitResults[5][vfat][ch] = fitNDF
                         self.scanFitResults[6][vfat][ch] = fitValid
                         self.fitValid[vfat][ch] = True
+                        self.fitParams[vfat][ch] = [ fitTF1.GetParameter(par) for par in range(4) ]
                         MinChi2Temp = fitChi2
                         pass
                     if (MinChi2Temp < 50): break
+                    # A fit started from the first guess only restarts if it failed
+                    if isFirstFit and fitNDF > 0 and fitChi2 < maxNormChi2*fitNDF: break
                     pass
+                self.fitStats["fitTime"][vfat][ch] = time.time() - chanStartTime
                 if debug:
                     print("Converged fit results:")
                     print("| stepN | vfatN | vfatCH | isVFAT3 | p0 | p1 | p2 | Chi2 | NDF | NormChi2 |")
@@ -393,22 +969,399 @@ class ScanDataFitter(DeadChannelFinder):
                     pass
                 pass
             pass
+
+        print("fitted {0} channels with {1} fit attempts".format(
+            np.count_nonzero(self.fitAttempts), np.sum(self.fitAttempts)))
         return self.scanFitResults
     
+    def _fitParallel(self, nWorkers, toFit, **fitKwargs):
+        """
+        Splits the VFATs with channels to fit in at most ``nWorkers`` groups
+        that are fit in parallel by a ``multiprocessing.Pool``, then merges the
+        results back into this object.
+
+        :py:attr:`scanHits` and :py:attr:`scanHitErrors` are handed to the
+        workers through shared memory, only the fit results of each group are
+        sent back.
+
+        Args:
+            nWorkers (int): Maximum number of processes
+            toFit (numpy.ndarray): Channels to fit, indexed as
+                ``[vfat][channel]``
+            fitKwargs: Passed to :py:meth:`_fitChannels` in each worker
+
+        Returns: The filled :py:attr:`scanFitResults`
+        """
+        from multiprocessing import Pool
+        from multiprocessing.sharedctypes import RawArray
+
+        vfatList = np.nonzero(np.any(toFit, axis=1))[0]
+        if len(vfatList) == 0:
+            return self.scanFitResults
+        vfatGroups = [ list(group) for group in np.array_split(vfatList, min(nWorkers, len(vfatList))) ]
+        vfatGroups = [ group for group in vfatGroups if len(group) > 0 ]
+
+        sharedArrays = []
+        for array in (self.scanHits, self.scanHitErrors):
+            buffer = RawArray('d', array.size)
+            np.frombuffer(buffer, dtype=float).reshape(array.shape)[...] = array
+            sharedArrays.append(buffer)
+            pass
+        fitterConfig = {
+                "calDAC2Q_m":np.asarray(self.calDAC2Q_m, dtype=float),
+                "calDAC2Q_b":np.asarray(self.calDAC2Q_b, dtype=float),
+                "isVFAT3":self.isVFAT3,
+                "nVFats":self.nVFats,
+                "shape":self.scanHits.shape,
+                "isDead":self.isDead,
+                "Nev":self.Nev,
+                "scanCount":self.scanCount
+                }
+
+        print("fitting {0} VFATs with {1} processes".format(len(vfatList), len(vfatGroups)))
+        pool = Pool(len(vfatGroups), initializer=_initFitWorker, initargs=(fitterConfig, sharedArrays[0], sharedArrays[1]))
+        try:
+            results = pool.map(_fitVFATsInWorker, [ (group, toFit, fitKwargs) for group in vfatGroups ], chunksize=1)
+        except:
+            pool.terminate()
+            raise
+        else:
+            pool.close()
+        finally:
+            pool.join()
+
+        for vfats, fitParams, fitValid, fitStats, scanFitResults in results:
+            fitted = toFit[vfats]
+            self.fitParams[vfats] = np.where(fitted[..., np.newaxis], fitParams, self.fitParams[vfats])
+            self.fitValid[vfats] = np.where(fitted, fitValid, self.fitValid[vfats])
+            self.fitStats[vfats] = np.where(fitted, fitStats, self.fitStats[vfats])
+            for idx in range(0,7):
+                self.scanFitResults[idx][vfats] = np.where(fitted, scanFitResults[idx], self.scanFitResults[idx][vfats])
+                pass
+            pass
+
+        return self.scanFitResults
+
+    def _getScanArrays(self):
+        """
+        Returns the data in a form suitable for :py:func:`fitScurvesLM`.
+
+        Returns: A tuple ``(charge, hits, Nev)`` where ``charge`` contains the
+            bin centers, indexed as ``[vfat][bin]``, ``hits`` the histogram
+            contents, indexed as ``[vfat][channel][bin]``, and ``Nev`` the
+            number of events, indexed as ``[vfat][channel]``
+        """
+        charge = (self.scanBinEdges[:, :-1] + self.scanBinEdges[:, 1:]) / 2.
+        return charge, self.scanHits, self.Nev
+
+    def _fitNumpy(self, toFit, debug=False, maxNormChi2=5., initParams=None):
+        r"""
+        Fits all the scurves selected by ``toFit``, indexed as
+        ``[vfat][channel]``, at once with :py:func:`fitScurvesLM`, using the
+        same parameter limits as the ``"root"`` engine.
+
+        The fit starts from ``initParams`` where they are given and from
+        :py:func:`scurveInitialGuess` otherwise. Channels for which
+        it did not converge, or converged with :math:`\chi^2/NDF` above
+        ``maxNormChi2``, are refit starting from a fixed list of wider,
+        narrower and shifted S-curves, and the best converged result is kept.
+
+        Returns: The filled :py:attr:`scanFitResults`
+        """
+        from gempython.gemplotting.mapping.chamberInfo import CHANNELS_PER_VFAT as maxChans
+
+        startTime = time.time()
+        charge, hits, Nev = self._getScanArrays()
+
+        vfatIdx, chanIdx = np.nonzero(toFit)
+        if debug:
+            print("fitting {0} channels with the numpy engine".format(len(vfatIdx)))
+        if len(vfatIdx) == 0:
+            return self.scanFitResults
+
+        x = charge[vfatIdx]
+        y = hits[vfatIdx, chanIdx]
+        amplitude = Nev[vfatIdx, chanIdx] / 2.
+
+        # Same parameter limits as the "root" engine
+        calDAC2Q_m = np.asarray(self.calDAC2Q_m, dtype=float)[vfatIdx]
+        calDAC2Q_b = np.asarray(self.calDAC2Q_b, dtype=float)[vfatIdx]
+        dacHigh = calDAC2Q_m * 256 + calDAC2Q_b
+        dacLow = calDAC2Q_m * 1 + calDAC2Q_b
+        if self.isVFAT3:
+            meanLimits = (np.minimum(dacHigh, dacLow), np.maximum(dacHigh, dacLow))
+            pedLimits = (np.minimum(-0.01, dacLow), np.maximum(-0.01, dacLow))
+        else:
+            meanLimits = (np.minimum(-0.01, dacHigh), np.maximum(-0.01, dacHigh))
+            pedLimits = meanLimits
+            pass
+        binWidth = np.abs(calDAC2Q_m)
+        lower = np.column_stack((
+            meanLimits[0],
+            1e-3 * binWidth, # keep the width strictly positive
+            pedLimits[0],
+            0.75 * amplitude))
+        upper = np.column_stack((
+            meanLimits[1],
+            np.abs(calDAC2Q_m * 128 + calDAC2Q_b),
+            pedLimits[1],
+            1.25 * amplitude))
+
+        guess = scurveInitialGuess(x, y, amplitude, binWidth)
+        if initParams is not None:
+            warmParams = initParams[vfatIdx, chanIdx, :3]
+            isWarm = np.all(np.isfinite(warmParams), axis=1)
+            guess[isWarm, :3] = warmParams[isWarm]
+            pass
+        yErr = np.sqrt(y)
+        params, chi2, ndf, converged = fitScurvesLM(x, y, yErr, guess, lower, upper)
+        attempts = np.ones(len(x), dtype=int)
+        nInvalid = np.logical_not(converged).astype(int)
+
+        # Restart failed fits only, (mean shift, width scale) in units of the
+        # initial width
+        for shift, scale in [ (0., 4.), (0., 0.25), (-2., 1.), (2., 1.) ]:
+            failed = np.nonzero(np.logical_not(converged) | (chi2 >= maxNormChi2 * np.maximum(ndf, 1)))[0]
+            if len(failed) == 0:
+                break
+            retryGuess = guess[failed].copy()
+            retryGuess[:, 0] += shift * guess[failed, 1]
+            retryGuess[:, 1] *= scale
+            retryParams, retryChi2, _, retryConverged = fitScurvesLM(
+                    x[failed], y[failed], yErr[failed], retryGuess, lower[failed], upper[failed])
+            attempts[failed] += 1
+            nInvalid[failed] += np.logical_not(retryConverged)
+            better = retryConverged & (np.logical_not(converged[failed]) | (retryChi2 < chi2[failed]))
+            params[failed[better]] = retryParams[better]
+            chi2[failed[better]] = retryChi2[better]
+            converged[failed[better]] = True
+            pass
+
+        self.fitParams[vfatIdx, chanIdx] = params
+        self.fitAttempts[vfatIdx, chanIdx] = attempts
+        self.fitStats["nInvalid"][vfatIdx, chanIdx] = nInvalid
+        self.fitStats["fitTime"][vfatIdx, chanIdx] = (time.time() - startTime) * attempts / float(np.sum(attempts))
+        self.scanFitResults[0][vfatIdx, chanIdx] = params[:, 0]
+        self.scanFitResults[1][vfatIdx, chanIdx] = params[:, 1]
+        self.scanFitResults[2][vfatIdx, chanIdx] = params[:, 2]
+        self.scanFitResults[3][vfatIdx, chanIdx] = chi2
+        self.scanFitResults[4][vfatIdx, chanIdx] = self.scanCount[vfatIdx, chanIdx]
+        self.scanFitResults[5][vfatIdx, chanIdx] = ndf
+        self.scanFitResults[6][vfatIdx, chanIdx] = converged
+        self.fitValid[vfatIdx, chanIdx] = converged
+
+        if debug:
+            print("{0} of {1} fits converged".format(np.count_nonzero(converged), len(converged)))
+        print("fitted {0} channels with {1} fit attempts".format(len(attempts), np.sum(attempts)))
+
+        return self.scanFitResults
+
+    def _fitQuickLook(self, toFit, debug=False):
+        r"""
+        Estimates the parameters of all the scurves selected by ``toFit``,
+        indexed as ``[vfat][channel]``, with :py:func:`scurveQuickLook`.
+
+        The :math:`\chi^2` and NDF of the estimated S-curve are computed as
+        for a fit, so that the same quality cuts can be applied.
+
+        Returns: The filled :py:attr:`scanFitResults`
+        """
+        startTime = time.time()
+        charge, hits, Nev = self._getScanArrays()
+
+        vfatIdx, chanIdx = np.nonzero(toFit)
+        if len(vfatIdx) == 0:
+            return self.scanFitResults
+
+        x = charge[vfatIdx]
+        y = hits[vfatIdx, chanIdx]
+        binWidth = np.abs(np.asarray(self.calDAC2Q_m, dtype=float)[vfatIdx])
+        params, valid = scurveQuickLook(x, y, Nev[vfatIdx, chanIdx] / 2., binWidth)
+
+        # Same chi2 definition as the fits, empty bins do not contribute
+        weights = np.zeros(y.shape)
+        weights[y > 0] = 1. / np.sqrt(y[y > 0])
+        chi2 = np.sum(((y - scurveFunc(x, params)) * weights)**2, axis=1)
+        ndf = (weights != 0).sum(axis=1) - 4
+
+        self.fitParams[vfatIdx, chanIdx] = params
+        self.fitAttempts[vfatIdx, chanIdx] = 1
+        self.fitStats["nInvalid"][vfatIdx, chanIdx] = np.logical_not(valid)
+        self.fitStats["fitTime"][vfatIdx, chanIdx] = (time.time() - startTime) / len(valid)
+        self.scanFitResults[0][vfatIdx, chanIdx] = params[:, 0]
+        self.scanFitResults[1][vfatIdx, chanIdx] = params[:, 1]
+        self.scanFitResults[2][vfatIdx, chanIdx] = params[:, 2]
+        self.scanFitResults[3][vfatIdx, chanIdx] = chi2
+        self.scanFitResults[4][vfatIdx, chanIdx] = self.scanCount[vfatIdx, chanIdx]
+        self.scanFitResults[5][vfatIdx, chanIdx] = ndf
+        self.scanFitResults[6][vfatIdx, chanIdx] = valid
+        self.fitValid[vfatIdx, chanIdx] = valid
+
+        if debug:
+            print("{0} of {1} channels have a rising edge".format(np.count_nonzero(valid), len(valid)))
+        print("estimated {0} channels without fitting".format(len(valid)))
+
+        return self.scanFitResults
+
     def getFunc(self, vfat, ch):
-        """Returns the fit function for the given VFAT and channel"""
+        """
+        Returns the fit function for the given VFAT and channel.
+
+        The ``TF1`` is created from :py:attr:`fitParams` and
+        :py:attr:`scanFitResults` the first time it is requested.
+        """
+        if ch not in self.scanFuncs[vfat]:
+            func = self._makeFunc('scurveFit_vfat{0}_chan{1}'.format(vfat,ch), vfat)
+            for par in range(4):
+                func.SetParameter(par, self.fitParams[vfat][ch][par])
+            func.SetChisquare(self.scanFitResults[3][vfat][ch])
+            func.SetNDF(int(self.scanFitResults[5][vfat][ch]))
+            if self.fitValid[vfat][ch]:
+                func.SetLineColor(r.kBlue-2)
+            elif self.engine != "root":
+                func.SetLineColor(r.kGray)
+                pass
+            self.scanFuncs[vfat][ch] = func
+            pass
         return self.scanFuncs[vfat][ch]
 
+    def getEffectivePedestals(self):
+        """
+        Evaluates the fit function of every channel at zero charge, i.e. the
+        number of hits expected without injected charge.
+
+        This is computed from :py:attr:`fitParams` with
+        :py:func:`~gempython.gemplotting.fitting.fitModels.scurveFunc` and
+        gives the same values as ``getFunc(vfat, ch).Eval(0.0)`` without
+        creating the ``TF1`` objects.
+
+        Returns: A ``numpy.ndarray`` of shape ``(nVFats, 128)``
+        """
+        params = self.fitParams.reshape(-1, 4)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pedestals = scurveFunc(np.zeros((len(params), 1)), params)
+        return pedestals.reshape(self.fitParams.shape[:2])
+
+    def getFitStatsSummary(self, vfatIDs=None, nSlowest=10):
+        """
+        Summarizes :py:attr:`fitStats` for the last call to :py:meth:`fit`,
+        in a form that can be written as JSON.
+
+        Args:
+            vfatIDs (list): Chip ID of each VFAT position, reported if given
+            nSlowest (int): Number of channels listed in ``slowestChannels``
+
+        Returns: A dictionary with the totals over all channels, one entry per
+            VFAT with channels fit in ``vfats``, and the channels that took
+            the longest to fit in ``slowestChannels``
+        """
+        def summarize(stats):
+            normChi2 = stats["normChi2"][np.isfinite(stats["normChi2"])]
+            return {
+                    "nChannels":int(len(stats)),
+                    "nFromCache":int(np.count_nonzero(stats["fromCache"])),
+                    "attempts":int(np.sum(stats["attempts"])),
+                    "maxAttempts":int(np.max(stats["attempts"])) if len(stats) > 0 else 0,
+                    "nInvalid":int(np.sum(stats["nInvalid"])),
+                    "nEmpty":int(np.sum(stats["nEmpty"])),
+                    "fitTime":float(np.sum(stats["fitTime"])),
+                    "medianNormChi2":float(np.median(normChi2)) if len(normChi2) > 0 else None
+                    }
+
+        # Channels that were fit or taken from the cache
+        isFit = (self.fitStats["attempts"] > 0) | self.fitStats["fromCache"]
+
+        summary = summarize(self.fitStats[isFit])
+        summary["engine"] = self.engine
+        summary["vfats"] = []
+        for vfat in range(self.nVFats):
+            if not np.any(isFit[vfat]):
+                continue
+            vfatSummary = summarize(self.fitStats[vfat][isFit[vfat]])
+            vfatSummary["vfatN"] = vfat
+            if vfatIDs is not None:
+                vfatSummary["vfatID"] = int(vfatIDs[vfat])
+            vfatSummary["nFailed"] = int(np.count_nonzero(isFit[vfat] & np.logical_not(self.fitValid[vfat])))
+            summary["vfats"].append(vfatSummary)
+            pass
+
+        summary["slowestChannels"] = []
+        for flatIdx in np.argsort(self.fitStats["fitTime"], axis=None)[::-1][:nSlowest]:
+            vfat, ch = np.unravel_index(flatIdx, self.fitStats.shape)
+            if not isFit[vfat][ch]:
+                break
+            stats = self.fitStats[vfat][ch]
+            summary["slowestChannels"].append({
+                "vfatN":int(vfat),
+                "vfatCH":int(ch),
+                "attempts":int(stats["attempts"]),
+                "nInvalid":int(stats["nInvalid"]),
+                "fitTime":float(stats["fitTime"]),
+                "normChi2":float(stats["normChi2"]) if np.isfinite(stats["normChi2"]) else None
+                })
+            pass
+
+        return summary
+
     def readFile(self, treeFileName):
         """
         Reads data from an ``scurveData.root`` file produced by
         ``ultraScurve.py``.
         """
+        import root_numpy as rp
+
         inF = r.TFile(treeFileName)
-        for event in inF.scurveTree :
-            self.feed(event)
+        listOfBranches = [ branch.GetName() for branch in inF.scurveTree.GetListOfBranches() ]
+        branches = [ branch for branch in ['vfatN','vfatCH','vcal','Nhits','Nev','isCurrentPulse','calSF'] if branch in listOfBranches ]
+        self.feedArray(rp.tree2array(inF.scurveTree, branches=branches))
+        inF.Close()
         return
 
+def _initFitWorker(fitterConfig, sharedHits, sharedHitErrors):
+    """
+    Initializer of the processes used by :py:meth:`ScanDataFitter._fitParallel`,
+    creates a :py:class:`ScanDataFitter` whose data arrays are views of the
+    shared memory.
+    """
+    import signal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    global _workerFitter
+    _workerFitter = ScanDataFitter(
+            calDAC2Q_m=fitterConfig["calDAC2Q_m"],
+            calDAC2Q_b=fitterConfig["calDAC2Q_b"],
+            isVFAT3=fitterConfig["isVFAT3"],
+            nVFats=fitterConfig["nVFats"],
+            nBins=fitterConfig["shape"][2])
+    _workerFitter.scanHits = np.frombuffer(sharedHits, dtype=float).reshape(fitterConfig["shape"])
+    _workerFitter.scanHitErrors = np.frombuffer(sharedHitErrors, dtype=float).reshape(fitterConfig["shape"])
+    _workerFitter.isDead = fitterConfig["isDead"]
+    _workerFitter.Nev = fitterConfig["Nev"]
+    _workerFitter.scanCount = fitterConfig["scanCount"]
+    return
+
+def _fitVFATsInWorker(fitArgs):
+    """
+    Fits a group of VFATs in a process set up by :py:func:`_initFitWorker`.
+
+    Args:
+        fitArgs (tuple): The list of VFATs to fit, the channels to fit and a
+            dictionary of keyword arguments for
+            :py:meth:`ScanDataFitter._fitChannels`
+
+    Returns: A tuple with the list of VFATs and the fit results of these VFATs
+    """
+    vfats, toFit, fitKwargs = fitArgs
+    isSelected = np.zeros(len(toFit), dtype=bool)
+    isSelected[vfats] = True
+    _workerFitter.engine = fitKwargs["engine"]
+    _workerFitter._fitChannels(toFit & isSelected[:, np.newaxis], **fitKwargs)
+    return (vfats,
+            _workerFitter.fitParams[vfats],
+            _workerFitter.fitValid[vfats],
+            _workerFitter.fitStats[vfats],
+            [ _workerFitter.scanFitResults[idx][vfats] for idx in range(0,7) ])
+
 def fitScanData(treeFileName, isVFAT3=False, calFileName=None, calTuple=None, gemType="ge11"):
     """
     Helper function to fit scan data. Creates a :py:class:`ScanDataFitter`,
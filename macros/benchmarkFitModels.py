@@ -0,0 +1,196 @@
+#!/bin/env python
+
+r"""
+``benchmarkFitModels.py`` --- Compare the speed of the S-curve model kernels
+============================================================================
+
+Synopsis
+--------
+
+**benchmarkFitModels.py** [*OPTIONS*]
+
+Description
+-----------
+
+The S-curve model of
+:py:class:`gempython.gemplotting.fitting.fitScanData.ScanDataFitter` is
+available as an interpreted ``TFormula`` and as a function compiled by the
+ROOT interpreter, see :py:mod:`gempython.gemplotting.fitting.fitModels`. This
+tool measures the time needed to fit simulated S-curves with ``TH1::Fit`` using
+each of them, and the time spent in one iteration of
+:py:func:`gempython.gemplotting.fitting.fitScanData.fitScurvesLM` with the
+NumPy kernels, with and without reusing the values of the model when computing
+its derivatives.
+
+The parameters found with both ``TF1`` are compared, the tool exits with a
+non-zero code if they differ.
+
+Arguments
+---------
+
+.. program:: benchmarkFitModels.py
+
+.. option:: --nChannels <N>
+
+    Number of simulated S-curves, by default the number of channels of a
+    detector with 24 VFATs.
+
+.. option:: --nRootFits <N>
+
+    Number of S-curves fit with each ``TF1``.
+
+.. option:: --noROOT
+
+    Only benchmark the NumPy kernels.
+
+.. option:: --repeat <N>
+
+    Number of times each NumPy kernel is evaluated.
+
+Example
+-------
+
+.. code-block:: bash
+
+    benchmarkFitModels.py --nRootFits 500
+"""
+
+def simulateScurves(nChannels, nBins=254, nEvents=100, seed=1):
+    """
+    Simulates S-curves with random means and widths, with the CFG_CAL_DAC to
+    charge conversion of a VFAT3.
+
+    Returns: A tuple ``(x, y, params)`` with the charge values and the number
+        of hits, of shape ``(nChannels, nBins)``, and the true parameters of
+        each channel
+    """
+    import numpy as np
+    from gempython.gemplotting.fitting.fitModels import scurveFunc
+
+    rng = np.random.RandomState(seed)
+    x = np.tile(-0.25 * np.arange(1, nBins + 1) + 60., (nChannels, 1))
+    params = np.column_stack((
+        rng.uniform(2., 10., nChannels),
+        rng.uniform(0.2, 0.6, nChannels),
+        np.zeros(nChannels),
+        nEvents / 2. * np.ones(nChannels)))
+    y = rng.poisson(scurveFunc(x, params)).astype(float)
+    return x, y, params
+
+def timeIt(func, repeat):
+    """
+    Returns the average time spent in ``func()``, in seconds.
+    """
+    import time
+    start = time.time()
+    for _ in range(repeat):
+        func()
+        pass
+    return (time.time() - start) / repeat
+
+def benchmarkNumpy(x, y, params, repeat):
+    """
+    Times one Levenberg-Marquardt iteration of the NumPy kernels, and a full
+    fit with :py:func:`gempython.gemplotting.fitting.fitScanData.fitScurvesLM`.
+    """
+    import numpy as np
+    from gempython.gemplotting.fitting.fitModels import scurveFunc, scurveJacobian
+    from gempython.gemplotting.fitting.fitScanData import fitScurvesLM, scurveInitialGuess
+
+    def separateKernels():
+        # Model at the current and trial parameters, derivatives from scratch
+        scurveFunc(x, params)
+        scurveJacobian(x, params)
+        scurveFunc(x, params)
+
+    def sharedKernels():
+        # Model at the trial parameters only, derivatives reuse its values
+        values = scurveFunc(x, params)
+        scurveJacobian(x, params, values)
+
+    tSeparate = timeIt(separateKernels, repeat)
+    tShared = timeIt(sharedKernels, repeat)
+    print("NumPy kernels, {0} channels, per iteration:".format(len(x)))
+    print("    separate evaluations: {0:8.2f} ms".format(1e3 * tSeparate))
+    print("    shared evaluations:   {0:8.2f} ms ({1:.2f}x)".format(1e3 * tShared, tSeparate / tShared))
+
+    amplitude = params[:, 3]
+    guess = scurveInitialGuess(x, y, amplitude, 0.25)
+    lower = np.column_stack((-5. * np.ones(len(x)), 0.25e-3 * np.ones(len(x)), -5. * np.ones(len(x)), 0.75 * amplitude))
+    upper = np.column_stack((60. * np.ones(len(x)), 30. * np.ones(len(x)), 60. * np.ones(len(x)), 1.25 * amplitude))
+    tFit = timeIt(lambda: fitScurvesLM(x, y, np.sqrt(y), guess, lower, upper), 1)
+    print("    fitScurvesLM:         {0:8.2f} ms".format(1e3 * tFit))
+    return
+
+def benchmarkROOT(x, y, params, nFits):
+    """
+    Fits ``nFits`` S-curves with the ``TFormula`` and the compiled ``TF1``.
+
+    Returns: ``True`` if both found the same parameters
+    """
+    import numpy as np
+    import ROOT as r
+    from gempython.gemplotting.fitting.fitModels import makeModelTF1
+
+    r.gROOT.SetBatch(True)
+    nFits = min(nFits, len(x))
+    nBins = x.shape[1]
+    xSorted = x[0][::-1]
+    binWidth = xSorted[1] - xSorted[0]
+    histos = []
+    for ch in range(nFits):
+        histo = r.TH1D("h{0}".format(ch), "", nBins, xSorted[0] - binWidth / 2., xSorted[-1] + binWidth / 2.)
+        for idx, content in enumerate(y[ch][::-1]):
+            histo.SetBinContent(idx + 1, content)
+            histo.SetBinError(idx + 1, np.sqrt(content))
+            pass
+        histos.append(histo)
+        pass
+
+    results = {}
+    print("ROOT TH1::Fit, {0} channels:".format(nFits))
+    for compiled in [False, True]:
+        func = makeModelTF1("scurve", "benchmark{0}".format(int(compiled)), xSorted[0], xSorted[-1], compiled)
+        fitParams = np.zeros((nFits, 4))
+
+        def fitAll():
+            for ch, histo in enumerate(histos):
+                for par in range(4):
+                    func.SetParameter(par, params[ch][par] * 1.1 + 0.1)
+                func.SetParLimits(3, 0.75 * params[ch][3], 1.25 * params[ch][3])
+                histo.Fit(func, "QN0")
+                fitParams[ch] = [ func.GetParameter(par) for par in range(4) ]
+                pass
+
+        results[compiled] = (timeIt(fitAll, 1), fitParams)
+        pass
+
+    tFormula, formulaParams = results[False]
+    tCompiled, compiledParams = results[True]
+    print("    TFormula:             {0:8.2f} ms".format(1e3 * tFormula))
+    print("    compiled:             {0:8.2f} ms ({1:.2f}x)".format(1e3 * tCompiled, tFormula / tCompiled))
+
+    sameParams = np.allclose(formulaParams, compiledParams, rtol=1e-4, atol=1e-6)
+    if not sameParams:
+        from gempython.utils.gemlogger import printRed
+        printRed("The compiled model and the TFormula give different results, largest difference: {0}".format(
+            np.max(np.abs(formulaParams - compiledParams))))
+        pass
+    return sameParams
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Compare the speed of the S-curve model kernels")
+    parser.add_argument("--nChannels", type=int, default=3072, help="Number of simulated scurves")
+    parser.add_argument("--nRootFits", type=int, default=200, help="Number of scurves fit with each TF1")
+    parser.add_argument("--noROOT", action="store_true", help="Only benchmark the NumPy kernels")
+    parser.add_argument("--repeat", type=int, default=10, help="Number of times each NumPy kernel is evaluated")
+    args = parser.parse_args()
+
+    x, y, params = simulateScurves(args.nChannels)
+    benchmarkNumpy(x, y, params, args.repeat)
+
+    if not args.noROOT:
+        import sys
+        if not benchmarkROOT(x, y, params, args.nRootFits):
+            sys.exit(1)
@@ -98,6 +98,12 @@ Optional arguments
     YYYY.MM.DD format, to be considered for job submission. Default is
     ``2017.01.01`` so the start of the slice test will be used.
 
+.. option:: --warmStart
+
+    Start the fits of each scandate from the results of the most recent
+    previous scandate of the same chips that has already been analyzed. This
+    passes ``--warmStart`` to :program:`anaUltraScurve.py`.
+
 .. option:: --zscore <NUMBER>
 
     Z-Score for Outlier Identification in the MAD Algorithm. For details see
@@ -312,6 +318,8 @@ if __name__ == '__main__':
                         help="queue to submit your jobs to", metavar="queue")
     parser.add_option("-t", "--type", type="string", dest="GEBtype", default="long",
                       help="Specify GEB (long/short)", metavar="GEBtype")
+    parser.add_option("--warmStart", action="store_true", dest="warmStart",
+                      help="Start the fits from the results of the previous analyzed scandate of the same chips")
     parser.add_option("--zscore", type="float", dest="zscore", default=3.5,
                       help="Z-Score for Outlier Identification in MAD Algo", metavar="zscore")
     parser.add_option("--ztrim", type="float", dest="ztrim", default=4.0,
@@ -465,6 +473,9 @@ gcc --version | grep gcc
         if options.PanPin:
             pythonCmd += ' --panasonic'
             pass
+        if options.warmStart:
+            pythonCmd += ' --warmStart'
+            pass
         pythonCmd += '\n'
         
         jobScript.write(pythonCmd)
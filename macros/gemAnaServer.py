@@ -0,0 +1,97 @@
+#!/bin/env python
+
+r"""
+``gemAnaServer.py`` --- Run the analysis tools in a persistent server
+=====================================================================
+
+Synopsis
+--------
+
+**gemAnaServer.py** [*OPTIONS*]
+
+Description
+-----------
+
+Loading ``ROOT`` and the analysis modules takes several seconds each time an
+analysis tool is started. This tool loads them once and then runs the
+analyses sent with ``ana_scans.py --server``, each of them in a new process
+forked from the server, see :py:mod:`gempython.gemplotting.utils.anaServer`.
+The output of each analysis is printed by the ``ana_scans.py`` command which
+sent it; the analysis runs in the directory and with the environment of that
+command.
+
+The server listens on a Unix socket only accessible to the user who started
+it. It runs until it is stopped with :option:`--stop` or interrupted.
+
+Arguments
+---------
+
+.. program:: gemAnaServer.py
+
+.. option:: --maxJobs <N>
+
+    Maximum number of analyses running at the same time, the following ones
+    wait for one of them to finish. By default it is determined from the idle
+    cores and the available memory.
+
+.. option:: --socket <FILE>
+
+    Path of the socket, by default ``$GEM_ANA_SERVER_SOCKET`` or
+    ``/tmp/gemAnaServer-<uid>.sock``.
+
+.. option:: --status
+
+    Print the analyses running and waiting in the server and exit.
+
+.. option:: --stop
+
+    Stop the server once its running analyses are done and exit. The analyses
+    waiting to start are reported as failed.
+
+Example
+-------
+
+.. code-block:: bash
+
+    gemAnaServer.py --maxJobs 2 &
+    ana_scans.py --server scurve -i listOfScandates.txt --chamberConfig -j auto
+    gemAnaServer.py --stop
+"""
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Run the analysis tools in a persistent server")
+    parser.add_argument("--maxJobs", type=int, default=None, help="Maximum number of analyses running at the same time, by default determined from the idle cores and the available memory")
+    parser.add_argument("--socket", type=str, default=None, help="Path of the socket, by default $GEM_ANA_SERVER_SOCKET or /tmp/gemAnaServer-<uid>.sock")
+    serverAction = parser.add_mutually_exclusive_group()
+    serverAction.add_argument("--status", action="store_true", help="Print the analyses running and waiting in the server and exit")
+    serverAction.add_argument("--stop", action="store_true", help="Stop the server once its running analyses are done and exit")
+    args = parser.parse_args()
+
+    import os, sys
+    from gempython.gemplotting.utils.anaServer import getServerStatus, runServer, stopServer
+    from gempython.utils.gemlogger import printRed
+
+    try:
+        if args.status:
+            status = getServerStatus(args.socket)
+            print("Analysis server in process {0}, running at most {1} job(s) at once".format(status["pid"], status["maxJobs"]))
+            for jobNumber, pid in status["running"]:
+                print("\tJob {0}: running in process {1}".format(jobNumber, pid))
+                pass
+            for jobNumber in status["pending"]:
+                print("\tJob {0}: waiting".format(jobNumber))
+                pass
+        elif args.stop:
+            nRunning = stopServer(args.socket)
+            print("Analysis server stopping after {0} running job(s)".format(nRunning))
+        else:
+            if args.maxJobs is None:
+                from gempython.gemplotting.utils.multiprocUtils import getAutoNumWorkers
+                args.maxJobs = getAutoNumWorkers()
+            runServer(args.socket, max(1, args.maxJobs))
+    except IOError as err:
+        printRed(str(err))
+        sys.exit(os.EX_UNAVAILABLE)
+    except KeyboardInterrupt:
+        printRed("Caught KeyboardInterrupt, analysis server stopped")
@@ -285,7 +285,7 @@ def arbitraryPlotter(anaType, listDataPtTuples, rootFileName, treeName, branchNa
             exiting
     """
 
-    from gempython.gemplotting.utils.anautilities import filePathExists, getDirByAnaType
+    from gempython.gemplotting.utils.anautilities import filePathExists, getDirByAnaType, readTreeSidecar
 
     import numpy as np
     import os
@@ -320,39 +320,44 @@ def arbitraryPlotter(anaType, listDataPtTuples, rootFileName, treeName, branchNa
                 pass
         filename = "{0}/{1}/{2}".format(dirPath, scandate, rootFileName)
 
-        # Get TTree
-        try:
-            dataFile = r.TFile(filename, "READ")
-            dataTree = dataFile.Get(treeName)
-            knownBranches = dataTree.GetListOfBranches()
-        except AttributeError as e:
-            print('{0} may not exist in {1}'.format(treeName,filename))
-            print(e)
-            if skipBad:
-                print('Skipping')
-                continue
-            else:
-                print('Please cross-check, exiting!')
-                exit(os.EX_DATAERR)
+        # Read the columnar sidecar of the TTree if it is usable, otherwise the TTree
+        arrayVFATData = readTreeSidecar(filename, treeName, listNames)
+        if arrayVFATData is None:
+            # Get TTree
+            try:
+                dataFile = r.TFile(filename, "READ")
+                dataTree = dataFile.Get(treeName)
+                knownBranches = dataTree.GetListOfBranches()
+            except AttributeError as e:
+                print('{0} may not exist in {1}'.format(treeName,filename))
+                print(e)
+                if skipBad:
+                    print('Skipping')
+                    continue
+                else:
+                    print('Please cross-check, exiting!')
+                    exit(os.EX_DATAERR)
+                    pass
                 pass
-            pass
 
-        # Check to make sure listNames are present in dataTree
-        for testBranch in listNames:
-            if testBranch not in knownBranches:
-                print("Branch {0} not in TTree {1} of file {2}".format(branchName, treeName, filename))
-                print("Existing Branches are:")
-                for realBranch in knownBranches:
-                    print(realBranch)
-                print("Please try again using one of the existing branches")
-                exit(os.EX_DATAERR)
+            # Check to make sure listNames are present in dataTree
+            for testBranch in listNames:
+                if testBranch not in knownBranches:
+                    print("Branch {0} not in TTree {1} of file {2}".format(branchName, treeName, filename))
+                    print("Existing Branches are:")
+                    for realBranch in knownBranches:
+                        print(realBranch)
+                    print("Please try again using one of the existing branches")
+                    exit(os.EX_DATAERR)
+
+            arrayVFATData = rp.tree2array(dataTree,listNames)
+
+            # Close the TFile
+            dataFile.Close()
+            pass
 
         # Get dependent variable value
-        arrayVFATData = rp.tree2array(dataTree,listNames)
         dataThisVFAT = arrayVFATData[ arrayVFATData['vfatN'] == vfat] #VFAT Level
-
-        # Close the TFile
-        dataFile.Close()
         
         if vfatCH is not None and strip is None:
             dataThisVFAT = dataThisVFAT[ dataThisVFAT['vfatCH'] == vfatCH ] #VFAT Channel Level
@@ -397,7 +402,7 @@ def arbitraryPlotter2D(anaType, listDataPtTuples, rootFileName, treeName, branch
             exiting
     """
   
-    from gempython.gemplotting.utils.anautilities import filePathExists, getDirByAnaType
+    from gempython.gemplotting.utils.anautilities import filePathExists, getDirByAnaType, readTreeSidecar
 
     import numpy as np
     import os
@@ -435,40 +440,45 @@ def arbitraryPlotter2D(anaType, listDataPtTuples, rootFileName, treeName, branch
                 pass
         filename = "{0}/{1}/{2}".format(dirPath, scandate, rootFileName)
 
-        # Get TTree
-        try:
-            dataFile = r.TFile(filename, "READ")
-            dataTree = dataFile.Get(treeName)
-            knownBranches = dataTree.GetListOfBranches()
-        except AttributeError as e:
-            print('{0} may not exist in {1}'.format(treeName,filename))
-            print(e)
-            if skipBad:
-                print('Skipping')
-                continue
-            else:
-                print('Please cross-check, exiting!')
-                exit(os.EX_DATAERR)
+        # Read the columnar sidecar of the TTree if it is usable, otherwise the TTree
+        arrayVFATData = readTreeSidecar(filename, treeName, listNames)
+        if arrayVFATData is None:
+            # Get TTree
+            try:
+                dataFile = r.TFile(filename, "READ")
+                dataTree = dataFile.Get(treeName)
+                knownBranches = dataTree.GetListOfBranches()
+            except AttributeError as e:
+                print('{0} may not exist in {1}'.format(treeName,filename))
+                print(e)
+                if skipBad:
+                    print('Skipping')
+                    continue
+                else:
+                    print('Please cross-check, exiting!')
+                    exit(os.EX_DATAERR)
+                    pass
                 pass
-            pass
 
-        # Check to make sure listNames are present in dataTree
-        for testBranch in listNames:
-            if testBranch not in knownBranches:
-                print("Branch {0} not in TTree {1} of file {2}".format(branchName, treeName, filename))
-                print("Existing Branches are:")
-                for realBranch in knownBranches:
-                    print(realBranch)
-                print("Please try again using one of the existing branches")
-                exit(os.EX_DATAERR)
+            # Check to make sure listNames are present in dataTree
+            for testBranch in listNames:
+                if testBranch not in knownBranches:
+                    print("Branch {0} not in TTree {1} of file {2}".format(branchName, treeName, filename))
+                    print("Existing Branches are:")
+                    for realBranch in knownBranches:
+                        print(realBranch)
+                    print("Please try again using one of the existing branches")
+                    exit(os.EX_DATAERR)
+
+            arrayVFATData = rp.tree2array(dataTree,listNames)
+
+            # Close the TFile
+            dataFile.Close()
+            pass
 
         # Get dependent variable value - VFAT Level
-        arrayVFATData = rp.tree2array(dataTree,listNames)
         dataThisVFAT = arrayVFATData[ arrayVFATData['vfatN'] == vfat] #VFAT Level
 
-        # Close the TFile
-        dataFile.Close()
-
         # Get the data for each strip and store it as a tuple in the list to be returned
         for chan in range(0,128):
             dataThisChan = dataThisVFAT[ dataThisVFAT[strChanName] == chan] #Channel Level
@@ -118,6 +118,19 @@ mappingNames = [
         "vfatCH"
         ]
 
+#: Available backends for ScanDataFitter.fit() of fitScanData.py
+fitEngines = [
+        "root",  # one TH1::Fit per channel
+        "numpy",  # batched fit of all channels, see fitScurvesLM() of fitScanData.py
+        "quickLook"  # no fit, mean and width from the derivative, see scurveQuickLook() of fitScanData.py
+        ]
+
+#: Available initial guesses for the "root" engine of ScanDataFitter.fit()
+fitInitGuesses = [
+        "data", # computed from the scurve, random restarts only if the fit fails
+        "scan"  # random restarts only
+        ]
+
 # Names of queues on lxplus
 queueNames = [
         "8nm", # 8 natural minutes (natural -> time on wall clock)
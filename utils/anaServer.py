@@ -0,0 +1,437 @@
+r"""
+``anaServer`` --- Persistent analysis server
+============================================
+
+.. code-block:: python
+
+    import gempython.gemplotting.utils.anaServer
+
+Importing ``ROOT``, ``root_numpy`` and the analysis modules, and compiling the
+first ``TF1``, takes several seconds, which is often longer than the analysis
+of a small file. :py:func:`runServer` does it once and then waits for jobs on
+a Unix socket; each job is run in a process forked from the server, which
+starts with everything already loaded and can not disturb the server or the
+other jobs.
+
+A job is a function of an analysis module, or of a script such as
+``ana_scans.py``, and its arguments. It is sent by :py:func:`submitJob`, which
+prints the output of the job as it runs and returns its outcome. The server
+is started with ``gemAnaServer.py``, and ``ana_scans.py --server`` sends its
+command to it.
+
+Documentation
+-------------
+"""
+
+#: Modules imported by the server before it accepts jobs
+preloadedModules = [
+        "numpy",
+        "ROOT",
+        "root_numpy",
+        "gempython.gemplotting.utils.anautilities",
+        "gempython.gemplotting.utils.latAlgos",
+        "gempython.gemplotting.utils.scurveAlgos",
+        "gempython.gemplotting.utils.threshAlgos",
+        "gempython.gemplotting.fitting.fitScanData"
+        ]
+
+def getDefaultSocketPath():
+    """
+    Returns the path of the socket of the server used when none is given:
+    ``$GEM_ANA_SERVER_SOCKET`` if it is set, otherwise a file of ``/tmp``
+    specific to the user.
+    """
+    import os
+    return os.environ.get("GEM_ANA_SERVER_SOCKET", "/tmp/gemAnaServer-{0}.sock".format(os.getuid()))
+
+def _sendMessage(sock, message):
+    """
+    Sends the python object ``message`` through ``sock``, prefixed by its size
+    """
+    import cPickle as pickle
+    import struct
+    data = pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+    sock.sendall(struct.pack("!I", len(data)) + data)
+
+def _recvExactly(sock, size):
+    """
+    Reads ``size`` bytes from ``sock``, ``None`` if it is closed before
+    """
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+def _recvMessage(sock):
+    """
+    Reads a python object sent by :py:func:`_sendMessage`, ``None`` if
+    ``sock`` is closed
+    """
+    import cPickle as pickle
+    import struct
+    header = _recvExactly(sock, 4)
+    if header is None:
+        return None
+    data = _recvExactly(sock, struct.unpack("!I", header)[0])
+    if data is None:
+        return None
+    return pickle.loads(data)
+
+def _connect(socketPath):
+    """
+    Returns a socket connected to the server listening on ``socketPath``
+
+    Raises:
+        IOError: If no server is listening on ``socketPath``
+    """
+    import socket
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socketPath)
+    except socket.error as err:
+        sock.close()
+        raise IOError("No analysis server is listening on {0}, start one with gemAnaServer.py: {1}".format(socketPath, err))
+    return sock
+
+def _resolveJob(job, scripts):
+    """
+    Returns the function called by ``job``. The modules and scripts are
+    loaded by the server, so that the processes of the following jobs find
+    them already loaded.
+
+    Args:
+        job (dict): Job sent by :py:func:`submitJob`
+        scripts (dict): Scripts already loaded, keys are their paths
+    """
+    import importlib
+    if job["scriptPath"] is not None:
+        if job["scriptPath"] not in scripts:
+            import imp, os
+            # Not loaded as __main__, so the command line part is not run
+            moduleName = "gemAnaServer_{0}".format(os.path.splitext(os.path.basename(job["scriptPath"]))[0])
+            scripts[job["scriptPath"]] = imp.load_source(moduleName, job["scriptPath"])
+        module = scripts[job["scriptPath"]]
+    else:
+        module = importlib.import_module(job["moduleName"])
+    return getattr(module, job["funcName"])
+
+def _runJob(func, job, logFd, resultConn, listenSock):
+    """
+    Target of the process running ``job``, its output is written to
+    ``logFd`` and its outcome sent to ``resultConn``
+    """
+    import os, sys, time, traceback
+    listenSock.close()
+
+    # The job sees the environment of the client and runs as if it were the
+    # main process of the client, e.g. its output is not redirected by
+    # redirectStdOutAndErr() of multiprocUtils.py
+    import multiprocessing
+    multiprocessing.current_process().name = "MainProcess"
+    os.environ.clear()
+    os.environ.update(job["environ"])
+    os.chdir(job["cwd"])
+
+    # Also redirects the output of ROOT and of the processes started by the job
+    os.dup2(logFd, 1)
+    os.dup2(logFd, 2)
+    os.close(logFd)
+    sys.stdout = os.fdopen(1, "w", 0)
+    sys.stderr = os.fdopen(2, "w", 0)
+
+    startTime = time.time()
+    try:
+        result = func(*job["callArgs"])
+    except SystemExit as err:
+        # The analysis tools call sys.exit() when they fail
+        outcome = {"status":"failed", "error":"Exited with code {0}".format(err.code)}
+    except: # catch *all* exceptions, they are reported to the client
+        traceback.print_exc()
+        errType, err = sys.exc_info()[:2]
+        outcome = {"status":"failed", "error":"{0}: {1}".format(errType.__name__, err)}
+    else:
+        outcome = {"status":"done", "result":result}
+    outcome["elapsed"] = time.time() - startTime
+    try:
+        resultConn.send(outcome)
+    except Exception as err:
+        resultConn.send({"status":"failed", "error":"Unable to send the result back: {0}".format(err), "elapsed":outcome["elapsed"]})
+    resultConn.close()
+    return
+
+def runServer(socketPath=None, maxJobs=1):
+    """
+    Loads the analysis modules and runs jobs sent to ``socketPath`` until it
+    receives a shutdown request, see :py:func:`stopServer`. At most
+    ``maxJobs`` jobs run at once, the others are queued.
+
+    Args:
+        socketPath (str): Path of the Unix socket, see
+            :py:func:`getDefaultSocketPath` if ``None``
+        maxJobs (int): Maximum number of jobs running in parallel
+    """
+    import collections, importlib, os, select, socket, time
+    from multiprocessing import Pipe, Process
+    from gempython.utils.gemlogger import printGreen, printYellow
+    from gempython.gemplotting.utils.multiprocUtils import limitWorkerThreads
+
+    if socketPath is None:
+        socketPath = getDefaultSocketPath()
+
+    # Load everything the jobs need once, the jobs run the analyses of their
+    # input files in parallel so the libraries must use a single thread
+    limitWorkerThreads()
+    startTime = time.time()
+    for moduleName in preloadedModules:
+        try:
+            importlib.import_module(moduleName)
+        except ImportError as err:
+            printYellow("Unable to preload {0}: {1}".format(moduleName, err))
+        pass
+    try:
+        import ROOT as r
+        r.gROOT.SetBatch(True)
+        r.TF1("gemAnaServerWarmUp", "[0]*TMath::Erf((x-[1])/(TMath::Sqrt(2)*[2]))+[3]", 0., 1.).Eval(0.5) # compiles the formula machinery
+    except ImportError:
+        pass
+    print("Analysis modules loaded in {0:.1f} seconds".format(time.time() - startTime))
+
+    # Refuse to take over the socket of a running server
+    if os.path.exists(socketPath):
+        try:
+            _connect(socketPath).close()
+        except IOError:
+            os.remove(socketPath) # left by a server that did not stop cleanly
+        else:
+            raise IOError("An analysis server is already listening on {0}".format(socketPath))
+    listenSock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    oldUmask = os.umask(0o177) # only the user can submit jobs
+    try:
+        listenSock.bind(socketPath)
+    finally:
+        os.umask(oldUmask)
+    listenSock.listen(16)
+    printGreen("Analysis server listening on {0}, running at most {1} job(s) at once".format(socketPath, maxJobs))
+
+    scripts = {}
+    pending = collections.deque() # (client socket, job, job number)
+    running = {} # log file descriptor: dictionary describing the job
+    nJobs = 0
+    stopping = False
+    try:
+        while not (stopping and len(running) == 0):
+            # Start the queued jobs
+            while len(pending) > 0 and len(running) < maxJobs:
+                clientSock, job, jobNumber = pending.popleft()
+                try:
+                    func = _resolveJob(job, scripts)
+                except Exception as err:
+                    _sendMessage(clientSock, ("done", {"status":"failed", "error":"Unable to load {0}: {1}".format(job["funcName"], err), "elapsed":0.}))
+                    clientSock.close()
+                    continue
+                logReadFd, logWriteFd = os.pipe()
+                resultRecvConn, resultSendConn = Pipe(False)
+                process = Process(target=_runJob, args=(func, job, logWriteFd, resultSendConn, listenSock))
+                process.start()
+                os.close(logWriteFd)
+                resultSendConn.close()
+                print("Job {0}: {1} started in process {2}".format(jobNumber, job["funcName"], process.pid))
+                try:
+                    _sendMessage(clientSock, ("started", process.pid))
+                except socket.error:
+                    pass # the job still runs if the client is gone
+                running[logReadFd] = {"client":clientSock, "process":process, "resultConn":resultRecvConn, "outcome":None, "number":jobNumber}
+                pass
+
+            # Wait for new clients, output of the jobs, or their outcome
+            resultFds = dict( (info["resultConn"].fileno(), logReadFd) for logReadFd, info in running.items() if info["outcome"] is None )
+            readable = select.select(([] if stopping else [listenSock]) + running.keys() + resultFds.keys(), [], [])[0]
+
+            # Outcomes first, the output of a job may end in the same pass
+            for fd in readable:
+                if fd in resultFds:
+                    info = running[resultFds[fd]]
+                    try:
+                        info["outcome"] = info["resultConn"].recv()
+                    except EOFError:
+                        info["outcome"] = {} # the process died, see below
+                    pass
+                pass
+
+            for fd in readable:
+                if fd is listenSock or fd not in running:
+                    continue
+                info = running[fd]
+                output = os.read(fd, 65536)
+                if output:
+                    try:
+                        _sendMessage(info["client"], ("log", output))
+                    except socket.error:
+                        pass
+                    continue
+
+                # The job and all the processes it started are done
+                os.close(fd)
+                del running[fd]
+                info["process"].join()
+                if info["outcome"] is None and info["resultConn"].poll():
+                    try:
+                        info["outcome"] = info["resultConn"].recv()
+                    except EOFError:
+                        pass
+                info["resultConn"].close()
+                outcome = info["outcome"]
+                if not outcome:
+                    outcome = {"status":"failed", "error":"Process exited with code {0}".format(info["process"].exitcode), "elapsed":None}
+                print("Job {0}: {1}".format(info["number"], outcome["status"]))
+                try:
+                    _sendMessage(info["client"], ("done", outcome))
+                except socket.error:
+                    pass
+                info["client"].close()
+                pass
+
+            if listenSock in readable:
+                clientSock = listenSock.accept()[0]
+                clientSock.settimeout(10)
+                try:
+                    request = _recvMessage(clientSock)
+                except (socket.error, socket.timeout):
+                    request = None
+                if request is None:
+                    clientSock.close()
+                    continue
+                clientSock.settimeout(None)
+                if request["type"] == "job":
+                    nJobs += 1
+                    pending.append((clientSock, request, nJobs))
+                    nAhead = len(running) + len(pending) - 1
+                    _sendMessage(clientSock, ("queued", nAhead if nAhead >= maxJobs else 0))
+                elif request["type"] == "status":
+                    _sendMessage(clientSock, {
+                        "pid":os.getpid(),
+                        "maxJobs":maxJobs,
+                        "running":[ (info["number"], info["process"].pid) for info in running.values() ],
+                        "pending":[ jobNumber for pendingSock, job, jobNumber in pending ]})
+                    clientSock.close()
+                elif request["type"] == "shutdown":
+                    stopping = True
+                    for pendingSock, job, jobNumber in pending:
+                        _sendMessage(pendingSock, ("done", {"status":"failed", "error":"The analysis server was stopped", "elapsed":0.}))
+                        pendingSock.close()
+                        pass
+                    pending.clear()
+                    _sendMessage(clientSock, ("stopping", len(running)))
+                    clientSock.close()
+                pass
+    finally:
+        listenSock.close()
+        if os.path.exists(socketPath):
+            os.remove(socketPath)
+        for info in running.values():
+            info["process"].terminate()
+            pass
+    printGreen("Analysis server stopped")
+    return
+
+def submitJob(funcName, callArgs, moduleName=None, scriptPath=None, socketPath=None, printLog=True):
+    """
+    Runs ``funcName(*callArgs)`` in the analysis server listening on
+    ``socketPath``, in the current directory and environment. The output of
+    the job is printed as it runs. If the client is interrupted the job keeps
+    running in the server.
+
+    Args:
+        funcName (str): Name of the function to call
+        callArgs (tuple): Arguments of the function, they must be picklable
+        moduleName (str): Module of the function, e.g.
+            ``"gempython.gemplotting.utils.scurveAlgos"``
+        scriptPath (str): Path of the script defining the function, e.g.
+            ``ana_scans.py``, if the function is not part of a module
+        socketPath (str): Path of the socket of the server, see
+            :py:func:`getDefaultSocketPath` if ``None``
+        printLog (bool): Print the output of the job
+
+    Returns: A dictionary with the ``status`` of the job, either ``"done"``
+        or ``"failed"``, its duration in seconds as ``elapsed``, and either
+        the value returned by the function as ``result`` or the reason of the
+        failure as ``error``
+
+    Raises:
+        IOError: If no server is listening on ``socketPath`` or if the
+            connection to the server is lost
+    """
+    import os, sys
+    if socketPath is None:
+        socketPath = getDefaultSocketPath()
+
+    sock = _connect(socketPath)
+    try:
+        _sendMessage(sock, {
+            "type":"job",
+            "funcName":funcName,
+            "moduleName":moduleName,
+            "scriptPath":(os.path.abspath(scriptPath) if scriptPath is not None else None),
+            "callArgs":tuple(callArgs),
+            "cwd":os.getcwd(),
+            "environ":dict(os.environ)})
+        while True:
+            message = _recvMessage(sock)
+            if message is None:
+                raise IOError("Lost the connection to the analysis server on {0}".format(socketPath))
+            kind, content = message
+            if kind == "queued" and content > 0:
+                print("Job queued by the analysis server, waiting for {0} job(s)".format(content))
+            elif kind == "started":
+                print("Job started by the analysis server in process {0}".format(content))
+            elif kind == "log" and printLog:
+                sys.stdout.write(content)
+                sys.stdout.flush()
+            elif kind == "done":
+                return content
+            pass
+    finally:
+        sock.close()
+
+def getServerStatus(socketPath=None):
+    """
+    Returns a dictionary describing the server listening on ``socketPath``:
+    its process ID as ``pid``, ``maxJobs``, the numbers and process IDs of the
+    ``running`` jobs and the numbers of the ``pending`` jobs.
+
+    Args:
+        socketPath (str): Path of the socket of the server, see
+            :py:func:`getDefaultSocketPath` if ``None``
+    """
+    if socketPath is None:
+        socketPath = getDefaultSocketPath()
+    sock = _connect(socketPath)
+    try:
+        _sendMessage(sock, {"type":"status"})
+        return _recvMessage(sock)
+    finally:
+        sock.close()
+
+def stopServer(socketPath=None):
+    """
+    Asks the server listening on ``socketPath`` to stop once its running jobs
+    are done, the queued jobs are reported as failed to their clients.
+
+    Args:
+        socketPath (str): Path of the socket of the server, see
+            :py:func:`getDefaultSocketPath` if ``None``
+
+    Returns: The number of jobs still running
+    """
+    if socketPath is None:
+        socketPath = getDefaultSocketPath()
+    sock = _connect(socketPath)
+    try:
+        _sendMessage(sock, {"type":"shutdown"})
+        message = _recvMessage(sock)
+        return message[1] if message is not None else 0
+    finally:
+        sock.close()
@@ -33,3 +33,18 @@ chanMaskGroup.add_argument("--maxEffPedPercent", type=float, default=maxEffPedPe
 chanMaskGroup.add_argument("--highNoiseCut", type=float, default=highNoiseCutDefault, help="Threshold in fC for setting the HighNoise maskReason, if channel (scurve_sigma > highNoiseCut) then HighNoise is set")
 chanMaskGroup.add_argument("--deadChanCutLow", type=float, default=deadChanCutLowDefault,help="If channel (deadChanCutLow < scurve_sigma < deadChanCutHigh) then DeadChannel is set")
 chanMaskGroup.add_argument("--deadChanCutHigh", type=float, default=deadChanCutHighDefault, help="If channel (deadChanCutHigh < scurve_sigma < deadChanCutHigh) then DeadChannel is set")
+
+parser_scurveFitting = argparse.ArgumentParser(add_help = False)
+
+from anaInfo import fitEngines, fitInitGuesses
+
+fitGroup = parser_scurveFitting.add_argument_group(title="Options for scurve fitting", description="Parameters which specify how the scurves are fit")
+fitGroup.add_argument("--fitEngine", type=str, default="root", choices=fitEngines, help="Backend used to fit the scurves: 'root' fits each channel with TH1::Fit, 'numpy' fits all channels of the detector at once")
+fitGroup.add_argument("--fitInitGuess", type=str, default="data", choices=fitInitGuesses, help="Initial guess of the 'root' fit engine: 'data' starts from the 50%%, 16%% and 84%% crossings of the scurve and only restarts failed fits, 'scan' uses up to 30 random restarts per channel")
+fitGroup.add_argument("--fitWorkers", type=int, default=1, help="Number of processes used to fit the scurves of one detector, VFATs are split between them. Ignored when the analysis already runs inside a pool of processes. When ana_scans.py analyzes a single detector this is set from the --jobs/--light/--medium/--heavy option")
+fitGroup.add_argument("--quickLook", action="store_true", help="Do not fit the scurves, estimate their mean and width from their derivative instead. Analyses a detector in a few seconds, meant for a first look during shifts; overrides --fitEngine")
+fitGroup.add_argument("--noFitCache", action="store_true", help="Do not use the on-disk cache of scurve fit results, all channels are fit again")
+fitGroup.add_argument("--fitCacheFile", type=str, default=None, help="Location of the on-disk cache of scurve fit results, if not provided '$HOME/.cache/gemplotting/scurveFitCache.sqlite' is used")
+fitGroup.add_argument("--warmStart", action="store_true", help="Start the fits from the results of the most recent previous analysis of an scurve of the same chips, found in the scandate directories of the detector under $DATA_PATH")
+fitGroup.add_argument("--warmStartFile", type=str, default=None, help="Start the fits from the scurveFitTree of this file, chips are matched by vfatID. Implies --warmStart")
+fitGroup.add_argument("--noScurveObjects", action="store_true", help="Do not store the scurve_h and scurve_fit TObjects of each channel in the scurveFitTree, the scurve content is still stored in the scurveHits array branch. Makes the output file much smaller and faster to write")
@@ -61,8 +61,13 @@ def dacAnalysis(args, dacScanTree, chamber_config, scandate='noscandate'):
         chamber_config - chamber_config dictionary
         scandate - Either a string 'noscandate' or an a datetime object formated as YYYY.MM.DD.hh.mm, e.g
                    returned from "datetime.datetime.now().strftime("%Y.%m.%d.%H.%M")"
+
+    If args has a true noPlots attribute no summary image is written.
     """
 
+    if hasattr(args,'noPlots') is False:
+        args.noPlots = False
+
     # Set default histogram behavior
     import ROOT as r
     r.TH1.SetDefaultSumw2(False)
@@ -392,6 +397,9 @@ def dacAnalysis(args, dacScanTree, chamber_config, scandate='noscandate'):
             else:
                 outputTxtFiles_dacVals[dacName][ohKey] = open("{0}/{1}/dacScans/{2}/NominalValues-{3}.txt".format(dataPath,detName,scandate,dacName),'w')
 
+    # Summary images are written once all links are analyzed
+    from gempython.gemplotting.utils.renderQueue import RenderQueue, renderQueues
+    dict_renderQueues = {}
     for entry in crateMap:
         ohKey = (entry['shelf'],entry['slot'],entry['link'])
         detName = getDetName(entry)
@@ -425,9 +433,16 @@ def dacAnalysis(args, dacScanTree, chamber_config, scandate='noscandate'):
             canv_Summary = getSummaryCanvas(dict_DACvsADC_Graphs[dacName][ohKey], name="canv_Summary_{0}".format(dacName), drawOpt='APE1', gemType=gemType)
             canv_Summary = addPlotToCanvas(canv_Summary, dict_DACvsADC_Funcs[dacName][ohKey], gemType=gemType)
             if scandate == 'noscandate':
-                canv_Summary.SaveAs("{0}/{1}/Summary_{1}_DACScan_{2}.png".format(elogPath,detName,dacName))
+                imageName = "{0}/{1}/Summary_{1}_DACScan_{2}.png".format(elogPath,detName,dacName)
             else:
-                canv_Summary.SaveAs("{0}/{1}/dacScans/{2}/Summary{1}_DACScan_{3}.png".format(dataPath,detName,scandate,dacName))
+                imageName = "{0}/{1}/dacScans/{2}/Summary{1}_DACScan_{3}.png".format(dataPath,detName,scandate,dacName)
+            if ohKey not in dict_renderQueues:
+                dict_renderQueues[ohKey] = RenderQueue(os.path.dirname(imageName), enabled=(not args.noPlots))
+            dict_renderQueues[ohKey].addCanvas(canv_Summary, imageName)
+
+    # Write the summary images
+    storeNames = [ renderQueue.close() for renderQueue in dict_renderQueues.values() ]
+    renderQueues([ storeName for storeName in storeNames if storeName is not None ])
 
     # Print Summary
     if args.printSum:
@@ -643,6 +658,21 @@ def get2DMapOfDetector(vfatChanLUT, obsData, mapName, zLabel, gemType="ge11"):
 
     return hRetMap
 
+def getAnaManifest(outputDir, manifestName="anaManifest.json"):
+    """
+    Returns the content of the analysis manifest stored in outputDir, see
+    makeAnaManifest(), or None if there is none or if it can not be read.
+
+    outputDir    - Output directory of the analysis
+    manifestName - Name of the manifest file
+    """
+    import json, os
+    try:
+        with open(os.path.join(outputDir, manifestName), "r") as manifestFile:
+            return json.load(manifestFile)
+    except (IOError, ValueError):
+        return None
+
 def getChamberNameFromFilename(filename, returnType=False):
     """
     Determines ChamberName from filename
@@ -772,6 +802,29 @@ def getEmptyPerVFATList(n_vfat=24):
 
     return [ [] for vfat in range(0,n_vfat) ]
 
+def getFileDigest(filename, previousDigest=None):
+    """
+    Returns a dictionary with the size, the modification time and the sha1
+    hash of the content of filename.  The file is only read if its size or
+    modification time differ from those of previousDigest.
+
+    filename       - Name of the file
+    previousDigest - Dictionary returned by a previous call for the same file, or None
+    """
+    import hashlib, os
+    fileStat = os.stat(filename)
+    if (previousDigest is not None
+            and previousDigest.get("size") == fileStat.st_size
+            and previousDigest.get("mtime") == fileStat.st_mtime):
+        return previousDigest
+
+    fileHash = hashlib.sha1()
+    with open(filename, "rb") as inputFile:
+        for block in iter(lambda: inputFile.read(1024*1024), b""):
+            fileHash.update(block)
+            pass
+    return {"size":fileStat.st_size, "mtime":fileStat.st_mtime, "sha1":fileHash.hexdigest()}
+
 def getGEBTypeFromFilename(filename, cName=None):
     """
     Determines GEBtype from filename
@@ -874,18 +927,33 @@ def getMapping(mappingFileName, isVFAT2=True, gemType="ge11"):
 
     return ret_mapDict
 
-def getNumCores2Use(args):
+def getNumCores2Use(args, nTasks=None):
     """
     Determines the number of cpu cores to use for parallel processing
 
-    args - object returned by argparse.ArgumentParser.parse_args() 
+    args   - object returned by argparse.ArgumentParser.parse_args() 
+    nTasks - Number of tasks run in parallel, if not None at most nTasks cores are used
 
-    args is expected to have the following boolean attributes:
+    args is expected to have the following attributes, only one of which is set:
     
+        jobs - if not None, either a number of cores or "auto" to determine it from the idle
+               cores and the available memory, see getAutoNumWorkers() of multiprocUtils.py
         light - 25% of cores will be used; rounded down
         medium - 50% of cores will be used; rounded down
         heavy - 75% of cores will be used; rounded down
     """
+    if hasattr(args,'jobs') and args.jobs is not None:
+        if args.jobs == "auto":
+            from gempython.gemplotting.utils.multiprocUtils import getAutoNumWorkers
+            return getAutoNumWorkers(nTasks)
+        try:
+            nJobs = int(args.jobs)
+        except ValueError:
+            raise RuntimeError("getNumCores2Use() - jobs must be a number of cores or 'auto', not '{0}'".format(args.jobs))
+        if nJobs < 1:
+            raise RuntimeError("getNumCores2Use() - jobs must be at least 1, not {0}".format(nJobs))
+        return nJobs if nTasks is None else max(1, min(nJobs, nTasks))
+
     from multiprocessing import cpu_count
     try:
         availableCores = cpu_count() # Docs say this may raise following exception: see https://docs.python.org/2/library/multiprocessing.html#miscellaneous
@@ -901,13 +969,14 @@ def getNumCores2Use(args):
     elif args.heavy:
         usageFactor = 0.75
     else:
-        raise Runtime("getNumCores2Use() - at least one of the usage {'light','medium','heavy'} options must be True")
+        raise RuntimeError("getNumCores2Use() - at least one of the usage {'jobs','light','medium','heavy'} options must be set")
 
     if availableCores < 4:
         printYellow("Your machine is a dinosaur and only has {0} core; we will only use 1 Core.  Analysis might take awhile...".format(availableCores))
         return 1
 
-    return int(usageFactor*availableCores)
+    nCores = int(usageFactor*availableCores)
+    return nCores if nTasks is None else max(1, min(nCores, nTasks))
 
 def getPhaseScanPlots(phaseScanFile,phaseSetPtsFile,identifier=None,ohMask=0xfff,savePlots=True, gemType="ge11"): 
     """
@@ -1076,6 +1145,42 @@ def getPhaseScanPlots(phaseScanFile,phaseSetPtsFile,identifier=None,ohMask=0xfff
 
     return (dict_phaseScanDists,dict_phaseSetPtDists)
 
+def getPreviousScurveFitFile(scurveFilename, cName=None):
+    """
+    Finds the output of the most recent analysis of an scurve taken on the same
+    detector before the one stored in scurveFilename.  The scandate
+    directories under getDirByAnaType("scurve", cName) are searched, from the
+    most recent to the oldest, for the file given by tree_names["scurveAna"].
+
+    Returns the path of the file or None if no previous analysis is found.
+
+    scurveFilename - Physical filename of the scurve, expected to be under the
+                     scandate directory, see getScandateFromFilename
+    cName - Name of the detector, if None it is determined from scurveFilename
+    """
+    import os
+    from gempython.gemplotting.utils.anaInfo import tree_names
+
+    if cName is None:
+        cName = getChamberNameFromFilename(scurveFilename)
+    scandate = getScandateFromFilename(scurveFilename)
+    if cName is None or scandate in ["current", "noscandate"]:
+        return None
+
+    scurveDir = getDirByAnaType("scurve", cName)
+    if not os.path.isdir(scurveDir):
+        return None
+
+    # Scandates are YYYY.MM.DD.hh.mm so they sort chronologically as strings
+    previousScandates = [ dirName for dirName in os.listdir(scurveDir) if len(dirName.split('.')) == 5 and dirName < scandate ]
+    for previousScandate in sorted(previousScandates, reverse=True):
+        fitFilename = "{0}/{1}/{2}".format(scurveDir,previousScandate,tree_names["scurveAna"][0])
+        if os.path.isfile(fitFilename):
+            return fitFilename
+        pass
+
+    return None
+
 def getScandateFromFilename(infilename):
     """
     Searches an infilename for a substring of the form 'YYYY.MM.DD.hh.mm'.  If this 
@@ -1094,6 +1199,53 @@ def getScandateFromFilename(infilename):
     else:    
         return 'noscandate'
 
+def getScurveFitWarmStart(fitFilename, dict_vfatID, nVFATS=24):
+    """
+    Reads the threshold, noise and pedestal of each channel from the
+    scurveFitTree of a previous analysis, to be used as the initParams of
+    ScanDataFitter.fit().  Chips are matched by vfatID, so the result does not
+    depend on where they were installed.  Channels whose previous fit failed
+    or whose chip is not found are set to NaN.
+
+    Returns a numpy array of shape (nVFATS, CHANNELS_PER_VFAT, 4) indexed as
+    [vfat][channel][par]; the last parameter is always NaN.
+
+    fitFilename - Name of a file containing the scurveFitTree, e.g. as found by getPreviousScurveFitFile
+    dict_vfatID - Dictionary where keys are VFAT positions and values are the vfatID of the chip at that position
+    nVFATS - Number of VFAT positions
+    """
+    import numpy as np
+    import ROOT as r
+    import root_numpy as rp
+    from gempython.gemplotting.mapping.chamberInfo import CHANNELS_PER_VFAT as maxChans
+    from gempython.gemplotting.utils.anaInfo import MaskReason
+
+    list_bNames = ['vfatID','vfatCH','threshold','noise','pedestal','maskReason']
+    fitData = readTreeSidecar(fitFilename, "scurveFitTree", list_bNames)
+    if fitData is None:
+        fitFile = r.TFile(fitFilename,"READ")
+        if fitFile.IsZombie() or not hasattr(fitFile, "scurveFitTree"):
+            fitFile.Close()
+            raise IOError("getScurveFitWarmStart(): no scurveFitTree found in {0}".format(fitFilename))
+        fitData = rp.tree2array(fitFile.scurveFitTree, branches=list_bNames)
+        fitFile.Close()
+        pass
+
+    initParams = np.nan * np.ones((nVFATS, maxChans, 4))
+    for vfat, vfatID in dict_vfatID.items():
+        if not (vfatID > 0):
+            continue
+        thisChip = ((fitData['vfatID'] == vfatID)
+                & ((fitData['maskReason'] & MaskReason.FitFailed) == 0)
+                & (fitData['noise'] > 0))
+        chans = fitData['vfatCH'][thisChip]
+        initParams[vfat, chans, 0] = fitData['threshold'][thisChip]
+        initParams[vfat, chans, 1] = fitData['noise'][thisChip]
+        initParams[vfat, chans, 2] = fitData['pedestal'][thisChip]
+        pass
+
+    return initParams
+
 def getSinglePhaseScanPlot(ohN,phaseScanFile,phaseSetPtsFile,identifier=None,savePlots=True, gemType="ge11"):
     """
     As getPhaseScanPlots but for a single optohybrid, defined by ohN, inside the input files.
@@ -1183,6 +1335,52 @@ def getSubArray(structArray, fields):
     dtype2 = np.dtype({name:structArray.dtype.fields[name] for name in fields})
     return np.ndarray(structArray.shape, dtype2, structArray, 0, structArray.strides)
 
+_toolVersion = None # computed once by getToolVersion()
+
+def getToolVersion():
+    """
+    Returns a string identifying the version of gemplotting, taken from the
+    version file of the installed package or, in a development area, a hash
+    of the python files of the package.  It is computed on the first call
+    only, the following calls return the same string.
+    """
+    global _toolVersion
+    if _toolVersion is not None:
+        return _toolVersion
+
+    try:
+        from gempython.gemplotting._version import __version__, __gitrev__
+        _toolVersion = "{0}-{1}".format(__version__, __gitrev__)
+        return _toolVersion
+    except ImportError:
+        pass
+
+    import hashlib, os
+    packageDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sourceHash = hashlib.sha1()
+    for dirPath, dirNames, fileNames in sorted(os.walk(packageDir)):
+        dirNames.sort()
+        for fileName in sorted(fileNames):
+            if fileName.endswith(".py"):
+                with open(os.path.join(dirPath, fileName), "rb") as sourceFile:
+                    sourceHash.update(sourceFile.read())
+            pass
+        pass
+    _toolVersion = "dev-{0}".format(sourceHash.hexdigest()[:12])
+    return _toolVersion
+
+def getTreeSidecarFilename(filename, treeName):
+    """
+    Returns the name of the columnar sidecar file of the TTree treeName stored
+    in the TFile filename, e.g. SCurveFitData.scurveFitTree.npy next to
+    SCurveFitData.root.  See readTreeSidecar() and writeTreeSidecar().
+
+    filename - Name of the TFile holding the TTree
+    treeName - Name of the TTree
+    """
+    import os
+    return "{0}.{1}.npy".format(os.path.splitext(filename)[0], treeName)
+
 def init_worker():
     """
     If used as the initializer argument for multiprocessing.Pool object
@@ -1223,14 +1421,16 @@ def isOutlierIQR(arrayData):
 
 #Use inter-quartile range (IQR) to reject outliers, but consider only high or low tail
 #Returns a boolean array with True if points are outliers and False otherwise.
-def isOutlierIQROneSided(arrayData, rejectHighTail=True):
+#If axis is given the quartiles are computed independently along it, e.g. axis=1
+#treats each row of a (nVFATs,128) array as a separate dataset.
+def isOutlierIQROneSided(arrayData, rejectHighTail=True, axis=None):
     import numpy as np
     
-    dMin    = np.min(arrayData,     axis=0)
-    dMax    = np.max(arrayData,     axis=0)
-    median  = np.median(arrayData,  axis=0)
-
-    q1,q3   = np.percentile(arrayData, [25,75], axis=0)
+    if axis is None:
+        q1,q3   = np.percentile(arrayData, [25,75], axis=0)
+    else:
+        # keepdims needs numpy 1.9
+        q1,q3   = [ np.expand_dims(quartile, axis) for quartile in np.percentile(arrayData, [25,75], axis=axis) ]
     IQR     = q3 - q1
 
     if rejectHighTail:
@@ -1256,9 +1456,25 @@ def isOutlierMAD(arrayData, thresh=3.5):
 
 #Use MAD to reject outliers, but consider only high or low tail
 #Returns a boolean array with True if points are outliers and False otherwise.
-def isOutlierMADOneSided(arrayData, thresh=3.5, rejectHighTail=True):
+#If axis is given the outliers are determined independently along it, e.g. axis=1
+#treats each row of a (nVFATs,128) array as a separate dataset; rows with a
+#null MAD fall back on the IQR like a single dataset would.
+def isOutlierMADOneSided(arrayData, thresh=3.5, rejectHighTail=True, axis=None):
     import numpy as np
     
+    if axis is not None:
+        # keepdims needs numpy 1.9
+        median = np.expand_dims(np.median(arrayData, axis=axis), axis)
+        diff = arrayData - median
+        med_abs_deviation = np.expand_dims(np.median(np.abs(diff), axis=axis), axis)
+
+        modified_z_score = 0.6745 * diff / np.where(med_abs_deviation == 0, 1., med_abs_deviation)
+        if rejectHighTail:
+            outliers = modified_z_score > thresh
+        else:
+            outliers = modified_z_score < -1.0 * thresh
+        return np.where(med_abs_deviation == 0, isOutlierIQROneSided(arrayData, rejectHighTail, axis), outliers)
+
     median = np.median(arrayData, axis=0)
     diff = arrayData - median
     med_abs_deviation = np.median(np.abs(diff))
@@ -1274,6 +1490,41 @@ def isOutlierMADOneSided(arrayData, thresh=3.5, rejectHighTail=True):
             return modified_z_score < -1.0 * thresh
 
 
+def makeAnaManifest(anaType, inputFiles, options, previousManifest=None):
+    """
+    Returns the analysis manifest of an output directory, a dictionary
+    recording the digests of the input files, see getFileDigest(), the
+    options of the analysis and the version of gemplotting.  Its "key" is a
+    hash of all of them: an output whose stored manifest has the same key was
+    produced from identical inputs and options, see getAnaManifest().
+
+    anaType          - Type of analysis, e.g. the ana_scans.py subcommand
+    inputFiles       - List of the names of the files read by the analysis
+    options          - Dictionary of the options which change the output of the analysis
+    previousManifest - Manifest stored with the output by a previous analysis, the
+                       input files which did not change since are not read again
+    """
+    import hashlib, json
+
+    previousDigests = {}
+    if previousManifest is not None:
+        previousDigests = previousManifest.get("inputs", {})
+
+    manifest = {
+            "anaType":anaType,
+            "inputs":dict( (filename, getFileDigest(filename, previousDigests.get(filename))) for filename in inputFiles ),
+            "options":json.loads(json.dumps(options, default=str)),
+            "version":getToolVersion()
+            }
+    hashedContent = {
+            "anaType":manifest["anaType"],
+            "inputs":dict( (filename, digest["sha1"]) for filename,digest in manifest["inputs"].iteritems() ),
+            "options":manifest["options"],
+            "version":manifest["version"]
+            }
+    manifest["key"] = hashlib.sha1(json.dumps(hashedContent, sort_keys=True)).hexdigest()
+    return manifest
+
 def makeListOfScanDatesFile(chamberName, anaType, startDate=None, endDate=None, delim='\t', ztrim=4):
     """
     Given a starting scandate startDate and an ending scandate endDate this
@@ -1542,6 +1793,54 @@ def parseListOfScanDatesFile(filename, alphaLabels=False, delim='\t'):
 
     return (parsedListOfScanDates,strIndepVar)
 
+def readTreeArray(filename, treeName, branches=None):
+    """
+    Returns the branches of the TTree treeName stored in the TFile filename as
+    a structured numpy array, like root_numpy.root2array().  The columnar
+    sidecar of the TTree is read instead of the TFile if it is usable, see
+    readTreeSidecar().
+
+    filename - Name of the TFile holding the TTree
+    treeName - Name of the TTree
+    branches - List of branch names, if None all branches are read
+    """
+    data = readTreeSidecar(filename, treeName, branches)
+    if data is None:
+        import root_numpy as rp
+        data = rp.root2array(filename, treename=treeName, branches=branches)
+    return data
+
+def readTreeSidecar(filename, treeName, branches=None):
+    """
+    Returns the branches of the TTree treeName stored in the TFile filename as
+    a structured numpy array read from the columnar sidecar of the TTree, see
+    writeTreeSidecar().  The sidecar is memory mapped, only the rows and
+    columns used by the caller are read from disk.
+
+    Returns None if there is no sidecar, if it is older than the TFile or if
+    it does not hold all the requested branches, e.g. branches of strings or
+    TObjects which are never written to the sidecar.
+
+    filename - Name of the TFile holding the TTree
+    treeName - Name of the TTree
+    branches - List of branch names, if None all branches of the sidecar are returned
+    """
+    import os
+    import numpy as np
+
+    sidecarName = getTreeSidecarFilename(filename, treeName)
+    if not os.path.isfile(sidecarName):
+        return None
+    if os.path.isfile(filename) and os.path.getmtime(sidecarName) < os.path.getmtime(filename):
+        return None
+
+    data = np.load(sidecarName, mmap_mode='r')
+    if branches is None:
+        return data
+    if not all(branch in data.dtype.names for branch in branches):
+        return None
+    return data[list(branches)]
+
 #Use Median absolute deviation (MAD) to reject outliers
 #See: http://stackoverflow.com/questions/22354094/pythonic-way-of-detecting-outliers-in-one-dimensional-observation-data
 #And also: http://www.itl.nist.gov/div898/handbook/eda/section3/eda35h.htm
@@ -1554,8 +1853,54 @@ def rejectOutliersMADOneSided(arrayData, thresh=3.5, rejectHighTail=True):
     arrayOutliers = isOutlierMADOneSided(arrayData, thresh, rejectHighTail)
     return arrayData[arrayOutliers != True]
 
-  
-def getSummaryCanvas(dictSummary, dictSummaryPanPin2=None, name='Summary', trimPt=None, drawOpt="colz", gemType="ge11", write2Disk=False):
+def writeJSONFile(data, filename):
+    """
+    Writes data to filename in JSON format.  The data are written to a
+    temporary file first, which then replaces filename, so readers never see
+    a partially written file, even if the writer is interrupted.
+
+    data     - Object which can be serialized to JSON
+    filename - Name of the output file
+    """
+    import json, os
+    tmpName = "{0}.tmp{1}".format(filename, os.getpid())
+    with open(tmpName, "w") as outputFile:
+        json.dump(data, outputFile, indent=2, sort_keys=True)
+    os.rename(tmpName, filename)
+    return filename
+
+def writeTreeSidecar(data, filename, treeName):
+    """
+    Writes the content of the TTree treeName stored in the TFile filename to
+    its columnar sidecar, a .npy file of a structured numpy array which can be
+    memory mapped, see readTreeSidecar().  Fields holding python objects, e.g.
+    from branches of strings, are not written.
+
+    The sidecar should be written once the TFile is closed, otherwise it is
+    older than the TFile and will not be used.
+
+    data - structured numpy array holding the TTree content, e.g. from root_numpy.tree2array()
+    filename - Name of the TFile holding the TTree
+    treeName - Name of the TTree
+    """
+    import os
+    import numpy as np
+
+    names = [ name for name in data.dtype.names if not data.dtype[name].hasobject ]
+    sidecarData = np.zeros(len(data), dtype=[ (name, data.dtype[name]) for name in names ])
+    for name in names:
+        sidecarData[name] = data[name]
+        pass
+
+    # Write to a temporary file first so readers never see a partial sidecar
+    sidecarName = getTreeSidecarFilename(filename, treeName)
+    tmpName = "{0}.tmp{1}".format(sidecarName, os.getpid())
+    with open(tmpName, "wb") as sidecarFile:
+        np.save(sidecarFile, sidecarData)
+    os.rename(tmpName, sidecarName)
+    return sidecarName
+
+def getSummaryCanvas(dictSummary, dictSummaryPanPin2=None, name='Summary', trimPt=None, drawOpt="colz", gemType="ge11", write2Disk=False, renderQueue=None):
     """
     Makes an image with summary canvases drawn on it
 
@@ -1569,6 +1914,8 @@ def getSummaryCanvas(dictSummary, dictSummaryPanPin2=None, name='Summary', trimP
     drawOpt            - Draw option
     gemType            - gemType used for getting the correct mapping
     write2Disk         - Option to save canvas with the name as the variable
+    renderQueue        - Optional, RenderQueue of renderQueue.py; if provided and write2Disk
+                         is true the canvas is added to it instead of being saved immediately
     """
 
     import ROOT as r
@@ -1608,6 +1955,8 @@ def getSummaryCanvas(dictSummary, dictSummaryPanPin2=None, name='Summary', trimP
         for vfat in range(0, vfatsPerGemVariant[gemType]):
             if vfat % maxiEta == 0:
                 shift -= maxiEta*3
+            if vfat not in dictSummary or vfat not in dictSummaryPanPin2:
+                continue
             canv.cd(vfat+shift)
             dictSummary[vfat].Draw(drawOpt)
             canv.Update()
@@ -1620,11 +1969,14 @@ def getSummaryCanvas(dictSummary, dictSummaryPanPin2=None, name='Summary', trimP
     canv.Update()
     
     if write2Disk:
-        canv.SaveAs(name)        
+        if renderQueue is not None:
+            renderQueue.addCanvas(canv, name)
+        else:
+            canv.SaveAs(name)        
 
     return canv
 
-def getSummaryCanvasByiEta(dictSummary, name='Summary', drawOpt="colz", gemType="ge11", write2Disk=False):
+def getSummaryCanvasByiEta(dictSummary, name='Summary', drawOpt="colz", gemType="ge11", write2Disk=False, renderQueue=None):
     """
     Makes an Canvas with summary canvases drawn on it
 
@@ -1634,6 +1986,8 @@ def getSummaryCanvasByiEta(dictSummary, name='Summary', drawOpt="colz", gemType=
     drawOpt            - Draw option
     gemType            - gemType used for getting the correct mapping
     write2Disk         - Option to save canvas with the name as the variable "name"
+    renderQueue        - Optional, RenderQueue of renderQueue.py; if provided and write2Disk
+                         is true the canvas is added to it instead of being saved immediately
     """
 
     import ROOT as r
@@ -1658,7 +2012,10 @@ def getSummaryCanvasByiEta(dictSummary, name='Summary', drawOpt="colz", gemType=
     canv.Update()
 
     if write2Disk:
-        canv.SaveAs(name)
+        if renderQueue is not None:
+            renderQueue.addCanvas(canv, name)
+        else:
+            canv.SaveAs(name)
 
     return canv
 
@@ -401,4 +401,9 @@ def anaUltraLatency(infilename, debug=False, latSigMaskRange=None, latSigRange=N
         grVFATNSignalNoBkg.SetName("grVFATNSignalNoBkg")
         grVFATNSignalNoBkg.Write()
     myT.Write()
+    latFitData = rp.tree2array(myT)
     outF.Close()
+
+    # Columnar copy of the latFitTree for fast reads, see readTreeSidecar()
+    from gempython.gemplotting.utils.anautilities import writeTreeSidecar
+    writeTreeSidecar(latFitData, outputDir+"/"+outfilename, 'latFitTree')
@@ -35,3 +35,256 @@ def redirectStdOutAndErr(callingFunc, outputDir):
         pass
 
     return
+
+#: Estimate of the peak memory in bytes of one analysis task, used by
+#: getAutoNumWorkers() and runTasks() until the peak of a task is measured
+defaultTaskMemory = 2*1024**3
+
+def getAutoNumWorkers(nTasks=None, taskMemory=defaultTaskMemory):
+    """
+    Returns the number of worker processes to use on this machine: the number
+    of idle cores, at most the available memory divided by taskMemory, and at
+    most nTasks.  At least one worker is used.
+
+    nTasks     - Number of tasks to run, if None it does not limit the workers
+    taskMemory - Peak memory of a task in bytes
+    """
+
+    nWorkers = getIdleCores()
+    availableMemory = getAvailableMemory()
+    if availableMemory is not None and taskMemory > 0:
+        nWorkers = min(nWorkers, int(availableMemory // taskMemory))
+    if nTasks is not None:
+        nWorkers = min(nWorkers, nTasks)
+    return max(1, nWorkers)
+
+def getAvailableMemory():
+    """
+    Returns the memory in bytes that can be used by new processes without
+    swapping, from MemAvailable of /proc/meminfo.  None if it is unknown.
+    """
+
+    try:
+        with open("/proc/meminfo", "r") as meminfo:
+            for line in meminfo:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1])*1024
+    except (IOError, ValueError):
+        pass
+    return None
+
+def getFileSize(filename):
+    """
+    Returns the size in bytes of the file filename, 0 if it does not exist.
+    Used to order the tasks given to runTasks() by the size of their input.
+
+    filename - Name of the file
+    """
+
+    import os
+    try:
+        return os.path.getsize(filename)
+    except OSError:
+        return 0
+
+def getIdleCores():
+    """
+    Returns the number of cores not used by other processes, from the number
+    of cores and the load average of the last minute.  At least 1.
+    """
+
+    import os
+    from multiprocessing import cpu_count
+    try:
+        nCores = cpu_count()
+    except NotImplementedError:
+        nCores = 1
+    try:
+        load = os.getloadavg()[0]
+    except (AttributeError, OSError):
+        load = 0.
+    return max(1, int(nCores - load + 0.5))
+
+def getPeakMemory():
+    """
+    Returns the peak resident memory in bytes of the calling process
+    """
+
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss*1024 # kB on Linux
+
+def limitWorkerThreads(nThreads=1):
+    """
+    Limits the number of threads used by the numerical libraries, so that
+    parallel worker processes do not each start one thread per core.  The
+    environment variables read by OpenMP and the BLAS libraries are only
+    used if they are set before numpy is imported, those already set are
+    kept.  The implicit multi-threading of ROOT is disabled if ROOT is
+    already imported.
+
+    nThreads - Number of threads of each library
+    """
+
+    import os, sys
+    for varName in ["OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "NUMEXPR_NUM_THREADS"]:
+        os.environ.setdefault(varName, str(nThreads))
+        pass
+    if "ROOT" in sys.modules:
+        import ROOT as r
+        if hasattr(r.ROOT, "DisableImplicitMT"):
+            r.ROOT.DisableImplicitMT()
+    return
+
+def _runTask(func, taskArgs, conn, initializer=None):
+    """
+    Target of the processes started by runTasks(), calls func(*taskArgs) and
+    sends ("ok", result, peak memory) or ("error", message, peak memory) to conn
+    """
+
+    if initializer is not None:
+        initializer()
+    limitWorkerThreads()
+
+    import sys, traceback
+    try:
+        result = func(*taskArgs)
+    except: # catch *all* exceptions, they are reported by the parent
+        errType, err = sys.exc_info()[:2]
+        traceback.print_exc() # to the log of the task if its stdout was redirected
+        message = "{0}: {1}".format(errType.__name__, err)
+    else:
+        try:
+            conn.send(("ok", result, getPeakMemory()))
+            conn.close()
+            return
+        except Exception as err:
+            message = "Unable to send the result back: {0}".format(err)
+    conn.send(("error", message, getPeakMemory()))
+    conn.close()
+    return
+
+def runTasks(func, listOfTaskArgs, nWorkers=1, taskNames=None, taskSizes=None, timeout=7200, retries=1, initializer=None, taskMemory=None, onTaskDone=None):
+    """
+    Calls func(*taskArgs) for each tuple taskArgs of listOfTaskArgs, with at
+    most nWorkers tasks running in parallel.  A new task is started as soon as
+    a worker is free, the largest tasks first, so that a long task is not left
+    alone at the end of the run.
+
+    Each task runs in its own process, so a task that raises, crashes or runs
+    longer than timeout seconds (it is then killed) does not affect the other
+    tasks.  Such a task is started again at most retries times; if it still
+    fails it is reported in a summary printed once all tasks are done.
+
+    If taskMemory is not None a task is only started, unless no other task is
+    running, if the available memory is larger than the peak memory expected
+    for a task: taskMemory at first, then the largest peak measured for the
+    tasks already done.
+
+    Returns a tuple (results, failures): results is the list of the values
+    returned by each task, in the order of listOfTaskArgs, None for the failed
+    tasks; failures is a dictionary whose keys are the indices of the failed
+    tasks in listOfTaskArgs and whose values are the reason of the failure.
+
+    func           - Function called by the tasks, must be importable by the worker processes
+    listOfTaskArgs - List of tuples of the arguments of each task
+    nWorkers       - Maximum number of tasks running in parallel
+    taskNames      - List of the names of the tasks used in the printouts, e.g. their input file
+    taskSizes      - List of the sizes of the tasks, e.g. from getFileSize(), the largest are started first
+    timeout        - Maximum duration of a task in seconds, None for no limit
+    retries        - Number of times a failed task is started again
+    initializer    - If not None called by each worker process before its task, e.g. init_worker of anautilities.py
+    taskMemory     - If not None the expected peak memory of a task in bytes, e.g. defaultTaskMemory
+    onTaskDone     - If not None called as onTaskDone(idx, error) by this process once the task of
+                     index idx succeeded, error is then None, or failed for the last time
+    """
+
+    import time
+    from multiprocessing import Pipe, Process
+    from gempython.utils.gemlogger import printRed, printYellow
+
+    nTasks = len(listOfTaskArgs)
+    if taskNames is None:
+        taskNames = [ "task {0}".format(idx) for idx in range(nTasks) ]
+    if taskSizes is None:
+        taskSizes = [ 0 for idx in range(nTasks) ]
+
+    pending = sorted(range(nTasks), key=lambda idx: taskSizes[idx], reverse=True)
+    attempts = [ 0 for idx in range(nTasks) ]
+    results = [ None for idx in range(nTasks) ]
+    failures = {}
+    running = {} # task index: (process, connection, start time)
+    peakTaskMemory = 0
+    try:
+        while len(pending) > 0 or len(running) > 0:
+            # Start tasks on the free workers, if there is enough memory
+            while len(pending) > 0 and len(running) < max(1, nWorkers):
+                if taskMemory is not None and len(running) > 0:
+                    availableMemory = getAvailableMemory()
+                    expectedMemory = peakTaskMemory if peakTaskMemory > 0 else taskMemory
+                    if availableMemory is not None and availableMemory < expectedMemory:
+                        break
+                idx = pending.pop(0)
+                attempts[idx] += 1
+                recvConn, sendConn = Pipe(False)
+                process = Process(target=_runTask, args=(func, listOfTaskArgs[idx], sendConn, initializer))
+                process.daemon = True
+                process.start()
+                sendConn.close()
+                running[idx] = (process, recvConn, time.time())
+                pass
+
+            # Collect the finished tasks, the result is read before the
+            # process is joined since it may block until it is read
+            for idx, (process, recvConn, startTime) in list(running.items()):
+                error = None
+                if recvConn.poll():
+                    try:
+                        status, value, taskPeakMemory = recvConn.recv()
+                        peakTaskMemory = max(peakTaskMemory, taskPeakMemory)
+                    except EOFError:
+                        status, value = ("error", "Process exited with code {0}".format(process.exitcode))
+                    if status == "ok":
+                        results[idx] = value
+                    else:
+                        error = value
+                elif not process.is_alive():
+                    error = "Process exited with code {0}".format(process.exitcode)
+                elif timeout is not None and time.time() - startTime > timeout:
+                    process.terminate()
+                    error = "Timed out after {0} seconds".format(timeout)
+                else:
+                    continue
+
+                process.join()
+                recvConn.close()
+                del running[idx]
+                if error is None:
+                    if onTaskDone is not None:
+                        onTaskDone(idx, None)
+                    continue
+                if attempts[idx] <= retries:
+                    printYellow("{0} failed, starting it again: {1}".format(taskNames[idx], error))
+                    pending.append(idx)
+                else:
+                    failures[idx] = error
+                    if onTaskDone is not None:
+                        onTaskDone(idx, error)
+                pass
+            time.sleep(0.05)
+            pass
+    except: # catch *all* exceptions, e.g. KeyboardInterrupt, to not leave tasks behind
+        for process, recvConn, startTime in running.values():
+            process.terminate()
+            pass
+        raise
+
+    if taskMemory is not None and peakTaskMemory > 0:
+        print("Peak memory of a task: {0:.0f} MB".format(peakTaskMemory/1024.**2))
+    if len(failures) > 0:
+        printRed("{0} of {1} tasks failed:".format(len(failures), nTasks))
+        for idx in sorted(failures.keys()):
+            printRed("\t{0}: {1}".format(taskNames[idx], failures[idx]))
+            pass
+        pass
+
+    return (results, failures)
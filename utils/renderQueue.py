@@ -0,0 +1,216 @@
+r"""
+``renderQueue`` --- Deferred writing of output images
+=====================================================
+
+.. code-block:: python
+
+    import gempython.gemplotting.utils.renderQueue
+
+Writing a ``TCanvas`` to a ``*.png`` file is one of the slowest steps of the
+analysis tools. Instead of calling ``TCanvas::SaveAs`` the tools give their
+canvases to a :py:class:`RenderQueue`, which stores them in a ``TFile`` next
+to the analysis output. The images are written afterwards by
+:py:func:`renderQueues`, which can use several processes and is called by
+``ana_scans.py`` once all the analyses of a pool are done.
+
+Documentation
+-------------
+"""
+
+#: Name of the ``TFile`` holding the canvases of a :py:class:`RenderQueue`
+renderQueueFilename = "renderQueue.root"
+
+class RenderQueue(object):
+    """
+    Collects the canvases of one analysis and the name of the image each of
+    them should be written to.
+
+    The canvases are written to the store file as they are added, so they can
+    be modified or deleted by the caller afterwards. The ``gStyle`` options
+    affecting the statistics boxes are recorded with each canvas and restored
+    when the image is written.
+
+    Args:
+        outputDir (str): Directory of the store file
+        enabled (bool): If ``False`` the canvases are discarded, no image is
+            written
+        filename (str): Name of the store file
+    """
+
+    def __init__(self, outputDir, enabled=True, filename=renderQueueFilename):
+        import os
+        self.storeName = os.path.join(outputDir, filename)
+        self.enabled = enabled
+        self.jobs = []
+        self._storeFile = None
+
+    def addCanvas(self, canvas, imageName):
+        """
+        Stores ``canvas`` to be written later as ``imageName``.
+        """
+        if not self.enabled:
+            return
+
+        import ROOT as r
+        if self._storeFile is None:
+            # Objects created by the analysis should not end up in the store
+            previousDir = r.gDirectory.GetPath()
+            self._storeFile = r.TFile(self.storeName, "RECREATE")
+            r.gDirectory.cd(previousDir)
+            if not self._storeFile.IsOpen() or self._storeFile.IsZombie():
+                self._storeFile = None
+                raise IOError("Unable to open {0} check to make sure you have write permissions".format(self.storeName))
+            pass
+
+        key = "canvas{0}".format(len(self.jobs))
+        self._storeFile.WriteTObject(canvas, key)
+        self.jobs.append((key, imageName, r.gStyle.GetOptStat(), r.gStyle.GetOptFit()))
+        return
+
+    def close(self):
+        """
+        Writes the list of images to the store file and closes it.
+
+        Returns: The name of the store file, ``None`` if no canvas was added
+        """
+        if self._storeFile is None:
+            return None
+
+        import json
+        import ROOT as r
+        self._storeFile.WriteTObject(r.TNamed("renderJobs", json.dumps(self.jobs)), "renderJobs")
+        self._storeFile.Close()
+        self._storeFile = None
+        return self.storeName
+
+    def render(self, nWorkers=1):
+        """
+        Closes the queue and writes all its images, see :py:func:`renderQueues`.
+
+        Returns: The number of images written
+        """
+        storeName = self.close()
+        if storeName is None:
+            return 0
+        return renderQueues([storeName], nWorkers)
+
+def renderStoredCanvases(storeName, jobIndices=None):
+    """
+    Writes the images of the canvases stored in ``storeName`` by a
+    :py:class:`RenderQueue`.
+
+    Args:
+        storeName (str): Name of the store file
+        jobIndices (list): Indices of the canvases to write, all if ``None``
+
+    Returns: A tuple with the number of images written and the list of images
+        that could not be written
+    """
+    import json
+    import ROOT as r
+    r.gROOT.SetBatch(True)
+
+    storeFile = r.TFile(storeName, "READ")
+    if not storeFile.IsOpen() or storeFile.IsZombie():
+        raise IOError("Unable to open {0} check to make sure you have read permissions".format(storeName))
+    jobs = json.loads(storeFile.Get("renderJobs").GetTitle())
+    if jobIndices is None:
+        jobIndices = range(len(jobs))
+
+    nWritten = 0
+    failed = []
+    for idx in jobIndices:
+        key, imageName, optStat, optFit = jobs[idx]
+        canvas = storeFile.Get(key)
+        if not canvas:
+            failed.append(imageName)
+            continue
+        r.gStyle.SetOptStat(optStat)
+        r.gStyle.SetOptFit(optFit)
+        canvas.SaveAs(imageName)
+        canvas.Close()
+        nWritten += 1
+        pass
+    storeFile.Close()
+
+    return (nWritten, failed)
+
+def renderQueues(storeNames, nWorkers=1, removeStores=True, timeout=7200):
+    """
+    Writes the images of all canvases stored by one or several
+    :py:class:`RenderQueue`.
+
+    With more than one worker the canvases are split into chunks written by
+    parallel processes, so the images of a single analysis are also written in
+    parallel.  A chunk that fails, or takes longer than ``timeout``, does not
+    stop the others, see
+    :py:func:`gempython.gemplotting.utils.multiprocUtils.runTasks`.
+
+    Args:
+        storeNames (list): Names of the store files
+        nWorkers (int): Number of processes writing the images
+        removeStores (bool): Delete each store file once all its images are
+            written
+        timeout (float): Maximum duration in seconds of the writing of a
+            chunk of images, ``None`` for no limit
+
+    Returns: The number of images written
+    """
+    import json, os
+    import ROOT as r
+    from gempython.utils.gemlogger import printYellow
+
+    # Split the canvases of each store in chunks, a few per worker
+    nJobsPerStore = {}
+    for storeName in storeNames:
+        storeFile = r.TFile(storeName, "READ")
+        if not storeFile.IsOpen() or storeFile.IsZombie():
+            raise IOError("Unable to open {0} check to make sure you have read permissions".format(storeName))
+        nJobsPerStore[storeName] = len(json.loads(storeFile.Get("renderJobs").GetTitle()))
+        storeFile.Close()
+        pass
+    nJobs = sum(nJobsPerStore.values())
+    if nJobs == 0:
+        return 0
+    chunkSize = max(1, nJobs // (4 * max(1, nWorkers)))
+    tasks = []
+    for storeName in storeNames:
+        for first in range(0, nJobsPerStore[storeName], chunkSize):
+            tasks.append((storeName, list(range(first, min(first + chunkSize, nJobsPerStore[storeName])))))
+            pass
+        pass
+
+    print("Writing {0} images with {1} process(es)".format(nJobs, nWorkers))
+    if nWorkers > 1:
+        from gempython.gemplotting.utils.anautilities import init_worker
+        from gempython.gemplotting.utils.multiprocUtils import runTasks
+        results, failures = runTasks(
+                renderStoredCanvases,
+                tasks,
+                min(nWorkers, len(tasks)),
+                taskNames=[ "{0} canvases {1}-{2}".format(task[0], task[1][0], task[1][-1]) for task in tasks ],
+                taskSizes=[ len(task[1]) for task in tasks ],
+                timeout=timeout,
+                initializer=init_worker)
+
+        # The images of a failed chunk are reported as not written
+        for idx in failures.keys():
+            storeFile = r.TFile(tasks[idx][0], "READ")
+            jobs = json.loads(storeFile.Get("renderJobs").GetTitle())
+            storeFile.Close()
+            results[idx] = (0, [ jobs[jobIdx][1] for jobIdx in tasks[idx][1] ])
+            pass
+    else:
+        results = [ renderStoredCanvases(*task) for task in tasks ]
+
+    nWritten = sum(result[0] for result in results)
+    failed = [ imageName for result in results for imageName in result[1] ]
+    if len(failed) > 0:
+        printYellow("Unable to write {0} images:\n\t{1}".format(len(failed), "\n\t".join(failed)))
+    elif removeStores:
+        for storeName in storeNames:
+            os.remove(storeName)
+            pass
+        pass
+
+    return nWritten
@@ -0,0 +1,102 @@
+r"""
+``runJournal`` --- Progress of long analysis runs
+=================================================
+
+.. code-block:: python
+
+    import gempython.gemplotting.utils.runJournal
+
+An ``ana_scans.py`` run over many detectors and scandates can last for hours.
+With ``--journal`` its progress is recorded in a :py:class:`RunJournal`, a JSON
+file updated each time a task, e.g. the analysis of one input file, succeeds or
+fails. When the run is started again with ``--resume`` and the same journal,
+the tasks are found again from the input files and those already done are
+skipped.
+
+The journal is replaced atomically at each update, so it is always complete
+even if the run is killed or the machine stops.
+
+Documentation
+-------------
+"""
+
+class RunJournal(object):
+    """
+    Records which tasks of a run are done or have failed. The tasks are
+    identified by their name, e.g. their input file, so that they can be
+    matched when the list of tasks is built again.
+
+    If ``filename`` exists the journal is read from it, otherwise a new one is
+    started.
+
+    Args:
+        filename (str): Name of the journal file
+        command (str): Command of the run, recorded in a new journal
+
+    Raises:
+        IOError: If ``filename`` exists but is not a journal
+    """
+
+    def __init__(self, filename, command=None):
+        import json, os, time
+        self.filename = filename
+        if os.path.isfile(filename):
+            try:
+                with open(filename, "r") as journalFile:
+                    self.content = json.load(journalFile)
+            except ValueError as err:
+                raise IOError("Unable to read the run journal {0}: {1}".format(filename, err))
+            if "tasks" not in self.content:
+                raise IOError("{0} is not a run journal".format(filename))
+        else:
+            self.content = {
+                    "command":command,
+                    "created":time.strftime("%Y.%m.%d.%H.%M.%S"),
+                    "tasks":{}
+                    }
+
+    def isDone(self, taskName):
+        """
+        Returns ``True`` if the task ``taskName`` succeeded in a previous
+        attempt of the run, failed tasks are started again.
+        """
+        return self.content["tasks"].get(taskName, {}).get("status") == "done"
+
+    def markDone(self, taskName):
+        """
+        Records that the task ``taskName`` succeeded and writes the journal.
+        """
+        self._setStatus(taskName, "done", None)
+        return
+
+    def markFailed(self, taskName, reason):
+        """
+        Records that the task ``taskName`` failed because of ``reason`` and
+        writes the journal.
+        """
+        self._setStatus(taskName, "failed", reason)
+        return
+
+    def getCounts(self):
+        """
+        Returns a tuple with the number of tasks done and failed.
+        """
+        statuses = [ task["status"] for task in self.content["tasks"].values() ]
+        return (statuses.count("done"), statuses.count("failed"))
+
+    def write(self):
+        """
+        Writes the journal to its file.
+        """
+        from gempython.gemplotting.utils.anautilities import writeJSONFile
+        writeJSONFile(self.content, self.filename)
+        return
+
+    def _setStatus(self, taskName, status, reason):
+        import time
+        task = {"status":status, "time":time.strftime("%Y.%m.%d.%H.%M.%S")}
+        if reason is not None:
+            task["reason"] = str(reason)
+        self.content["tasks"][taskName] = task
+        self.write()
+        return
@@ -24,7 +24,7 @@ def anaUltraScurveStar(inputs):
     """
     return anaUltraScurve(*inputs)
 
-def anaUltraScurve(args, scurveFilename, calFile=None, GEBtype="short", outputDir=None, vfatList=None):
+def anaUltraScurve(args, scurveFilename, calFile=None, GEBtype="short", outputDir=None, vfatList=None, scurveInput=None):
     """
     Performs the scurve analysis on the input scurve TFile scurveFilename containing the scurveTree TTree.  The args namespace is expected to have the following attributes.  
     If this is called by a child process sys.stdout will be overwritten and be "outputDir/anaLog.log" if outputDir is not None or "$ELOG_PATH/anaLog.log" if outputDir is None.  If this is called by the MainProcess no changes to sys.stdout will be made.
@@ -34,12 +34,23 @@ def anaUltraScurve(args, scurveFilename, calFile=None, GEBtype="short", outputDi
     deadChanCutLow - Lower bound of charge range (in fC) that will be used to determine if a channel is dead based on its ENC
     deadChanCutHigh - Higher bound of charge range (in fC) that will be used to determine if a channel is dead based on its ENC
     debug - If true additional debugging information will be printed
+    deferPlots - If true the output images are not written, the canvases are left in the RenderQueue store file of outputDir for the caller to render, see renderQueue.py
     doNotFit - If true the scurves will not be fit; this will reduce the analysis tiem and output information
     drawbad - If true scurve fits with chi2 values less than 1 or greater than 1000 will be drawn on a separate TCanvas
     extChanMapping - Name of externally supplied file that specifies the ROBstr:PanPin:vfatCH mapping
+    fitEngine - Backend used by ScanDataFitter.fit(), see fitEngines of fitScanData.py for available options
+    fitInitGuess - Initial guess used by the "root" fit engine, see fitInitGuesses of anaInfo.py for available options
+    fitCacheFile - Location of the FitCache database, if None the default location is used
+    fitWorkers - Number of processes used by ScanDataFitter.fit()
     isVFAT2 - If true the data is understood as coming from VFAT2
+    noFitCache - If true the fit results are not looked up in, or stored to, a FitCache
+    noPlots - If true no output image is written, the output TFile is still produced
+    noScurveObjects - If true the scurve_h and scurve_fit TObject branches are not written to the scurveFitTree, the scurve content is still stored in its scurveHits, scurveQMin and scurveQMax branches
     PanPin - If true output plots are made vs. PanPin
+    quickLook - If true the scurves are not fit, their mean and width are estimated with the "quickLook" engine of ScanDataFitter.fit() and the fit cache and warm start are not used
     outfilename - Name of outputfilename that will be used
+    warmStart - If true the fits start from the results of the previous analysis of the same chips, see getPreviousScurveFitFile of anautilities.py
+    warmStartFile - If not None the fits start from the results stored in this file, implies warmStart
     
     Returns a structured numpy array with the following dnames 
         
@@ -51,6 +62,7 @@ def anaUltraScurve(args, scurveFilename, calFile=None, GEBtype="short", outputDi
     GEBtype - The detector type being analyzed
     outputDir - Directory where output plots are stored.  If None this will be default to $ELOG_PATH 
     vfatList - List of VFAT positions to consider in the analysis, if None analyzes all (default). Useful for debugging
+    scurveInput - Output of readScurveInput() for scurveFilename and vfatList, if None the input is read from scurveFilename
     """
         # Check attributes of input args
     # If not present assign appropriate default arguments
@@ -64,16 +76,38 @@ def anaUltraScurve(args, scurveFilename, calFile=None, GEBtype="short", outputDi
         args.deadChanCutHigh = None
     if hasattr(args,'debug') is False:
         args.debug = False
+    if hasattr(args,'deferPlots') is False:
+        args.deferPlots = False
     if hasattr(args,'doNotFit') is False:
         args.doNotFit = False
     if hasattr(args,'drawbad') is False:
         args.drawbad = False
     if hasattr(args,'extChanMapping') is False:
         args.extChanMapping = None
+    if hasattr(args,'fitEngine') is False:
+        args.fitEngine = "root"
+    if hasattr(args,'fitInitGuess') is False:
+        args.fitInitGuess = "data"
+    if hasattr(args,'fitCacheFile') is False:
+        args.fitCacheFile = None
+    if hasattr(args,'fitWorkers') is False:
+        args.fitWorkers = 1
     if hasattr(args,'isVFAT2') is False:
         args.isVFAT2 = False
+    if hasattr(args,'noFitCache') is False:
+        args.noFitCache = False
+    if hasattr(args,'noPlots') is False:
+        args.noPlots = False
+    if hasattr(args,'noScurveObjects') is False:
+        args.noScurveObjects = False
     if hasattr(args,'PanPin') is False:
         args.PanPin = False
+    if hasattr(args,'quickLook') is False:
+        args.quickLook = False
+    if hasattr(args,'warmStart') is False:
+        args.warmStart = False
+    if hasattr(args,'warmStartFile') is False:
+        args.warmStartFile = None
     if hasattr(args, 'outfilename') is False:
         args.outfilename = "SCurveFitData.root"
 
@@ -89,6 +123,10 @@ def anaUltraScurve(args, scurveFilename, calFile=None, GEBtype="short", outputDi
     # Redirect sys.stdout and sys.stderr if necessary 
     from gempython.gemplotting.utils.multiprocUtils import redirectStdOutAndErr
     redirectStdOutAndErr("anaUltraScurve",outputDir)
+
+    # Output images are written once the analysis is done
+    from gempython.gemplotting.utils.renderQueue import RenderQueue
+    renderQueue = RenderQueue(outputDir, enabled=(not args.noPlots))
     
     if args.isVFAT2: #if isVFAT2, deadChanCut are set to default for v2 electronics
         dacName = "VCal"
@@ -118,27 +156,21 @@ def anaUltraScurve(args, scurveFilename, calFile=None, GEBtype="short", outputDi
         raise IOError("Output file {1} is a Zombie, check to make sure you have write permissions under {0}".format(outputDir,outfilename))
     scurveFitTree = r.TTree('scurveFitTree','Tree Holding FitData')
     
-    # Attempt to open input TFile
-    inFile = r.TFile(scurveFilename,'read')
-    if not inFile.IsOpen():
-        outF.Close()
-        inFile.Close()
-        raise IOError("Unable to open input file {0} check to make sure you have read permissions".format(scurveFilename))
-    if inFile.IsZombie():
-        outF.Close()
-        inFile.Close()
-        raise IOError("Input file {0} is a Zombie, check to make sure you have write permissions and file has expected size".format(scurveFilename))
-    scurveTree = inFile.scurveTree
-
-    # Get ChipID's
+    # Read the input once, everything below is derived from scurveData
+    if scurveInput is None:
+        try:
+            scurveInput = readScurveInput(scurveFilename, vfatList)
+        except IOError:
+            outF.Close()
+            raise
+        pass
     import numpy as np
     import root_numpy as rp
+    listOfBranches = scurveInput["listOfBranches"]
+    scurveData = scurveInput["scurveData"]
+
     ##### FIXME
-    from gempython.gemplotting.mapping.chamberInfo import gemTypeMapping
-    if 'gemType' not in inFile.scurveTree.GetListOfBranches():
-        gemType = "ge11"
-    else:
-        gemType = gemTypeMapping[rp.tree2array(tree=inFile.scurveTree, branches =[ 'gemType' ] )[0][0]]
+    gemType = scurveInput["gemType"]
     print gemType
     ##### END
     from gempython.tools.hw_constants import vfatsPerGemVariant
@@ -148,16 +180,8 @@ def anaUltraScurve(args, scurveFilename, calFile=None, GEBtype="short", outputDi
     if ((vfatList is not None) and ((min(vfatList) < 0) or (max(vfatList) > nVFATS-1))):
         raise ValueError("anaUltraScurve(): Either vfatList=None or entries in vfatList must be in [0,{0}]".format(nVFATS-1))
     
-    listOfBranches = scurveTree.GetListOfBranches()
-    if 'vfatID' in listOfBranches:
-        array_chipID = np.unique(rp.tree2array(scurveTree, branches = [ 'vfatID','vfatN' ] ))
-        dict_chipID = {}
-        for entry in array_chipID:
-            dict_chipID[entry['vfatN']]=entry['vfatID']
-    else:
-        dict_chipID = { vfat:0 for vfat in range(nVFATS) }
-        
-
+    # Copied, VFATs without chip ID are added for the DB query
+    dict_chipID = dict(scurveInput["chipIDs"])
         
     if args.debug:
         print("VFAT Position to ChipID Mapping")
@@ -165,7 +189,7 @@ def anaUltraScurve(args, scurveFilename, calFile=None, GEBtype="short", outputDi
             print(vfat,vfatID)
    
     # Get Nevts
-    nevts = np.asscalar(np.unique(rp.tree2array(scurveTree, branches = [ 'Nev' ] )))[0] # for some reason numpy returns this as a tuple...
+    nevts = scurveInput["nevts"]
     
     # Determine CAL DAC calibration
     from gempython.utils.gemlogger import printYellow
@@ -187,18 +211,18 @@ def anaUltraScurve(args, scurveFilename, calFile=None, GEBtype="short", outputDi
         calDAC2Q_Slope = tuple_calInfo[0]
         calDAC2Q_Intercept = tuple_calInfo[1]
 
-    # Create output plot containers
+    # Create output plot containers, only the requested VFATs get plots
     from gempython.utils.nesteddict import nesteddict as ndict
-    vSummaryPlots = ndict()
-    vSummaryPlotsPanPin2 = ndict()
-    vSummaryPlotsNoMaskedChan = ndict()
-    vSummaryPlotsNoMaskedChanPanPin2 = ndict()
-
-    from gempython.gemplotting.utils.anautilities import getEmptyPerVFATList
-    vthr_list = getEmptyPerVFATList(nVFATS) 
-    trim_list = getEmptyPerVFATList(nVFATS) 
-    trimRange_list = getEmptyPerVFATList(nVFATS)
-    trimPolarity_list = getEmptyPerVFATList(nVFATS)
+    vSummaryPlots = {}
+    vSummaryPlotsPanPin2 = {}
+    vSummaryPlotsNoMaskedChan = {}
+    vSummaryPlotsNoMaskedChanPanPin2 = {}
+    detSummary = None # distributions of the entire detector, made after the fits
+
+    vthr_list = np.zeros((nVFATS, maxChans), dtype=int)
+    trim_list = np.zeros((nVFATS, maxChans), dtype=int)
+    trimRange_list = np.zeros((nVFATS, maxChans), dtype=int)
+    trimPolarity_list = np.zeros((nVFATS, maxChans), dtype=int)
     
     # Set default histogram behavior
     r.TH1.SetDefaultSumw2(False)
@@ -218,11 +242,14 @@ def anaUltraScurve(args, scurveFilename, calFile=None, GEBtype="short", outputDi
         stripChanOrPinType = mappingNames[1]
     else:
         outF.Close()
-        inFile.Close()
         raise RuntimeError("anaUltraScurve(): I did not understand this (channels, PanPin) combination: ({0},{1})".format(args.channels,args.PanPin))
 
     # Initialize distributions
     for vfat in range(nVFATS):
+        # If provided, skip all VFATs but the requested one
+        if ((vfatList is not None) and (vfat not in vfatList)):
+            continue
+
         try:
             chipID = dict_chipID[vfat]
         except KeyError as err:
@@ -270,14 +297,6 @@ def anaUltraScurve(args, scurveFilename, calFile=None, GEBtype="short", outputDi
                     256, yMin_Charge, yMax_Charge)
             vSummaryPlotsNoMaskedChanPanPin2[vfat].GetYaxis().SetTitleOffset(1.5)
             pass
-        for chan in range (0,maxChans):
-            vthr_list[vfat].append(0)
-            trim_list[vfat].append(0)
-            if isVFAT3:
-                trimPolarity_list[vfat].append(0)
-            else:
-                trimRange_list[vfat].append(0)
-            pass
         pass
     
     # Build the channel to strip mapping from the text file
@@ -294,7 +313,6 @@ def anaUltraScurve(args, scurveFilename, calFile=None, GEBtype="short", outputDi
         dict_vfatChanLUT = getMapping(MAPPING_PATH+'/shortChannelMap.txt', gemType=gemType)
     else:
         outF.Close()
-        inFile.Close()
         raise RuntimeError("No external mapping provided and GEB type was not recognized")
   
     # Create the fitter
@@ -309,45 +327,42 @@ def anaUltraScurve(args, scurveFilename, calFile=None, GEBtype="short", outputDi
         pass
 
     # Get some of the operational settings of the ASIC
-    # Refactor this using root_numpy???
-    dict_vfatID = dict((vfat, 0) for vfat in range(nVFATS))
-    listOfBranches = scurveTree.GetListOfBranches()
+    vfatN_data = scurveData['vfatN']
+    vfatCH_data = scurveData['vfatCH']
+    if "vthr" in listOfBranches: #v3 electronics behavior
+        vthr_list[vfatN_data, vfatCH_data] = scurveData['vthr']
+    else: #v2b electronics behavior
+        vthr_list[vfatN_data, vfatCH_data] = np.abs(scurveData['vth2'].astype(int) - scurveData['vth1'].astype(int))
+        pass
+    trim_list[vfatN_data, vfatCH_data] = scurveData['trimDAC']
+    if isVFAT3:
+        trimPolarity_list[vfatN_data, vfatCH_data] = scurveData['trimPolarity']
+    else:
+        trimRange_list[vfatN_data, vfatCH_data] = scurveData['trimRange']
+
+    # store event count
     nPulses = -1
-    for event in scurveTree:
-        # If provided, skip all VFATs but the requested one
-        if ((vfatList is not None) and (event.vfatN not in vfatList)):
-            continue
+    if len(scurveData) > 0:
+        nPulses = scurveData['Nev'][0]
 
-        if "vthr" in listOfBranches: #v3 electronics behavior
-            vthr_list[event.vfatN][event.vfatCH] = event.vthr
-        else: #v2b electronics behavior
-            vthr_list[event.vfatN][event.vfatCH] = abs(event.vth2 - event.vth1)
+    # Store vfatID, the first non-zero value of each VFAT
+    dict_vfatID = dict((vfat, 0) for vfat in range(nVFATS))
+    if 'vfatID' in listOfBranches:
+        hasID = scurveData['vfatID'] > 0
+        vfatsWithID, firstIdx = np.unique(vfatN_data[hasID], return_index=True)
+        for vfat, vfatID in zip(vfatsWithID, scurveData['vfatID'][hasID][firstIdx]):
+            dict_vfatID[vfat] = vfatID
             pass
-        trim_list[event.vfatN][event.vfatCH] = event.trimDAC
-        if isVFAT3:
-            trimPolarity_list[event.vfatN][event.vfatCH] = event.trimPolarity
-        else:
-            trimRange_list[event.vfatN][event.vfatCH] = event.trimRange
-        
-        # store event count
-        if nPulses < 0:
-            nPulses = event.Nev
-
-        # Store vfatID
-        if not (dict_vfatID[event.vfatN] > 0):
-            if 'vfatID' in listOfBranches:
-                dict_vfatID[event.vfatN] = event.vfatID
-            else:
-                dict_vfatID[event.vfatN] = 0
-        
-        # Load the event into the fitter
-        if performFit:
-            fitter.feed(event)
+        pass
+
+    # Load the data into the fitter
+    if performFit:
+        fitter.feedArray(scurveData)
 
     # Loop over input data and fill histograms
     print("Filling Histograms")
-    fill2DScurveSummaryPlots(
-            scurveTree=scurveTree, 
+    summaryBins = fill2DScurveSummaryPlots(
+            scurveData=scurveData, 
             vfatHistos=vSummaryPlots, 
             vfatChanLUT=dict_vfatChanLUT, 
             vfatHistosPanPin2=vSummaryPlotsPanPin2, 
@@ -364,32 +379,81 @@ def anaUltraScurve(args, scurveFilename, calFile=None, GEBtype="short", outputDi
         print("Fitting Histograms")
         fitSummary = open(outputDir+'/fitSummary.txt','w')
         fitSummary.write('vfatN/I:vfatID/I:vfatCH/I:fitP0/F:fitP1/F:fitP2/F:fitP3/F\n')
-        scanFitResults = fitter.fit(debug=args.debug)
+        fitEngine = args.fitEngine
+        if args.quickLook:
+            fitEngine = "quickLook"
+        fitCache = None
+        if not (args.noFitCache or args.quickLook):
+            from gempython.gemplotting.fitting.fitCache import FitCache
+            try:
+                fitCache = FitCache(args.fitCacheFile)
+            except Exception as err:
+                printYellow("Unable to open the fit cache, all channels will be fit: {0}".format(err))
+                pass
+        initParams = None
+        if (args.warmStart or args.warmStartFile is not None) and not args.quickLook:
+            from gempython.gemplotting.utils.anautilities import getPreviousScurveFitFile, getScurveFitWarmStart
+            warmStartFile = args.warmStartFile
+            try:
+                if warmStartFile is None:
+                    warmStartFile = getPreviousScurveFitFile(scurveFilename)
+                if warmStartFile is None:
+                    printYellow("No previous analysis of {0} found, fits will not be warm started".format(scurveFilename))
+                else:
+                    print("Starting fits from the results in {0}".format(warmStartFile))
+                    initParams = getScurveFitWarmStart(warmStartFile, dict_vfatID, nVFATS)
+            except Exception as err:
+                printYellow("Unable to warm start the fits: {0}".format(err))
+                pass
+        scanFitResults = fitter.fit(debug=args.debug, engine=fitEngine, initGuess=args.fitInitGuess, nWorkers=args.fitWorkers, vfatList=vfatList, cache=fitCache, initParams=initParams)
+        if fitCache is not None:
+            fitCache.close()
         for vfat in range(nVFATS):
             # If provided, skip all VFATs but the requested one
             if ((vfatList is not None) and (vfat not in vfatList)):
                 continue
 
+            # Use the fit parameters directly, getFunc would build a TF1 per channel
             for chan in range(0,maxChans):
+                chanParams = fitter.fitParams[vfat][chan]
                 fitSummary.write(
                         '{0}\t{1}\t{2}\t{3}\t{4}\t{5}\t{6}\n'.format(
                             vfat,
                             dict_vfatID[vfat],
                             chan,
-                            fitter.scanFuncs[vfat][chan].GetParameter(0),
-                            fitter.scanFuncs[vfat][chan].GetParameter(1),
-                            fitter.scanFuncs[vfat][chan].GetParameter(2),
-                            fitter.scanFuncs[vfat][chan].GetParameter(3)
+                            chanParams[0],
+                            chanParams[1],
+                            chanParams[2],
+                            chanParams[3]
                             )
                         )
         fitSummary.close()
+
+        # Keep track of the cost of the fits, e.g. to compare campaigns
+        import json
+        fitStatsSummary = fitter.getFitStatsSummary(vfatIDs=[ dict_vfatID[vfat] for vfat in range(nVFATS) ])
+        fitStatsSummary["scurveFile"] = scurveFilename
+        with open(outputDir+'/fitStats.json','w') as fitStatsFile:
+            json.dump(fitStatsSummary, fitStatsFile, indent=2, sort_keys=True)
     
         # Determine hot channels
         print("Determining hot channels")
         print("")
+        effectivePedestals = fitter.getEffectivePedestals()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            effPedFraction = effectivePedestals / fitter.Nev
+        fitArrays = {
+                "threshold":scanFitResults[0],
+                "noise":scanFitResults[1],
+                "ped_eff":np.where(fitter.isDead, 0., effPedFraction),
+                "fitValid":fitter.fitValid,
+                "isDead":fitter.isDead
+                }
+        maskArray, reasonArray = computeScurveMasks(fitArrays, args)
+
+        from gempython.gemplotting.utils.anaInfo import MaskReason
         masks = {}
         reason4Mask = {}
-        effectivePedestals = [ np.zeros(maxChans) for vfat in range(nVFATS) ]
         print("| vfatN | Dead Chan | Hot Chan | Failed Fits | High Noise | High Eff Ped |")
         print("| :---: | :-------: | :------: | :---------: | :--------: | :----------: |")
         for vfat in range(nVFATS):
@@ -397,65 +461,21 @@ def anaUltraScurve(args, scurveFilename, calFile=None, GEBtype="short", outputDi
             if ((vfatList is not None) and (vfat not in vfatList)):
                 continue
 
-            #trimValue = np.zeros(128)
-            scurveMean = np.zeros(maxChans)
-            channelNoise = np.zeros(maxChans)
-            fitFailed = np.zeros(maxChans, dtype=bool)
-            for chan in range(0, maxChans):
-                # Compute values for cuts
-                channelNoise[chan] = scanFitResults[1][vfat][chan]
-                effectivePedestals[vfat][chan] = fitter.scanFuncs[vfat][chan].Eval(0.0)
-                
-                # Compute the value to apply MAD on for each channel
-                #trimValue[chan] = scanFitResults[0][vfat][chan] - args.ztrim * scanFitResults[1][vfat][chan]
-                scurveMean[chan] = scanFitResults[0][vfat][chan] 
-                pass
-            fitFailed = np.logical_not(fitter.fitValid[vfat])
-            
-            # Determine outliers
-            from gempython.gemplotting.utils.anautilities import isOutlierMADOneSided
-            #hot = isOutlierMADOneSided(trimValue, thresh=args.zscore,
-            #                           rejectHighTail=False)
-            hot = isOutlierMADOneSided(scurveMean, thresh=args.zscore,
-                                       rejectHighTail=False) # rejects scurves with means shifted to low charge values
-            
-            # Create reason array
-            reason = np.zeros(maxChans, dtype=int) # Not masked
-            from gempython.gemplotting.utils.anaInfo import MaskReason
-            reason[hot] |= MaskReason.HotChannel
-            reason[fitFailed] |= MaskReason.FitFailed
-            nDeadChan = 0
-            for chan in range(0,len(channelNoise)):
-                if (args.deadChanCutLow < channelNoise[chan] and channelNoise[chan] < args.deadChanCutHigh):
-                    reason[chan] |= MaskReason.DeadChannel
-                    nDeadChan+=1
-                    pass
-                pass
-            reason[channelNoise > args.highNoiseCut ] |= MaskReason.HighNoise
-            nHighEffPed = 0
-            for chan in range(0, len(effectivePedestals)):
-                if chan not in fitter.Nev[vfat].keys():
-                    continue
-                if (effectivePedestals[vfat][chan] > (args.maxEffPedPercent * fitter.Nev[vfat][chan]) ):
-                    reason[chan] |= MaskReason.HighEffPed
-                    nHighEffPed+=1
-                    pass
-                pass
-            reason4Mask[vfat] = reason
-            masks[vfat] = ((reason != MaskReason.NotMasked) * (reason != MaskReason.DeadChannel))
+            reason4Mask[vfat] = reasonArray[vfat]
+            masks[vfat] = maskArray[vfat]
             print('| {0:5d} | {1:9d} | {2:8d} | {3:11d} | {4:10d} | {5:12d} |'.format(
                     vfat,
-                    nDeadChan,
-                    np.count_nonzero(hot),
-                    np.count_nonzero(fitFailed),
-                    np.count_nonzero(channelNoise > args.highNoiseCut),
-                    nHighEffPed))
+                    np.count_nonzero(reasonArray[vfat] & MaskReason.DeadChannel),
+                    np.count_nonzero(reasonArray[vfat] & MaskReason.HotChannel),
+                    np.count_nonzero(reasonArray[vfat] & MaskReason.FitFailed),
+                    np.count_nonzero(reasonArray[vfat] & MaskReason.HighNoise),
+                    np.count_nonzero(reasonArray[vfat] & MaskReason.HighEffPed)))
             pass
         
         # Make Distributions w/o Hot Channels
         print("Removing Hot Channels from Output Histograms")
         fill2DScurveSummaryPlots(
-                scurveTree=scurveTree, 
+                scurveData=scurveData, 
                 vfatHistos=vSummaryPlotsNoMaskedChan, 
                 vfatChanLUT=dict_vfatChanLUT, 
                 vfatHistosPanPin2=vSummaryPlotsNoMaskedChanPanPin2, 
@@ -464,93 +484,108 @@ def anaUltraScurve(args, scurveFilename, calFile=None, GEBtype="short", outputDi
                 calDAC2Q_m=calDAC2Q_Slope, 
                 calDAC2Q_b=calDAC2Q_Intercept,
                 vfatList=vfatList,
-                gemType=gemType
+                gemType=gemType,
+                summaryBins=summaryBins # same binning as vSummaryPlots
         )
         
-        # Set the branches of the TTree and store the results
-        # Due to weird ROOT black magic this cannot be done here
-        #scurveFitTree = r.TTree('scurveFitTree','Tree Holding FitData')
-
-        from array import array
-        if 'detName' in listOfBranches:
-            detName = r.vector('string')()
-            detName.push_back(rp.tree2array(scurveTree, branches = [ 'detName' ] )[0][0][0])
-            scurveFitTree.Branch( 'detName', detName)
-        chi2 = array( 'f', [ 0 ] )
-        scurveFitTree.Branch( 'chi2', chi2, 'chi2/F')
-        mask = array( 'i', [ 0 ] )
-        scurveFitTree.Branch( 'mask', mask, 'mask/I' )
-        maskReason = array( 'i', [ 0 ] )
-        scurveFitTree.Branch( 'maskReason', maskReason, 'maskReason/I' )
-        ndf = array( 'i', [ 0 ] )
-        scurveFitTree.Branch( 'ndf', ndf, 'ndf/I')
-        Nhigh = array( 'i', [ 0 ] )
-        scurveFitTree.Branch( 'Nhigh', Nhigh, 'Nhigh/I')
-        noise = array( 'f', [ 0 ] )
-        scurveFitTree.Branch( 'noise', noise, 'noise/F')
-        panPin = array( 'i', [ 0 ] )
-        scurveFitTree.Branch( 'panPin', panPin, 'panPin/I' )
-        pedestal = array( 'f', [ 0 ] )
-        scurveFitTree.Branch( 'pedestal', pedestal, 'pedestal/F')
-        ped_eff = array( 'f', [ 0 ] )
-        scurveFitTree.Branch( 'ped_eff', ped_eff, 'ped_eff/F')
-        ROBstr = array( 'i', [ 0 ] )
-        scurveFitTree.Branch( 'ROBstr', ROBstr, 'ROBstr/I' )
-        trimDAC = array( 'i', [ 0 ] )
-        scurveFitTree.Branch( 'trimDAC', trimDAC, 'trimDAC/I' )
-        threshold = array( 'f', [ 0 ] )
-        scurveFitTree.Branch( 'threshold', threshold, 'threshold/F')
+        # Store the results in the TTree
+        # The scalar branches and the scurve content of all channels are built
+        # as one structured array and written at once with array2tree
+        vfatsAnalyzed = [ vfat for vfat in range(nVFATS) if ((vfatList is None) or (vfat in vfatList)) ]
+        nBins = fitter.scanHits.shape[2]
+        fitDataDtype = [
+                ('chi2', 'f4'), ('mask', 'i4'), ('maskReason', 'i4'), ('ndf', 'i4'), ('Nhigh', 'i4'),
+                ('noise', 'f4'), ('panPin', 'i4'), ('pedestal', 'f4'), ('ped_eff', 'f4'), ('ROBstr', 'i4'),
+                ('trimDAC', 'i4'), ('threshold', 'f4'),
+                ('trimPolarity' if isVFAT3 else 'trimRange', 'i4'),
+                ('vfatCH', 'i4'), ('vfatID', 'u4'), ('vfatN', 'i4'), ('vthr', 'i4'),
+                ('quickLook', 'i4'), # 1 if threshold and noise were estimated without fitting
+                ('fitAttempts', 'i4'), ('fitNInvalid', 'i4'), ('fitNEmpty', 'i4'), ('fitNormChi2', 'f4'),
+                ('fitTime', 'f4'), # seconds
+                ('fitFromCache', 'i4'),
+                ('scurveHits', 'f4', (nBins,)), # content of scurve_h
+                ('scurveQMin', 'f4'), ('scurveQMax', 'f4') # range of scurve_h
+                ]
+        fitData = np.zeros(len(vfatsAnalyzed)*maxChans, dtype=fitDataDtype)
+        entryVFAT = np.repeat(vfatsAnalyzed, maxChans)
+        entryChan = np.tile(np.arange(maxChans), len(vfatsAnalyzed))
+
+        fitData['chi2'] = scanFitResults[3][entryVFAT, entryChan]
+        fitData['mask'] = np.concatenate([ masks[vfat] for vfat in vfatsAnalyzed ])
+        fitData['maskReason'] = np.concatenate([ reason4Mask[vfat] for vfat in vfatsAnalyzed ])
+        fitData['ndf'] = scanFitResults[5][entryVFAT, entryChan]
+        fitData['Nhigh'] = scanFitResults[4][entryVFAT, entryChan]
+        fitData['noise'] = scanFitResults[1][entryVFAT, entryChan]
+        fitData['panPin'] = np.concatenate([ dict_vfatChanLUT[vfat]["PanPin"] for vfat in vfatsAnalyzed ])
+        fitData['pedestal'] = scanFitResults[2][entryVFAT, entryChan]
+        fitData['ped_eff'] = fitArrays["ped_eff"][entryVFAT, entryChan]
+        fitData['ROBstr'] = np.concatenate([ dict_vfatChanLUT[vfat]["Strip"] for vfat in vfatsAnalyzed ])
+        fitData['trimDAC'] = trim_list[entryVFAT, entryChan]
+        fitData['threshold'] = scanFitResults[0][entryVFAT, entryChan]
         if isVFAT3:
-            trimPolarity = array( 'i', [ 0 ] )
-            scurveFitTree.Branch('trimPolarity', trimPolarity, 'trimPolarity/I' )
+            fitData['trimPolarity'] = trimPolarity_list[entryVFAT, entryChan]
         else:
-            trimRange = array( 'i', [ 0 ] )
-            scurveFitTree.Branch( 'trimRange', trimRange, 'trimRange/I' )
-        vfatCH = array( 'i', [ 0 ] )
-        scurveFitTree.Branch( 'vfatCH', vfatCH, 'vfatCH/I' )
-        vfatID = array( 'L', [0] )
-        scurveFitTree.Branch( 'vfatID', vfatID, 'vfatID/i' ) #Hex Chip ID of VFAT
-        vfatN = array( 'i', [ 0 ] )
-        scurveFitTree.Branch( 'vfatN', vfatN, 'vfatN/I' )
-        vthr = array( 'i', [ 0 ] )
-        scurveFitTree.Branch( 'vthr', vthr, 'vthr/I' )
-        scurve_h = r.TH1F()
-        scurveFitTree.Branch( 'scurve_h', scurve_h)
-        scurve_fit = r.TF1()
-        scurveFitTree.Branch( 'scurve_fit', scurve_fit)
-        #ztrim = array( 'f', [ 0 ] )
-        #ztrim[0] = args.ztrim
-        #scurveFitTree.Branch( 'ztrim', ztrim, 'ztrim/F')
+            fitData['trimRange'] = trimRange_list[entryVFAT, entryChan]
+        fitData['vfatCH'] = entryChan
+        fitData['vfatID'] = [ dict_vfatID[vfat] for vfat in entryVFAT ]
+        fitData['vfatN'] = entryVFAT
+        fitData['vthr'] = vthr_list[entryVFAT, entryChan]
+        fitData['quickLook'] = int(fitter.engine == "quickLook")
+        fitData['fitAttempts'] = fitter.fitStats["attempts"][entryVFAT, entryChan]
+        fitData['fitNInvalid'] = fitter.fitStats["nInvalid"][entryVFAT, entryChan]
+        fitData['fitNEmpty'] = fitter.fitStats["nEmpty"][entryVFAT, entryChan]
+        fitData['fitNormChi2'] = fitter.fitStats["normChi2"][entryVFAT, entryChan]
+        fitData['fitTime'] = fitter.fitStats["fitTime"][entryVFAT, entryChan]
+        fitData['fitFromCache'] = fitter.fitStats["fromCache"][entryVFAT, entryChan]
+        fitData['scurveHits'] = fitter.scanHits[entryVFAT, entryChan]
+        fitData['scurveQMin'] = fitter.scanBinEdges[entryVFAT, 0]
+        fitData['scurveQMax'] = fitter.scanBinEdges[entryVFAT, -1]
+
+        outF.cd()
+        scurveFitTree = rp.array2tree(fitData, name='scurveFitTree', tree=scurveFitTree)
+
+        # Branches which array2tree cannot write are filled one by one
+        branchesByEntry = []
+        if 'detName' in listOfBranches:
+            detName = r.vector('string')()
+            detName.push_back(scurveInput["detName"])
+            branchesByEntry.append(scurveFitTree.Branch( 'detName', detName))
+        if not args.noScurveObjects:
+            scurve_h = r.TH1F()
+            branchesByEntry.append(scurveFitTree.Branch( 'scurve_h', scurve_h))
+            scurve_fit = r.TF1()
+            branchesByEntry.append(scurveFitTree.Branch( 'scurve_fit', scurve_fit))
+        if len(branchesByEntry) > 0:
+            for vfat,chan in zip(entryVFAT,entryChan):
+                if not args.noScurveObjects:
+                    fitter.getHisto(vfat,chan).Copy(scurve_h)
+                    fitter.getFunc(vfat,chan).Clone('scurveFit_vfat{0}_chan{1}'.format(vfat,chan)).Copy(scurve_fit)
+                for branch in branchesByEntry:
+                    branch.Fill()
+                    pass
+                pass
+            pass
+
+        if args.drawbad:
+            for vfat,chan in zip(entryVFAT,entryChan):
+                if (scanFitResults[3][vfat][chan] > 1000.0 or scanFitResults[3][vfat][chan] < 1.0):
+                    canvas = r.TCanvas('canvas', 'canvas', 500, 500)
+                    r.gStyle.SetOptStat(1111111)
+                    fitter.getHisto(vfat,chan).Draw()
+                    fitter.getFunc(vfat,chan).Draw('SAME')
+                    canvas.Update()
+                    renderQueue.addCanvas(canvas, '{0}/Fit_Overlay_vfat{1}_vfatCH{2}.png'.format(outputDir, vfat, chan))
+                    pass
+                pass
+            pass
         
         # Make output plots
         print("Storing Output Data")
-        from gempython.gemplotting.mapping.chamberInfo import chamber_iEta2VFATPos, chamber_maxiEtaiPhiPair, chamber_vfatPos2iEta
-        maxiEta = chamber_maxiEtaiPhiPair[gemType][0]
-        maxiPhi = chamber_maxiEtaiPhiPair[gemType][1]
-        
         encSummaryPlots = {}
-        encSummaryPlotsByiEta = {}
         fitSummaryPlots = {}
         effPedSummaryPlots = {}
-        effPedSummaryPlotsByiEta = {}
         threshSummaryPlots = {}
-        threshSummaryPlotsByiEta = {}
         allENC = np.zeros(nVFATS*maxChans)
-        h2DetThresh_All = r.TH2F("ScurveMean_All","ScurveMean_All",nVFATS,-0.5,nVFATS-0.5,
-                                 601,-0.05,60.05)
-        h2DetENC_All = r.TH2F("ScurveSigma_All","ScurveSigma_All",nVFATS,-0.5,nVFATS-0.5,
-                              51,-0.05,5.05)
-        h2DetEffPed_All = r.TH2F("ScurveEffPed_All","Effective Pedestal All",nVFATS,-0.5,nVFATS-0.5,
-                                 nPulses+1, -0.5, nPulses+0.5)
-
-        allENCByiEta    = dict( (ieta,np.zeros(maxiPhi*maxChans)) for ieta in range(1,maxiEta+1) )
-        allEffPedByiEta = dict( (ieta,(-1.*np.ones(maxiPhi*maxChans))) for ieta in range(1,maxiEta+1) )
-        allThreshByiEta = dict( (ieta,np.zeros(maxiPhi*maxChans)) for ieta in range(1,maxiEta+1) )
-        ## Only in python 2.7 and up
-        # allENCByiEta    = { ieta:np.zeros(3*128) for ieta in range(1,9) }
-        # allEffPedByiEta = { ieta:(-1.*np.ones(3*128)) for ieta in range(1,9) }
-        # allThreshByiEta = { ieta:np.zeros(3*128) for ieta in range(1,9) }
-
         allEffPed = -1.*np.ones(nVFATS * maxChans)
         allThresh = np.zeros(nVFATS * maxChans)
         
@@ -564,62 +599,12 @@ def anaUltraScurve(args, scurveFilename, calFile=None, GEBtype="short", outputDi
             for chan in range (0, maxChans):
                 # Store stripChanOrPinType to use as x-axis of fit summary plots
                 stripPinOrChan = dict_vfatChanLUT[vfat][stripChanOrPinType][chan]
-                
-                # Determine ieta
-                ieta = chamber_vfatPos2iEta[gemType][vfat]
-                iphi = chamber_iEta2VFATPos[gemType][ieta][vfat]
 
                 # Store Values for making fit summary plots
                 allENC[vfat*maxChans + chan] =  scanFitResults[1][vfat][chan]
                 allEffPed[vfat*maxChans + chan] = effectivePedestals[vfat][chan]
                 allThresh[vfat*maxChans + chan] = scanFitResults[0][vfat][chan]
                 stripPinOrChanArray[chan] = float(stripPinOrChan)
-                
-                allENCByiEta[ieta][(iphi-1)*chan + chan] = scanFitResults[1][vfat][chan]
-                allEffPedByiEta[ieta][(iphi-1)*chan + chan] = effectivePedestals[vfat][chan]
-                allThreshByiEta[ieta][(iphi-1)*chan + chan] = scanFitResults[0][vfat][chan]
-
-                # Set arrays linked to TBranches
-                chi2[0] = scanFitResults[3][vfat][chan]
-                mask[0] = masks[vfat][chan]
-                maskReason[0] = reason4Mask[vfat][chan]
-                ndf[0] = int(scanFitResults[5][vfat][chan])
-                Nhigh[0] = int(scanFitResults[4][vfat][chan])
-                noise[0] = scanFitResults[1][vfat][chan]
-                panPin[0] = dict_vfatChanLUT[vfat]["PanPin"][chan]
-                if chan in fitter.Nev[vfat].keys():
-                    ped_eff[0] = effectivePedestals[vfat][chan]/fitter.Nev[vfat][chan]
-                pedestal[0] = scanFitResults[2][vfat][chan]
-                ROBstr[0] = dict_vfatChanLUT[vfat]["Strip"][chan]
-                threshold[0] = scanFitResults[0][vfat][chan]
-                trimDAC[0] = trim_list[vfat][chan]
-                if isVFAT3:
-                    trimPolarity[0] = trimPolarity_list[vfat][chan]
-                else:
-                    trimRange[0] = trimRange_list[vfat][chan]
-                vfatCH[0] = chan
-                vfatID[0] = dict_vfatID[vfat]
-                vfatN[0] = vfat
-                vthr[0] = vthr_list[vfat][chan]
-                
-                # Set TObjects linked to TBranches
-                holder_curve = fitter.scanHistos[vfat][chan]
-                holder_curve.Copy(scurve_h)
-                holder_fit = fitter.getFunc(vfat,chan).Clone('scurveFit_vfat{0}_chan{1}'.format(vfat,chan))
-                holder_fit.Copy(scurve_fit)
-                
-                # Filling the arrays for plotting later
-                if args.drawbad:
-                    if (chi2[0] > 1000.0 or chi2[0] < 1.0):
-                        canvas = r.TCanvas('canvas', 'canvas', 500, 500)
-                        r.gStyle.SetOptStat(1111111)
-                        scurve_h.Draw()
-                        scurve_fit.Draw('SAME')
-                        canvas.Update()
-                        canvas.SaveAs('Fit_Overlay_vfat{0}_vfatCH{1}.png'.format(VFAT, chan))
-                        pass
-                    pass
-                scurveFitTree.Fill()
                 pass
 
             # Make fit Summary plot
@@ -654,7 +639,6 @@ def anaUltraScurve(args, scurveFilename, calFile=None, GEBtype="short", outputDi
                     if thresh == 0: # Skip the case where it still equals the inital value
                         continue
                     histThresh.Fill(thresh)
-                    h2DetThresh_All.Fill(vfat,thresh)
                     pass
                 pass
             gThresh = r.TGraphErrors(histThresh)
@@ -671,7 +655,6 @@ def anaUltraScurve(args, scurveFilename, calFile=None, GEBtype="short", outputDi
                 if effPed < 0: # Skip the case where it still equals the inital value
                     continue
                 histEffPed.Fill(effPed)
-                h2DetEffPed_All.Fill(vfat,effPed)
                 pass
             pass
             histEffPed.SetMarkerStyle(21)
@@ -690,7 +673,6 @@ def anaUltraScurve(args, scurveFilename, calFile=None, GEBtype="short", outputDi
                     if enc == 0: # Skip the case where it still equals the inital value
                         continue
                     histENC.Fill(enc)
-                    h2DetENC_All.Fill(vfat,enc)
                     pass
                 pass
             gENC = r.TGraphErrors(histENC)
@@ -700,193 +682,26 @@ def anaUltraScurve(args, scurveFilename, calFile=None, GEBtype="short", outputDi
             encSummaryPlots[vfat] = gENC
             pass
   
-        # Make a Thresh Summary Dist For the entire Detector
-        detThresh_Mean = np.mean(allThresh[allThresh != 0]) #Don't consider intial values
-        detThresh_Std = np.std(allThresh[allThresh != 0]) #Don't consider intial values
-        hDetThresh_All = r.TH1F("hScurveMeanDist_All","All VFATs;S-Curve Mean #left(fC#right);N",
-                            100, detThresh_Mean - 5. * detThresh_Std, detThresh_Mean + 5. * detThresh_Std )
-        for thresh in allThresh[allThresh != 0]:
-            hDetThresh_All.Fill(thresh)
-            pass
-        hDetThresh_All.GetXaxis().SetTitle("scurve mean pos #left(fC#right)")
-        hDetThresh_All.GetYaxis().SetTitle("Entries / {0} fC".format(detThresh_Std/10.))
-        gDetThresh_All = r.TGraphErrors(hDetThresh_All)
-        gDetThresh_All.SetName("gScurveMeanDist_All")
-        gDetThresh_All.GetXaxis().SetTitle("scurve mean pos #left(fC#right)")
-        gDetThresh_All.GetYaxis().SetTitle("Entries / {0} fC".format(detThresh_Std/10.))
-
-        # Make a thresh map dist for the entire detector
-        from gempython.gemplotting.utils.anautilities import get2DMapOfDetector
-        hDetMapThresh = get2DMapOfDetector(dict_vfatChanLUT, allThresh, stripChanOrPinType, "threshold", gemType=gemType)
-        hDetMapThresh.SetZTitle("threshold #left(fC#right)")
-
-        # Make a EffPed Summary Dist For the entire Detector
-        hDetEffPed_All = r.TH1F("hScurveEffPedDist_All","All VFATs;S-Curve Effective Pedestal #left(N#right);N",
-                                nPulses+1, -0.5, nPulses+0.5)
-        for effPed in allEffPed[allEffPed > -1]:
-            hDetEffPed_All.Fill(effPed)
-            pass
-        hDetEffPed_All.GetXaxis().SetTitle("scurve effective pedestal #left(N#right)")
-        hDetEffPed_All.GetYaxis().SetTitle("Entries")
-        hDetEffPed_All.SetMarkerStyle(21)
-        hDetEffPed_All.SetMarkerColor(r.kRed)
-        hDetEffPed_All.SetLineColor(r.kRed)
-        gDetEffPed_All = r.TGraphErrors(hDetEffPed_All)
-        gDetEffPed_All.SetName("gScurveEffPedDist_All")
-        gDetEffPed_All.GetXaxis().SetTitle("scurve effective pedestal #left(N#right)")
-        gDetEffPed_All.GetYaxis().SetTitle("Entries")
-
-        h2DetEffPed_All.GetXaxis().SetTitle("VFAT Position")
-        h2DetEffPed_All.GetYaxis().SetTitle("Effective Pedestal")
-
-        # Make a EffPed map dist for the entire detector
-        hDetMapEffPed = get2DMapOfDetector(dict_vfatChanLUT, allEffPed, stripChanOrPinType, "Effective Pedestal", gemType=gemType)
-        hDetMapEffPed.SetZTitle("Effective Pedestal")
-
-        # Make a ENC Summary Dist For the entire Detector
-        detENC_Mean = np.mean(allENC[allENC != 0]) #Don't consider intial values
-        detENC_Std = np.std(allENC[allENC != 0]) #Don't consider intial values
-        hDetENC_All = r.TH1F("hScurveSigmaDist_All","All VFATs;S-Curve Sigma #left(fC#right);N",
-                            100, detENC_Mean - 5. * detENC_Std, detENC_Mean + 5. * detENC_Std )
-        for enc in allENC[allENC != 0]:
-            hDetENC_All.Fill(enc)
-            pass
-        hDetENC_All.GetXaxis().SetTitle("scurve sigma #left(fC#right)")
-        hDetENC_All.GetYaxis().SetTitle("Entries / {0} fC".format(detENC_Std/10.))
-        gDetENC_All = r.TGraphErrors(hDetENC_All)
-        gDetENC_All.SetName("gScurveSigmaDist_All")
-        gDetENC_All.GetXaxis().SetTitle("scurve sigma #left(fC#right)")
-        gDetENC_All.GetYaxis().SetTitle("Entries / {0} fC".format(detENC_Std/10.))
-        
-        # Make a ENC map dist for the entire detector
-        hDetMapENC = get2DMapOfDetector(dict_vfatChanLUT, allENC, stripChanOrPinType, "noise", gemType=gemType)
-        hDetMapENC.SetZTitle("noise #left(fC#right)")
-        #hDetMapENC.GetZaxis().SetRangeUser(0.5,0.30)
-
-        # Make the plots by iEta
-        for ieta in range(1,maxiEta+1):
-            # S-curve mean position (threshold)
-            ietaThresh_Mean = np.mean(allThreshByiEta[ieta][allThreshByiEta[ieta] != 0])
-            ietaThresh_Std = np.std(allThreshByiEta[ieta][allThreshByiEta[ieta] != 0])
-
-            hThresh_iEta = r.TH1F(
-                    "hScurveMeanDist_ieta{0}".format(ieta),
-                    "i#eta={0};S-Curve Mean #left(fC#right);N".format(ieta),
-                    80, 
-                    ietaThresh_Mean - 5. * ietaThresh_Std, 
-                    ietaThresh_Mean + 5. * ietaThresh_Std )
-            
-            for thresh in allThreshByiEta[ieta][allThreshByiEta[ieta] != 0]:
-                hThresh_iEta.Fill(thresh)
-                pass
-            gThresh_iEta = r.TGraphErrors(hThresh_iEta)
-            gThresh_iEta.SetName("gScurveMeanDist_ieta{0}".format(ieta))
-            gThresh_iEta.GetXaxis().SetTitle("scurve mean pos #left(fC#right)")
-            gThresh_iEta.GetYaxis().SetTitle("Entries / {0} fC".format(ietaThresh_Std/8.))
-            threshSummaryPlotsByiEta[ieta] = gThresh_iEta
-
-            # S-curve effective pedestal
-            hEffPed_iEta = r.TH1F(
-                    "hScurveEffPedDist_ieta{0}".format(ieta),
-                    "i#eta={0};S-Curve Effective Pedestal #left(N#right);N".format(ieta),
-                     nPulses+1, -0.5, nPulses+0.5)
-            
-            for effPed in allEffPedByiEta[ieta][allEffPedByiEta[ieta] > -1]:
-                hEffPed_iEta.Fill(effPed)
-                pass
-            hEffPed_iEta.SetMarkerStyle(21)
-            hEffPed_iEta.SetMarkerColor(r.kRed)
-            hEffPed_iEta.SetLineColor(r.kRed)
-            effPedSummaryPlotsByiEta[ieta] = hEffPed_iEta
-
-            # S-curve sigma (enc)
-            ietaENC_Mean = np.mean(allENCByiEta[ieta][allENCByiEta[ieta] != 0])
-            ietaENC_Std = np.std(allENCByiEta[ieta][allENCByiEta[ieta] != 0])
-
-            hENC_iEta = r.TH1F(
-                    "hScurveSigmaDist_ieta{0}".format(ieta),
-                    "i#eta={0};S-Curve Sigma #left(fC#right);N".format(ieta),
-                    80, 
-                    ietaENC_Mean - 5. * ietaENC_Std, 
-                    ietaENC_Mean + 5. * ietaENC_Std )
-            
-            for enc in allENCByiEta[ieta][allENCByiEta[ieta] != 0]:
-                hENC_iEta.Fill(enc)
-                pass
-            gENC_iEta = r.TGraphErrors(hENC_iEta)
-            gENC_iEta.SetName("gScurveSigmaDist_ieta{0}".format(ieta))
-            gENC_iEta.GetXaxis().SetTitle("scurve sigma pos #left(fC#right)")
-            gENC_iEta.GetYaxis().SetTitle("Entries / {0} fC".format(ietaENC_Std/8.))
-            encSummaryPlotsByiEta[ieta] = gENC_iEta
-            pass
+        # Make the distributions of the entire detector
+        detSummary = makeScurveDetSummaryPlots(allThresh, allEffPed, allENC, dict_vfatChanLUT, stripChanOrPinType, nPulses, gemType=gemType, vfatList=vfatList)
         pass # end if performFit
 
     # Save the summary plots and channel config file
-    from gempython.gemplotting.utils.anautilities import getSummaryCanvas, getSummaryCanvasByiEta
-    if args.PanPin:
-        getSummaryCanvas(vSummaryPlots, vSummaryPlotsPanPin2, '{0}/Summary.png'.format(outputDir), gemType=gemType, write2Disk=True) 
-    else: 
-        getSummaryCanvas(vSummaryPlots, None, '{0}/Summary.png'.format(outputDir), gemType=gemType, write2Disk=True)
-
+    vfatPlots = {
+            "vSummaryPlots":vSummaryPlots,
+            "vSummaryPlotsPanPin2":vSummaryPlotsPanPin2
+            }
     if performFit:
-        if args.PanPin:
-            getSummaryCanvas(vSummaryPlotsNoMaskedChan, vSummaryPlotsNoMaskedChanPanPin2, '{0}/PrunedSummary.png'.format(outputDir), gemType=gemType, write2Disk=True)
-        else:
-            getSummaryCanvas(vSummaryPlotsNoMaskedChan, None, '{0}/PrunedSummary.png'.format(outputDir), gemType=gemType, write2Disk=True)
-        getSummaryCanvas(fitSummaryPlots, None, '{0}/fitSummary.png'.format(outputDir), None, drawOpt="APE1", gemType=gemType, write2Disk=True)
-        getSummaryCanvas(threshSummaryPlots, None, '{0}/ScurveMeanSummary.png'.format(outputDir), None, drawOpt="AP", gemType=gemType, write2Disk=True)
-        getSummaryCanvas(effPedSummaryPlots, None, '{0}/ScurveEffPedSummary.png'.format(outputDir), None, drawOpt="E1", gemType=gemType, write2Disk=True)
-        getSummaryCanvas(encSummaryPlots, None, '{0}/ScurveSigmaSummary.png'.format(outputDir), None, drawOpt="AP", gemType=gemType, write2Disk=True)
-        
-        #BoxPlot
-        try:
-            minThreshRange = np.nanmin(allThresh[allThresh != 0])*0.9
-        except ValueError:
-            minThreshRange = 0
-            pass
-        try:
-            maxThreshRange = np.nanmax(allThresh[allThresh != 0])*1.1
-        except ValueError:
-            maxThreshRange = 80
-            pass
-        canvasBoxPlot_Thresh = r.TCanvas("h2Thresh","h2Thresh",0,0,1200,1000)
-        h2DetThresh_All.SetStats(0)
-        h2DetThresh_All.GetXaxis().SetTitle("VFAT position")
-        h2DetThresh_All.GetYaxis().SetRangeUser(minThreshRange,maxThreshRange)
-        h2DetThresh_All.GetYaxis().SetTitle("Threshold #left(fC#right)")
-        h2DetThresh_All.SetFillColor(400)
-        h2DetThresh_All.Draw("candle1")
-        canvasBoxPlot_Thresh.Update()
-        canvasBoxPlot_Thresh.SaveAs("{0}/h2ScurveMeanDist_All.png".format(outputDir))
-        canvasBoxPlot_Thresh.Close()
-
-        canvasBoxPlot_EffPed = r.TCanvas("h2EffPed","h2EffPed",0,0,1200,1000)
-        h2DetEffPed_All.SetStats(0)
-        h2DetEffPed_All.GetXaxis().SetTitle("VFAT position")
-        h2DetEffPed_All.GetYaxis().SetRangeUser(0, nevts*0.1)
-        h2DetEffPed_All.GetYaxis().SetTitle("Effective Pedestal #left(A.U.#right)")
-        h2DetEffPed_All.SetFillColor(400)
-        h2DetEffPed_All.Draw("candle1")
-        canvasBoxPlot_EffPed.Update()
-        canvasBoxPlot_EffPed.SaveAs("{0}/h2ScurveEffPedDist_All.png".format(outputDir))
-        canvasBoxPlot_EffPed.Close()
-        
-        canvasBoxPlot_ENC = r.TCanvas("h2ENC","h2ENC",0,0,1200,1000)
-        h2DetENC_All.SetStats(0)
-        h2DetENC_All.GetXaxis().SetTitle("VFAT position")
-        h2DetENC_All.GetYaxis().SetTitle("Noise #left(fC#right)")
-        h2DetENC_All.SetFillColor(400)
-        h2DetENC_All.Draw("candle1")
-        canvasBoxPlot_ENC.Update()
-        canvasBoxPlot_ENC.SaveAs("{0}/h2ScurveSigmaDist_All.png".format(outputDir))
-        canvasBoxPlot_ENC.Close()
-
-
-        
-        getSummaryCanvasByiEta(threshSummaryPlotsByiEta, name='{0}/ScurveMeanSummaryByiEta.png'.format(outputDir), drawOpt="AP", gemType=gemType, write2Disk=True)
-        getSummaryCanvasByiEta(effPedSummaryPlotsByiEta, name='{0}/ScurveEffPedSummaryByiEta.png'.format(outputDir), drawOpt="E1", gemType=gemType, write2Disk=True)
-        getSummaryCanvasByiEta(encSummaryPlotsByiEta, name='{0}/ScurveSigmaSummaryByiEta.png'.format(outputDir), drawOpt="AP", gemType=gemType, write2Disk=True)
+        vfatPlots["vSummaryPlotsNoMaskedChan"] = vSummaryPlotsNoMaskedChan
+        vfatPlots["vSummaryPlotsNoMaskedChanPanPin2"] = vSummaryPlotsNoMaskedChanPanPin2
+        vfatPlots["fitSummaryPlots"] = fitSummaryPlots
+        vfatPlots["threshSummaryPlots"] = threshSummaryPlots
+        vfatPlots["effPedSummaryPlots"] = effPedSummaryPlots
+        vfatPlots["encSummaryPlots"] = encSummaryPlots
+        pass
+    queueScurveImages(renderQueue, outputDir, vfatPlots, detSummary, nevts, PanPin=args.PanPin, gemType=gemType)
 
+    if performFit:
         confF = open(outputDir+'/chConfig.txt','w')
         if isVFAT3:
             confF.write('vfatN/I:vfatID/I:vfatCH/I:trimDAC/I:trimPolarity/I:mask/I:maskReason/I\n')
@@ -948,9 +763,9 @@ def anaUltraScurve(args, scurveFilename, calFile=None, GEBtype="short", outputDi
                     continue
 
                 if chan == 0:
-                    fitter.scanFuncs[vfat][chan].Draw()
+                    fitter.getFunc(vfat,chan).Draw()
                 else:
-                    fitter.scanFuncs[vfat][chan].Draw("same")
+                    fitter.getFunc(vfat,chan).Draw("same")
             canvOfScurveFits[vfat].Update()
     
     # Save TObjects
@@ -980,48 +795,432 @@ def anaUltraScurve(args, scurveFilename, calFile=None, GEBtype="short", outputDi
             canvOfScurveFits[vfat].Write()
             pass
     if performFit:
-        dirSummary = outF.mkdir("Summary")
-        dirSummary.cd()
-        hDetThresh_All.Write()
-        hDetEffPed_All.Write()
-        hDetENC_All.Write()
-        
-        gDetThresh_All.Write()
-        gDetEffPed_All.Write()
-        gDetENC_All.Write()
-   
-        h2DetThresh_All.Write()
-        h2DetEffPed_All.Write()
-        h2DetENC_All.Write()
-
-        hDetMapThresh.Write()
-        hDetMapEffPed.Write()
-        hDetMapENC.Write()
-
-        for ieta in range(1,maxiEta+1):
-            dir_iEta = dirSummary.mkdir("ieta{0}".format(ieta))
-            dir_iEta.cd()
-            threshSummaryPlotsByiEta[ieta].Write()
-            effPedSummaryPlotsByiEta[ieta].Write()
-            encSummaryPlotsByiEta[ieta].Write()
-            pass
-        pass
+        writeScurveDetSummaryPlots(outF, detSummary)
+
+    # Write the output images, unless the caller renders them after all its analyses
+    if args.deferPlots:
+        renderQueue.close()
+    else:
+        renderQueue.render(nWorkers=args.fitWorkers)
 
     if performFit:
         list_bNames = ['mask','maskReason','noise','pedestal','ped_eff','threshold','vfatCH','vfatID','vfatN']
-        array_fitData = rp.tree2array(scurveFitTree,branches=list_bNames)
+        array_fitData = fitData[list_bNames]
         
         outF.Close()
-        inFile.Close()
+
+        # Columnar copy of the scurveFitTree for fast reads, see readTreeSidecar()
+        from gempython.gemplotting.utils.anautilities import writeTreeSidecar
+        writeTreeSidecar(fitData, outputDir+'/'+outfilename, 'scurveFitTree')
         return array_fitData
     else:
         outF.Close()
-        inFile.Close()
         return
 
-def fill2DScurveSummaryPlots(scurveTree, vfatHistos, vfatChanLUT, vfatHistosPanPin2=None, lutType="vfatCH", chanMasks=None, calDAC2Q_m=None, calDAC2Q_b=None, vfatList=None, gemType="ge11"):
+def anaUltraScurveRemask(args, scurveFilename, calFile=None, GEBtype="short", outputDir=None, vfatList=None):
     """
-    Fills 2D Scurve summary plots from scurveTree TTree
+    Masks again the channels of a previous anaUltraScurve output, e.g. to try other cuts, without repeating the analysis.  The fit results are read from the scurveFitTree of "outputDir/outfilename" (from its columnar sidecar if it is usable, see readTreeSidecar() of anautilities.py) and given to computeScurveMasks().  If any mask changes the output is rewritten in place:
+
+        - the mask and maskReason branches of the scurveFitTree, and of its sidecar,
+        - the vSummaryPlotsNoMaskedChan histograms and the scurvesNoMaskedChan canvases of each VFAT directory, made from the vSummaryPlots histograms without the columns of the masked channels,
+        - chConfig.txt and the PrunedSummary.png image.
+
+    The other outputs do not depend on the masks and are left untouched, except the canvases of the scurve fits of each VFAT which still omit the channels masked by the previous analysis.
+    The arguments are those of anaUltraScurve, calFile and GEBtype are not used.  If vfatList is not None only the masks of these VFATs are changed.  If this is called by a child process sys.stdout will be overwritten and be "outputDir/anaLog.log".  The args namespace is expected to have the cuts described in computeScurveMasks() and the following attributes.
+
+    channels - If true output plots are made vs. vfatCH
+    deferPlots - If true the output images are not written, the canvases are left in the RenderQueue store file of outputDir for the caller to render, see renderQueue.py
+    fitWorkers - Number of processes used to write the output images
+    noPlots - If true no output image is written
+    outfilename - Name of the output TFile of the previous analysis
+    PanPin - If true output plots are made vs. PanPin
+
+    Since the channels without scan data are not stored they are taken to be the ones with a null effective pedestal, which never pass a non-negative maxEffPedPercent cut.
+
+    Returns the same structured numpy array as anaUltraScurve.
+    """
+
+    # Check attributes of input args
+    # If not present assign appropriate default arguments
+    if hasattr(args,'channels') is False:
+        args.channels = False
+    if hasattr(args,'deferPlots') is False:
+        args.deferPlots = False
+    if hasattr(args,'fitWorkers') is False:
+        args.fitWorkers = 1
+    if hasattr(args,'noPlots') is False:
+        args.noPlots = False
+    if hasattr(args, 'outfilename') is False:
+        args.outfilename = "SCurveFitData.root"
+    if hasattr(args,'PanPin') is False:
+        args.PanPin = False
+
+    if outputDir is None:
+        from gempython.gemplotting.utils.anautilities import getElogPath
+        outputDir = getElogPath()
+        pass
+
+    # Redirect sys.stdout and sys.stderr if necessary 
+    from gempython.gemplotting.utils.multiprocUtils import redirectStdOutAndErr
+    redirectStdOutAndErr("anaUltraScurveRemask",outputDir)
+
+    import os
+    import numpy as np
+    import ROOT as r
+    import root_numpy as rp
+    from gempython.utils.gemlogger import printYellow
+    r.TH1.SetDefaultSumw2(False)
+    r.gROOT.SetBatch(True)
+    r.gStyle.SetOptStat(1111111)
+
+    # Get the detector type from the input file
+    inFile = r.TFile(scurveFilename,'read')
+    if not inFile.IsOpen() or inFile.IsZombie():
+        inFile.Close()
+        raise IOError("Unable to open input file {0} check to make sure you have read permissions".format(scurveFilename))
+    scurveTree = inFile.scurveTree
+    listOfBranches = [ branch.GetName() for branch in scurveTree.GetListOfBranches() ]
+    from gempython.gemplotting.mapping.chamberInfo import gemTypeMapping
+    if 'gemType' not in listOfBranches:
+        gemType = "ge11"
+    else:
+        gemType = gemTypeMapping[rp.tree2array(scurveTree, branches=['gemType'], stop=1)['gemType'][0]]
+    inFile.Close()
+    from gempython.tools.hw_constants import vfatsPerGemVariant
+    nVFATS = vfatsPerGemVariant[gemType]
+    from gempython.gemplotting.mapping.chamberInfo import CHANNELS_PER_VFAT as maxChans
+
+    # Read the fit results, the whole sidecar is rewritten if it is usable
+    fitFilename = outputDir+'/'+args.outfilename
+    if not os.path.isfile(fitFilename):
+        raise IOError("Unable to find {0} check to make sure the scurves of {1} were analyzed".format(fitFilename,scurveFilename))
+    from gempython.gemplotting.utils.anautilities import readTreeSidecar, writeTreeSidecar
+    fitData = readTreeSidecar(fitFilename, 'scurveFitTree')
+    hasSidecar = (fitData is not None)
+    if hasSidecar:
+        fitData = np.array(fitData) # in memory copy of the read only memory map
+    else:
+        listOfFitBranches = rp.list_branches(fitFilename, 'scurveFitTree')
+        fitData = rp.root2array(fitFilename, treename='scurveFitTree', branches=[ branch for branch in [
+            'mask','maskReason','noise','panPin','pedestal','ped_eff','ROBstr','threshold',
+            'trimDAC','trimPolarity','trimRange','vfatCH','vfatID','vfatN'] if branch in listOfFitBranches ])
+        pass
+    isVFAT3 = ('trimPolarity' in fitData.dtype.names)
+
+    # Apply the cuts to the fit results of all VFATs at once
+    from gempython.gemplotting.utils.anaInfo import MaskReason
+    vfatN = fitData['vfatN'].astype(int)
+    vfatCH = fitData['vfatCH'].astype(int)
+    fitArrays = {}
+    for key in ["threshold","noise","ped_eff"]:
+        fitArrays[key] = np.zeros((nVFATS, maxChans))
+        fitArrays[key][vfatN, vfatCH] = fitData[key]
+        pass
+    fitArrays["fitValid"] = np.ones((nVFATS, maxChans), dtype=bool)
+    fitArrays["fitValid"][vfatN, vfatCH] = ((fitData['maskReason'] & MaskReason.FitFailed) == 0)
+    fitArrays["isDead"] = (fitArrays["ped_eff"] == 0)
+    maskArray, reasonArray = computeScurveMasks(fitArrays, args)
+
+    newMask = maskArray[vfatN, vfatCH].astype(fitData['mask'].dtype)
+    newReason = reasonArray[vfatN, vfatCH].astype(fitData['maskReason'].dtype)
+    if vfatList is not None:
+        isSelected = np.in1d(vfatN, list(vfatList))
+        newMask = np.where(isSelected, newMask, fitData['mask'])
+        newReason = np.where(isSelected, newReason, fitData['maskReason'])
+        pass
+    isChanged = (newMask != fitData['mask']) | (newReason != fitData['maskReason'])
+    fitData['mask'] = newMask
+    fitData['maskReason'] = newReason
+
+    print("| vfatN | Dead Chan | Hot Chan | Failed Fits | High Noise | High Eff Ped | Changed |")
+    print("| :---: | :-------: | :------: | :---------: | :--------: | :----------: | :-----: |")
+    for vfat in np.unique(vfatN):
+        isThisVFAT = (vfatN == vfat)
+        print('| {0:5d} | {1:9d} | {2:8d} | {3:11d} | {4:10d} | {5:12d} | {6:7d} |'.format(
+                vfat,
+                np.count_nonzero(newReason[isThisVFAT] & MaskReason.DeadChannel),
+                np.count_nonzero(newReason[isThisVFAT] & MaskReason.HotChannel),
+                np.count_nonzero(newReason[isThisVFAT] & MaskReason.FitFailed),
+                np.count_nonzero(newReason[isThisVFAT] & MaskReason.HighNoise),
+                np.count_nonzero(newReason[isThisVFAT] & MaskReason.HighEffPed),
+                np.count_nonzero(isChanged[isThisVFAT])))
+        pass
+
+    list_bNames = ['mask','maskReason','noise','pedestal','ped_eff','threshold','vfatCH','vfatID','vfatN']
+    if not np.any(isChanged):
+        print("No mask changed, {0} is left untouched".format(fitFilename))
+        return fitData[list_bNames]
+    print("Masks of {0} channels changed, updating {1}".format(np.count_nonzero(isChanged),fitFilename))
+
+    outF = r.TFile(fitFilename, 'update')
+    if not outF.IsOpen() or outF.IsZombie():
+        outF.Close()
+        raise IOError("Unable to open {0} check to make sure you have write permissions".format(fitFilename))
+
+    # A TTree can not be modified, copy it without the mask branches, whose
+    # baskets are copied as is, and add them back with their new values.  The
+    # old tree and its baskets are then deleted from the file, their space is
+    # reused by the following writes so that repeated remasks do not add a
+    # copy of the scurve_h and scurve_fit branches each time
+    oldTree = outF.Get("scurveFitTree")
+    oldTree.SetBranchStatus("mask",0)
+    oldTree.SetBranchStatus("maskReason",0)
+    outF.cd()
+    scurveFitTree = oldTree.CloneTree(-1,"fast")
+    oldTree.Delete("all")
+    del oldTree
+    scurveFitTree = rp.array2tree(fitData[['mask','maskReason']], tree=scurveFitTree)
+    scurveFitTree.Write("", r.TObject.kOverwrite)
+
+    # Remake the plots of each VFAT without the columns of the masked channels
+    if ((not args.channels) and (not args.PanPin)):
+        stripPinOrChan = fitData['ROBstr'].astype(int)
+    elif args.channels:
+        stripPinOrChan = vfatCH
+    else:
+        stripPinOrChan = fitData['panPin'].astype(int)
+        pass
+    isPanPin2 = np.zeros(len(fitData), dtype=bool)
+    if args.PanPin:
+        isPanPin2 = (stripPinOrChan >= maxChans/2)
+        binX = np.where(isPanPin2, maxChans-stripPinOrChan, maxChans/2-stripPinOrChan).astype(int)
+    else:
+        binX = stripPinOrChan+1
+        pass
+
+    vSummaryPlotsNoMaskedChan = {}
+    vSummaryPlotsNoMaskedChanPanPin2 = {}
+    for vfat in np.unique(vfatN[isChanged]):
+        dirVFAT = outF.GetDirectory("VFAT{0}".format(vfat))
+        if not dirVFAT:
+            printYellow("No VFAT{0} directory in {1}, its plots are not remade".format(vfat,fitFilename))
+            continue
+
+        isThisVFAT = (vfatN == vfat)
+        listOfTargets = [ (vSummaryPlotsNoMaskedChan, "vSummaryPlots{0}", "vSummaryPlotsNoMaskedChan{0}", isThisVFAT & np.logical_not(isPanPin2)) ]
+        if args.PanPin:
+            listOfTargets.append((vSummaryPlotsNoMaskedChanPanPin2, "vSummaryPlotsPanPin2_{0}", "vSummaryPlotsNoMaskedChanPanPin2_{0}", isThisVFAT & isPanPin2))
+            pass
+        for vfatHistos, allChanName, noMaskedChanName, isInHisto in listOfTargets:
+            allChanHisto = dirVFAT.Get(allChanName.format(vfat))
+            if not allChanHisto:
+                printYellow("No {0} in {1}, the plots of VFAT{2} are not remade".format(allChanName.format(vfat),fitFilename,vfat))
+                break
+            content = rp.hist2array(allChanHisto, include_overflow=True)
+            content[binX[isInHisto & (newMask != 0)]] = 0
+            histo = allChanHisto.Clone(noMaskedChanName.format(vfat))
+            if args.PanPin:
+                rp.array2hist(content, histo, errors=np.sqrt(content))
+            else:
+                rp.array2hist(content, histo)
+            nChans = np.count_nonzero(isInHisto)
+            if nChans > 0:
+                histo.SetEntries(allChanHisto.GetEntries() * np.count_nonzero(isInHisto & (newMask == 0)) / float(nChans))
+            dirVFAT.WriteTObject(histo, histo.GetName(), "WriteDelete")
+            vfatHistos[vfat] = histo
+            pass
+        pass
+    if args.PanPin:
+        canvOfScurveHistosNoMaskedChan = plotAllSCurvesOnCanvas(vSummaryPlotsNoMaskedChan,vSummaryPlotsNoMaskedChanPanPin2,"scurvesNoMaskedChan")
+    else:
+        canvOfScurveHistosNoMaskedChan = plotAllSCurvesOnCanvas(vSummaryPlotsNoMaskedChan,None,"scurvesNoMaskedChan")
+    for vfat, canv in canvOfScurveHistosNoMaskedChan.iteritems():
+        outF.GetDirectory("VFAT{0}".format(vfat)).WriteTObject(canv, canv.GetName(), "WriteDelete")
+        pass
+
+    # The pruned summary image needs the plots of all VFATs
+    for vfat in np.unique(vfatN):
+        if vfat in vSummaryPlotsNoMaskedChan:
+            continue
+        dirVFAT = outF.GetDirectory("VFAT{0}".format(vfat))
+        if not dirVFAT:
+            continue
+        vSummaryPlotsNoMaskedChan[vfat] = dirVFAT.Get("vSummaryPlotsNoMaskedChan{0}".format(vfat))
+        if args.PanPin:
+            vSummaryPlotsNoMaskedChanPanPin2[vfat] = dirVFAT.Get("vSummaryPlotsNoMaskedChanPanPin2_{0}".format(vfat))
+        pass
+    from gempython.gemplotting.utils.renderQueue import RenderQueue
+    from gempython.gemplotting.utils.anautilities import getSummaryCanvas
+    renderQueue = RenderQueue(outputDir, enabled=(not args.noPlots))
+    getSummaryCanvas(vSummaryPlotsNoMaskedChan, vSummaryPlotsNoMaskedChanPanPin2 if args.PanPin else None, '{0}/PrunedSummary.png'.format(outputDir), gemType=gemType, write2Disk=True, renderQueue=renderQueue)
+    outF.Close()
+
+    # The sidecar is written once the TFile is closed so that it stays usable
+    if hasSidecar:
+        writeTreeSidecar(fitData, fitFilename, 'scurveFitTree')
+
+    confF = open(outputDir+'/chConfig.txt','w')
+    if isVFAT3:
+        confF.write('vfatN/I:vfatID/I:vfatCH/I:trimDAC/I:trimPolarity/I:mask/I:maskReason/I\n')
+        for entry in fitData:
+            confF.write('{0}\t{1}\t{2}\t{3}\t{4}\t{5}\t{6}\n'.format(
+                entry['vfatN'],
+                entry['vfatID'],
+                entry['vfatCH'],
+                entry['trimDAC'],
+                entry['trimPolarity'],
+                entry['mask'],
+                entry['maskReason']))
+    else:
+        confF.write('vfatN/I:vfatID/I:vfatCH/I:trimDAC/I:mask/I:maskReason/I\n')
+        for entry in fitData:
+            confF.write('{0}\t{1}\t{2}\t{3}\t{4}\t{5}\n'.format(
+                entry['vfatN'],
+                entry['vfatID'],
+                entry['vfatCH'],
+                entry['trimDAC'],
+                entry['mask'],
+                entry['maskReason']))
+    confF.close()
+
+    # Write the output images, unless the caller renders them after all its analyses
+    if args.deferPlots:
+        renderQueue.close()
+    else:
+        renderQueue.render(nWorkers=args.fitWorkers)
+
+    return fitData[list_bNames]
+
+def anaUltraScurveStreaming(args, scurveFilename, calFile=None, GEBtype="short", outputDir=None, vfatList=None, chunkSize=100000):
+    """
+    Memory bounded version of anaUltraScurve, meant for large detectors or shared machines.  The input TFile is read once: the branches identifying the chips first, then the other branches by chunks of chunkSize entries whose content is stored by VFAT in a binary file of a temporary directory of outputDir.  The VFATs are then analyzed one at a time: each is loaded from its file, fit, masked and written to its temporary directory by a call of anaUltraScurve with a single VFAT, whose objects are freed before the next VFAT is loaded.  The outputs are then merged with mergeScurveShards, which only keeps in memory the per VFAT plots drawn on the summary images and the fit results of each channel.  The peak memory therefore does not grow with the number of VFATs of the detector.
+    The log of each VFAT is kept as "outputDir/anaLog_vfat{N}.log".  The arguments, and the attributes expected in the args namespace, are those of anaUltraScurve, chunkSize is the number of entries of the input scurveTree read at once.
+
+    Returns the same structured numpy array as anaUltraScurve, None if the scurves were not fit.
+    """
+
+    if outputDir is None:
+        from gempython.gemplotting.utils.anautilities import getElogPath
+        outputDir = getElogPath()
+        pass
+
+    import copy, gc, os, shutil, sys
+    import numpy as np
+    import ROOT as r
+    import root_numpy as rp
+
+    scurveInput = readScurveInput(scurveFilename, readData=False)
+    if vfatList is None:
+        from gempython.tools.hw_constants import vfatsPerGemVariant
+        vfatList = range(vfatsPerGemVariant[scurveInput["gemType"]])
+        pass
+    vfatList = sorted(vfatList)
+
+    stepDirs = []
+    stepFiles = {}
+    for vfat in vfatList:
+        stepDir = "{0}/vfatStream{1}".format(outputDir,vfat)
+        if not os.path.isdir(stepDir):
+            os.makedirs(stepDir)
+        stepDirs.append(stepDir)
+        stepFiles[vfat] = open("{0}/scurveData.bin".format(stepDir),"wb")
+        pass
+
+    # Single pass over the input, the entries are stored by VFAT
+    inFile = r.TFile(scurveFilename,'read')
+    if not inFile.IsOpen() or inFile.IsZombie():
+        inFile.Close()
+        raise IOError("Unable to open input file {0} check to make sure you have read permissions".format(scurveFilename))
+    scurveTree = inFile.scurveTree
+    nEntries = scurveTree.GetEntries()
+    scurveDtype = None
+    for start in range(0, nEntries, chunkSize):
+        chunkData = rp.tree2array(scurveTree, branches=scurveInput["scurveBranches"], start=start, stop=start+chunkSize)
+        scurveDtype = chunkData.dtype
+        for vfat in vfatList:
+            chunkData[chunkData['vfatN'] == vfat].tofile(stepFiles[vfat])
+            pass
+        del chunkData
+        pass
+    inFile.Close()
+    for stepFile in stepFiles.values():
+        stepFile.close()
+        pass
+
+    # The VFATs only produce the TFile and text files, the images are made from the merged output
+    stepArgs = copy.copy(args)
+    stepArgs.deferPlots = True
+    stepArgs.noPlots = True
+
+    for vfat, stepDir in zip(vfatList, stepDirs):
+        vfatInput = dict(scurveInput)
+        vfatInput["scurveData"] = np.fromfile("{0}/scurveData.bin".format(stepDir), dtype=scurveDtype)
+
+        # In a child process anaUltraScurve redirects sys.stdout to the log of stepDir
+        stdout, stderr = sys.stdout, sys.stderr
+        try:
+            anaUltraScurve(stepArgs, scurveFilename, calFile, GEBtype, stepDir, [vfat], vfatInput)
+        finally:
+            sys.stdout, sys.stderr = stdout, stderr
+            pass
+        del vfatInput
+        gc.collect()
+        pass
+
+    array_fitData = mergeScurveShards(args, scurveFilename, stepDirs, outputDir)
+
+    # Keep the log of each VFAT, the rest of its output is in the merged files
+    for vfat, stepDir in zip(vfatList, stepDirs):
+        if os.path.isfile("{0}/anaLog.log".format(stepDir)):
+            shutil.move("{0}/anaLog.log".format(stepDir), "{0}/anaLog_vfat{1}.log".format(outputDir,vfat))
+        shutil.rmtree(stepDir)
+        pass
+
+    return array_fitData
+
+def computeScurveMasks(fitArrays, cuts):
+    """
+    Determines which channels should be masked, and why, from the results of the scurve fits
+    of all VFATs at once.  Only needs the fit results, so channels can be masked again with
+    different cuts without repeating the analysis.
+
+    fitArrays - dictionary of numpy arrays of shape (nVFATs, 128) with the keys:
+                    threshold - scurve mean
+                    noise     - scurve width
+                    ped_eff   - effective pedestal as a fraction of the number of injected pulses,
+                                0 for dead channels
+                    fitValid  - True if the fit of the channel succeeded
+                    isDead    - True if the channel has no scan data
+    cuts      - object holding the cuts as attributes, e.g. the args namespace of anaUltraScurve:
+                    deadChanCutLow, deadChanCutHigh - a channel is dead if its noise is within this range
+                    highNoiseCut                    - a channel is noisy if its noise is above this value
+                    maxEffPedPercent                - a channel has a high effective pedestal above this fraction
+                    zscore                          - threshold of the MAD outlier rejection of the scurve means
+
+    Returns a tuple of numpy arrays of shape (nVFATs, 128): the mask of each channel, and
+    its maskReason (see MaskReason of anaInfo.py).  Dead channels are not masked.
+    """
+
+    import numpy as np
+    from gempython.gemplotting.utils.anaInfo import MaskReason
+    from gempython.gemplotting.utils.anautilities import isOutlierMADOneSided
+
+    threshold = np.asarray(fitArrays["threshold"])
+    noise = np.asarray(fitArrays["noise"])
+    reason = np.zeros(threshold.shape, dtype=int) # Not masked
+
+    # rejects scurves with means shifted to low charge values
+    hot = isOutlierMADOneSided(threshold, thresh=cuts.zscore, rejectHighTail=False, axis=1)
+    reason[hot] |= MaskReason.HotChannel
+    reason[np.logical_not(fitArrays["fitValid"])] |= MaskReason.FitFailed
+    reason[(cuts.deadChanCutLow < noise) & (noise < cuts.deadChanCutHigh)] |= MaskReason.DeadChannel
+    reason[noise > cuts.highNoiseCut] |= MaskReason.HighNoise
+    highEffPed = np.logical_not(fitArrays["isDead"]) & (np.asarray(fitArrays["ped_eff"]) > cuts.maxEffPedPercent)
+    reason[highEffPed] |= MaskReason.HighEffPed
+
+    mask = ((reason != MaskReason.NotMasked) & (reason != MaskReason.DeadChannel))
+    return mask, reason
+
+def fill2DScurveSummaryPlots(scurveData, vfatHistos, vfatChanLUT, vfatHistosPanPin2=None, lutType="vfatCH", chanMasks=None, calDAC2Q_m=None, calDAC2Q_b=None, vfatList=None, gemType="ge11", summaryBins=None):
+    """
+    Fills 2D Scurve summary plots from the content of the scurveTree TTree.  The content of the
+    histograms is computed with numpy for all entries at once and replaces their previous content.
+    Returns the output of getScurveSummaryBins(), which can be given back as summaryBins to fill
+    other histograms with the same binning, e.g. with masked channels removed.
+
+    scurveData        - structured numpy array holding the scurveTree entries, e.g. from root_numpy.tree2array(),
+                        with at least the vfatN, vfatCH, vcal and Nhits fields (and calSF and isCurrentPulse for
+                        current pulses)
     vfatHistos        - container of histograms for each vfat where len(vfatHistos) = Total number of VFATs
                         The n^th element is a 2D histogram of Hits vs. (Strip || Chan || PanPin)
     vfatChanLUT       - Nested dictionary specifying the VFAT channel to strip and PanPin mapping;
@@ -1036,11 +1235,76 @@ def fill2DScurveSummaryPlots(scurveTree, vfatHistos, vfatChanLUT, vfatHistosPanP
                         if argument is None a value of 1.0 is used for all VFATs
     calDAC2Q_b        - as calDAC2Q_m but for intercept b, but a value of 0 is used if argument is None
     vfatList - List of VFAT positions to consider in the analysis, if None analyzes all (default). Useful for debugging
+    summaryBins       - Output of a previous call for the same scurveData, vfatChanLUT, lutType and binning, if
+                        None it is computed with getScurveSummaryBins()
     """
+    import numpy as np
+    import root_numpy as rp
+    from gempython.gemplotting.utils.anaInfo import mappingNames
+    from gempython.gemplotting.mapping.chamberInfo import CHANNELS_PER_VFAT as maxChans
+
+    usePanPin2 = (lutType == mappingNames[1] and vfatHistosPanPin2 is not None)
+    if summaryBins is None:
+        summaryBins = getScurveSummaryBins(scurveData, vfatHistos, vfatChanLUT, lutType, calDAC2Q_m, calDAC2Q_b, gemType, splitPanPin=usePanPin2)
+    vfatN = summaryBins['vfatN']
+
+    # If provided, skip all VFATs but the requested ones, and the masked channels
+    isSelected = np.ones(len(summaryBins), dtype=bool)
+    if vfatList is not None:
+        isSelectedVFAT = np.zeros(max(vfatHistos.keys())+1, dtype=bool)
+        isSelectedVFAT[list(vfatList)] = True
+        isSelected &= isSelectedVFAT[vfatN]
+        pass
+    if chanMasks is not None:
+        isMasked = np.zeros((max(vfatHistos.keys())+1, maxChans), dtype=bool)
+        for vfat in chanMasks:
+            isMasked[vfat] = chanMasks[vfat]
+            pass
+        isSelected &= np.logical_not(isMasked[vfatN, summaryBins['vfatCH']])
+        pass
+
+    # Fill Summary Histograms
+    for vfat in np.unique(vfatN[isSelected]):
+        isThisVFAT = isSelected & (vfatN == vfat)
+        listOfTargets = [ (vfatHistos[vfat], isThisVFAT & np.logical_not(summaryBins['isPanPin2'])) ]
+        if usePanPin2:
+            listOfTargets.append((vfatHistosPanPin2[vfat], isThisVFAT & summaryBins['isPanPin2']))
+            pass
+
+        for histo, isInHisto in listOfTargets:
+            # Same bin numbering as TH2::GetBin(), including under/overflow
+            content = np.zeros((histo.GetNbinsX()+2, histo.GetNbinsY()+2))
+            binX = np.clip(summaryBins['binX'][isInHisto], 0, histo.GetNbinsX()+1)
+            binY = np.clip(summaryBins['binY'][isInHisto], 0, histo.GetNbinsY()+1)
+            content[binX, binY] = summaryBins['Nhits'][isInHisto]
+            if usePanPin2:
+                rp.array2hist(content, histo, errors=np.sqrt(content))
+            else:
+                rp.array2hist(content, histo)
+            histo.SetEntries(np.count_nonzero(isInHisto))
+            pass
+        pass
+
+    return summaryBins
+
+def getScurveSummaryBins(scurveData, vfatHistos, vfatChanLUT, lutType="vfatCH", calDAC2Q_m=None, calDAC2Q_b=None, gemType="ge11", splitPanPin=True):
+    """
+    Computes for each scurveTree entry the bin of the 2D Scurve summary plots it falls in, see
+    fill2DScurveSummaryPlots() for the meaning of the arguments.  The charge bins are taken from
+    the Y axis of vfatHistos.  If lutType is "PanPin" and splitPanPin is True the pins are split
+    between two histograms per VFAT, one for each side of the readout board connector.
+
+    Returns a structured numpy array with one element per entry of scurveData and the following fields:
+
+        ['vfatN','vfatCH','binX','binY','isPanPin2','Nhits']
+
+    where binX and binY follow the numbering of TH2::GetBin() and isPanPin2 is True for the entries
+    that belong to the histograms of the other side of the readout board connector if lutType is "PanPin"
+    """
+    import numpy as np
     from gempython.gemplotting.utils.anaInfo import dict_calSF, mappingNames
-    from gempython.gemplotting.utils.anautilities import first_index_gt
     from gempython.tools.hw_constants import vfatsPerGemVariant
-    from math import sqrt
+    from gempython.gemplotting.mapping.chamberInfo import CHANNELS_PER_VFAT as maxChans
 
     # Check if lutType is expected
     if lutType not in mappingNames:
@@ -1055,63 +1319,544 @@ def fill2DScurveSummaryPlots(scurveTree, vfatHistos, vfatChanLUT, vfatHistosPanP
     # Set calDAC2Q intercept to zero if not provided
     if calDAC2Q_b is None:
         calDAC2Q_b = np.zeros(vfatsPerGemVariant[gemType])
-   
-    # Get list of bin edges in Y
-    # Must be done for each VFAT since the conversion from DAC units to fC may be unique to the VFAT
-    listOfBinEdgesY = {}
+
+    vfatN = scurveData['vfatN'].astype(int)
+    vfatCH = scurveData['vfatCH'].astype(int)
+
+    # Channel to strip, pin or channel look up table, indexed as [vfat][chan]
+    nVFATs = max(max(vfatHistos.keys()), np.max(vfatN) if len(vfatN) > 0 else 0) + 1
+    chanLUT = np.zeros((nVFATs, maxChans), dtype=int)
     for vfat in vfatHistos:
-        listOfBinEdgesY[vfat] = [ vfatHistos[vfat].GetYaxis().GetBinLowEdge(binY) 
-                for binY in range(1,vfatHistos[vfat].GetNbinsY()+2) ] #Include overflow
+        chanLUT[vfat] = vfatChanLUT[vfat][lutType]
+        pass
+    stripPinOrChan = chanLUT[vfatN, vfatCH]
+
+    # Determine charge
+    charge = np.asarray(calDAC2Q_m, dtype=float)[vfatN]*scurveData['vcal']+np.asarray(calDAC2Q_b, dtype=float)[vfatN]
+    if "isCurrentPulse" in scurveData.dtype.names: #Potentially v3 electronics
+        isCurrentPulse = scurveData['isCurrentPulse'].astype(bool)
+        if np.any(isCurrentPulse):
+            calSFs, calSFIdx = np.unique(scurveData['calSF'][isCurrentPulse], return_inverse=True)
+            calSF = np.array([ dict_calSF[calSFVal] for calSFVal in calSFs ])[calSFIdx]
+            #Q = CAL_DUR * CAL_DAC * 10nA * CAL_FS
+            charge[isCurrentPulse] = (1./ 40079000) * scurveData['vcal'][isCurrentPulse] * (10 * 1e-9) * calSF * 1e15
+            pass
+        pass
+
+    # Determine the binY that corresponds to this charge value, one below the
+    # bin containing it as historically done with first_index_gt()
+    binY = np.zeros(len(charge), dtype=int)
+    for vfat in vfatHistos:
+        isThisVFAT = (vfatN == vfat)
+        yAxis = vfatHistos[vfat].GetYaxis()
+        binEdgesY = np.array([ yAxis.GetBinLowEdge(bin) for bin in range(1,yAxis.GetNbins()+2) ]) #Include overflow
+        binY[isThisVFAT] = np.searchsorted(binEdgesY, charge[isThisVFAT], side='right')-1
         pass
 
-    # check current pulse?
-    checkCurrentPulse = False
-    listOfBranchNames = [branch.GetName() for branch in scurveTree.GetListOfBranches() ]
-    if "isCurrentPulse" in listOfBranchNames:
-        checkCurrentPulse = True
+    # Determine binX
+    isPanPin2 = np.zeros(len(charge), dtype=bool)
+    if lutType == mappingNames[1] and splitPanPin:
+        isPanPin2 = (stripPinOrChan >= maxChans/2)
+        binX = np.where(isPanPin2, maxChans-stripPinOrChan, maxChans/2-stripPinOrChan).astype(int)
+    else:
+        binX = stripPinOrChan+1
         pass
 
-    # Fill Histograms
-    for event in scurveTree:
+    summaryBins = np.zeros(len(charge), dtype=[('vfatN', 'i4'), ('vfatCH', 'i4'), ('binX', 'i4'), ('binY', 'i4'), ('isPanPin2', '?'), ('Nhits', 'f8')])
+    summaryBins['vfatN'] = vfatN
+    summaryBins['vfatCH'] = vfatCH
+    summaryBins['binX'] = binX
+    summaryBins['binY'] = binY
+    summaryBins['isPanPin2'] = isPanPin2
+    summaryBins['Nhits'] = scurveData['Nhits']
+    return summaryBins
+
+def getScurveShardVFATLists(scurveFilename, nShards):
+    """
+    Splits the VFAT positions of the detector of the input scurve TFile scurveFilename in at most nShards disjoint lists of consecutive positions, e.g. to analyze them in parallel with anaUltraScurve.  Returns a list of lists of VFAT positions.
+
+    scurveFilename - Name of a TFile containing the scurveTree TTree
+    nShards        - Number of lists
+    """
+
+    import numpy as np
+    import ROOT as r
+    import root_numpy as rp
+
+    inFile = r.TFile(scurveFilename,'read')
+    if not inFile.IsOpen() or inFile.IsZombie():
+        inFile.Close()
+        raise IOError("Unable to open input file {0} check to make sure you have read permissions".format(scurveFilename))
+    scurveTree = inFile.scurveTree
+    listOfBranches = [ branch.GetName() for branch in scurveTree.GetListOfBranches() ]
+
+    from gempython.gemplotting.mapping.chamberInfo import gemTypeMapping
+    if 'gemType' not in listOfBranches:
+        gemType = "ge11"
+    else:
+        gemType = gemTypeMapping[rp.tree2array(scurveTree, branches=['gemType'], stop=1)['gemType'][0]]
+    inFile.Close()
+
+    from gempython.tools.hw_constants import vfatsPerGemVariant
+    return [ [ int(vfat) for vfat in vfats ] for vfats in np.array_split(np.arange(vfatsPerGemVariant[gemType]), nShards) if len(vfats) > 0 ]
+
+def makeScurveDetSummaryPlots(allThresh, allEffPed, allENC, vfatChanLUT, mapName, nPulses, gemType="ge11", vfatList=None):
+    """
+    Makes the distributions of the scurve fit results of the entire detector, i.e. the content of the Summary directory of the anaUltraScurve output TFile.  Returns a dictionary whose keys are the names of the variables used by anaUltraScurve, e.g. 'hDetThresh_All' or 'threshSummaryPlotsByiEta', and whose values are the plots.  The key 'threshRange' gives the range of the scurve mean positions used for the box plots.
+
+    allThresh   - numpy array of the scurve mean position of each channel, index goes as [vfat*128+chan], 0 for channels that were not analyzed
+    allEffPed   - numpy array of the effective pedestal of each channel, same indexing, -1 for channels that were not analyzed
+    allENC      - numpy array of the scurve width of each channel, same indexing, 0 for channels that were not analyzed
+    vfatChanLUT - Nested dictionary specifying the VFAT channel to strip and PanPin mapping; see getMapping() of anautilities for details on expected format
+    mapName     - Type of the 2D maps of the detector, see mappingNames of anaInfo for possible options
+    nPulses     - Number of pulses of the scurve scan
+    gemType     - String specifying gemType, see keys of vfatsPerGemVariant of gempython.tools.hw_constants
+    vfatList    - List of VFAT positions to consider in the analysis, if None analyzes all (default)
+    """
+
+    import numpy as np
+    import ROOT as r
+    from gempython.gemplotting.mapping.chamberInfo import chamber_iEta2VFATPos, chamber_maxiEtaiPhiPair, chamber_vfatPos2iEta
+    from gempython.gemplotting.mapping.chamberInfo import CHANNELS_PER_VFAT as maxChans
+    from gempython.tools.hw_constants import vfatsPerGemVariant
+    nVFATS = vfatsPerGemVariant[gemType]
+    maxiEta = chamber_maxiEtaiPhiPair[gemType][0]
+    maxiPhi = chamber_maxiEtaiPhiPair[gemType][1]
+
+    encSummaryPlotsByiEta = {}
+    effPedSummaryPlotsByiEta = {}
+    threshSummaryPlotsByiEta = {}
+    h2DetThresh_All = r.TH2F("ScurveMean_All","ScurveMean_All",nVFATS,-0.5,nVFATS-0.5,
+                             601,-0.05,60.05)
+    h2DetENC_All = r.TH2F("ScurveSigma_All","ScurveSigma_All",nVFATS,-0.5,nVFATS-0.5,
+                          51,-0.05,5.05)
+    h2DetEffPed_All = r.TH2F("ScurveEffPed_All","Effective Pedestal All",nVFATS,-0.5,nVFATS-0.5,
+                             nPulses+1, -0.5, nPulses+0.5)
+
+    allENCByiEta    = dict( (ieta,np.zeros(maxiPhi*maxChans)) for ieta in range(1,maxiEta+1) )
+    allEffPedByiEta = dict( (ieta,(-1.*np.ones(maxiPhi*maxChans))) for ieta in range(1,maxiEta+1) )
+    allThreshByiEta = dict( (ieta,np.zeros(maxiPhi*maxChans)) for ieta in range(1,maxiEta+1) )
+
+    for vfat in range(nVFATS):
         # If provided, skip all VFATs but the requested one
-        if ((vfatList is not None) and (event.vfatN not in vfatList)):
+        if ((vfatList is not None) and (vfat not in vfatList)):
             continue
 
-        # Skip entry if channel is masked
-        if chanMasks is not None:
-            if chanMasks[event.vfatN][event.vfatCH]:
+        # Determine ieta
+        ieta = chamber_vfatPos2iEta[gemType][vfat]
+        iphi = chamber_iEta2VFATPos[gemType][ieta][vfat]
+        for chan in range (0, maxChans):
+            allENCByiEta[ieta][(iphi-1)*chan + chan] = allENC[vfat*maxChans + chan]
+            allEffPedByiEta[ieta][(iphi-1)*chan + chan] = allEffPed[vfat*maxChans + chan]
+            allThreshByiEta[ieta][(iphi-1)*chan + chan] = allThresh[vfat*maxChans + chan]
+            pass
+
+        # Same selection as the distributions of each VFAT
+        if np.std(allThresh[(vfat*maxChans):((vfat+1)*maxChans)]) != 0: # Don't fill if we still at initial values
+            for thresh in allThresh[(vfat*maxChans):((vfat+1)*maxChans)]:
+                if thresh == 0: # Skip the case where it still equals the inital value
+                    continue
+                h2DetThresh_All.Fill(vfat,thresh)
+                pass
+            pass
+        for effPed in allEffPed[(vfat*maxChans):((vfat+1)*maxChans)]:
+            if effPed < 0: # Skip the case where it still equals the inital value
                 continue
+            h2DetEffPed_All.Fill(vfat,effPed)
+            pass
+        if np.std(allENC[(vfat*maxChans):((vfat+1)*maxChans)]) != 0: # Don't fill if we are still at initial values
+            for enc in allENC[(vfat*maxChans):((vfat+1)*maxChans)]:
+                if enc == 0: # Skip the case where it still equals the inital value
+                    continue
+                h2DetENC_All.Fill(vfat,enc)
+                pass
+            pass
+        pass
+
+    # Make a Thresh Summary Dist For the entire Detector
+    detThresh_Mean = np.mean(allThresh[allThresh != 0]) #Don't consider intial values
+    detThresh_Std = np.std(allThresh[allThresh != 0]) #Don't consider intial values
+    hDetThresh_All = r.TH1F("hScurveMeanDist_All","All VFATs;S-Curve Mean #left(fC#right);N",
+                        100, detThresh_Mean - 5. * detThresh_Std, detThresh_Mean + 5. * detThresh_Std )
+    for thresh in allThresh[allThresh != 0]:
+        hDetThresh_All.Fill(thresh)
+        pass
+    hDetThresh_All.GetXaxis().SetTitle("scurve mean pos #left(fC#right)")
+    hDetThresh_All.GetYaxis().SetTitle("Entries / {0} fC".format(detThresh_Std/10.))
+    gDetThresh_All = r.TGraphErrors(hDetThresh_All)
+    gDetThresh_All.SetName("gScurveMeanDist_All")
+    gDetThresh_All.GetXaxis().SetTitle("scurve mean pos #left(fC#right)")
+    gDetThresh_All.GetYaxis().SetTitle("Entries / {0} fC".format(detThresh_Std/10.))
+
+    # Make a thresh map dist for the entire detector
+    from gempython.gemplotting.utils.anautilities import get2DMapOfDetector
+    hDetMapThresh = get2DMapOfDetector(vfatChanLUT, allThresh, mapName, "threshold", gemType=gemType)
+    hDetMapThresh.SetZTitle("threshold #left(fC#right)")
+
+    # Make a EffPed Summary Dist For the entire Detector
+    hDetEffPed_All = r.TH1F("hScurveEffPedDist_All","All VFATs;S-Curve Effective Pedestal #left(N#right);N",
+                            nPulses+1, -0.5, nPulses+0.5)
+    for effPed in allEffPed[allEffPed > -1]:
+        hDetEffPed_All.Fill(effPed)
+        pass
+    hDetEffPed_All.GetXaxis().SetTitle("scurve effective pedestal #left(N#right)")
+    hDetEffPed_All.GetYaxis().SetTitle("Entries")
+    hDetEffPed_All.SetMarkerStyle(21)
+    hDetEffPed_All.SetMarkerColor(r.kRed)
+    hDetEffPed_All.SetLineColor(r.kRed)
+    gDetEffPed_All = r.TGraphErrors(hDetEffPed_All)
+    gDetEffPed_All.SetName("gScurveEffPedDist_All")
+    gDetEffPed_All.GetXaxis().SetTitle("scurve effective pedestal #left(N#right)")
+    gDetEffPed_All.GetYaxis().SetTitle("Entries")
+
+    h2DetEffPed_All.GetXaxis().SetTitle("VFAT Position")
+    h2DetEffPed_All.GetYaxis().SetTitle("Effective Pedestal")
+
+    # Make a EffPed map dist for the entire detector
+    hDetMapEffPed = get2DMapOfDetector(vfatChanLUT, allEffPed, mapName, "Effective Pedestal", gemType=gemType)
+    hDetMapEffPed.SetZTitle("Effective Pedestal")
+
+    # Make a ENC Summary Dist For the entire Detector
+    detENC_Mean = np.mean(allENC[allENC != 0]) #Don't consider intial values
+    detENC_Std = np.std(allENC[allENC != 0]) #Don't consider intial values
+    hDetENC_All = r.TH1F("hScurveSigmaDist_All","All VFATs;S-Curve Sigma #left(fC#right);N",
+                        100, detENC_Mean - 5. * detENC_Std, detENC_Mean + 5. * detENC_Std )
+    for enc in allENC[allENC != 0]:
+        hDetENC_All.Fill(enc)
+        pass
+    hDetENC_All.GetXaxis().SetTitle("scurve sigma #left(fC#right)")
+    hDetENC_All.GetYaxis().SetTitle("Entries / {0} fC".format(detENC_Std/10.))
+    gDetENC_All = r.TGraphErrors(hDetENC_All)
+    gDetENC_All.SetName("gScurveSigmaDist_All")
+    gDetENC_All.GetXaxis().SetTitle("scurve sigma #left(fC#right)")
+    gDetENC_All.GetYaxis().SetTitle("Entries / {0} fC".format(detENC_Std/10.))
+
+    # Make a ENC map dist for the entire detector
+    hDetMapENC = get2DMapOfDetector(vfatChanLUT, allENC, mapName, "noise", gemType=gemType)
+    hDetMapENC.SetZTitle("noise #left(fC#right)")
+    #hDetMapENC.GetZaxis().SetRangeUser(0.5,0.30)
+
+    # Make the plots by iEta
+    for ieta in range(1,maxiEta+1):
+        # S-curve mean position (threshold)
+        ietaThresh_Mean = np.mean(allThreshByiEta[ieta][allThreshByiEta[ieta] != 0])
+        ietaThresh_Std = np.std(allThreshByiEta[ieta][allThreshByiEta[ieta] != 0])
+
+        hThresh_iEta = r.TH1F(
+                "hScurveMeanDist_ieta{0}".format(ieta),
+                "i#eta={0};S-Curve Mean #left(fC#right);N".format(ieta),
+                80, 
+                ietaThresh_Mean - 5. * ietaThresh_Std, 
+                ietaThresh_Mean + 5. * ietaThresh_Std )
+
+        for thresh in allThreshByiEta[ieta][allThreshByiEta[ieta] != 0]:
+            hThresh_iEta.Fill(thresh)
+            pass
+        gThresh_iEta = r.TGraphErrors(hThresh_iEta)
+        gThresh_iEta.SetName("gScurveMeanDist_ieta{0}".format(ieta))
+        gThresh_iEta.GetXaxis().SetTitle("scurve mean pos #left(fC#right)")
+        gThresh_iEta.GetYaxis().SetTitle("Entries / {0} fC".format(ietaThresh_Std/8.))
+        threshSummaryPlotsByiEta[ieta] = gThresh_iEta
+
+        # S-curve effective pedestal
+        hEffPed_iEta = r.TH1F(
+                "hScurveEffPedDist_ieta{0}".format(ieta),
+                "i#eta={0};S-Curve Effective Pedestal #left(N#right);N".format(ieta),
+                 nPulses+1, -0.5, nPulses+0.5)
+
+        for effPed in allEffPedByiEta[ieta][allEffPedByiEta[ieta] > -1]:
+            hEffPed_iEta.Fill(effPed)
+            pass
+        hEffPed_iEta.SetMarkerStyle(21)
+        hEffPed_iEta.SetMarkerColor(r.kRed)
+        hEffPed_iEta.SetLineColor(r.kRed)
+        effPedSummaryPlotsByiEta[ieta] = hEffPed_iEta
+
+        # S-curve sigma (enc)
+        ietaENC_Mean = np.mean(allENCByiEta[ieta][allENCByiEta[ieta] != 0])
+        ietaENC_Std = np.std(allENCByiEta[ieta][allENCByiEta[ieta] != 0])
+
+        hENC_iEta = r.TH1F(
+                "hScurveSigmaDist_ieta{0}".format(ieta),
+                "i#eta={0};S-Curve Sigma #left(fC#right);N".format(ieta),
+                80, 
+                ietaENC_Mean - 5. * ietaENC_Std, 
+                ietaENC_Mean + 5. * ietaENC_Std )
+
+        for enc in allENCByiEta[ieta][allENCByiEta[ieta] != 0]:
+            hENC_iEta.Fill(enc)
+            pass
+        gENC_iEta = r.TGraphErrors(hENC_iEta)
+        gENC_iEta.SetName("gScurveSigmaDist_ieta{0}".format(ieta))
+        gENC_iEta.GetXaxis().SetTitle("scurve sigma pos #left(fC#right)")
+        gENC_iEta.GetYaxis().SetTitle("Entries / {0} fC".format(ietaENC_Std/8.))
+        encSummaryPlotsByiEta[ieta] = gENC_iEta
+        pass
 
-        # Get the channel, strip, or Pan Pin
-        stripPinOrChan = vfatChanLUT[event.vfatN][lutType][event.vfatCH]
+    # Range of the box plot of the scurve mean positions
+    try:
+        minThreshRange = np.nanmin(allThresh[allThresh != 0])*0.9
+    except ValueError:
+        minThreshRange = 0
+        pass
+    try:
+        maxThreshRange = np.nanmax(allThresh[allThresh != 0])*1.1
+    except ValueError:
+        maxThreshRange = 80
+        pass
 
-        # Determine charge
-        charge = calDAC2Q_m[event.vfatN]*event.vcal+calDAC2Q_b[event.vfatN]
-        if checkCurrentPulse: #Potentially v3 electronics
-            if event.isCurrentPulse:
-                #Q = CAL_DUR * CAL_DAC * 10nA * CAL_FS
-                charge = (1./ 40079000) * event.vcal * (10 * 1e-9) * dict_calSF[event.calSF] * 1e15
-        
-        # Determine the binY that corresponds to this charge value
-        chargeBin = first_index_gt(listOfBinEdgesY[event.vfatN], charge)-1
-
-        # Fill Summary Histogram
-        from gempython.gemplotting.mapping.chamberInfo import CHANNELS_PER_VFAT as maxChans
-        if lutType is mappingNames[1] and vfatHistosPanPin2 is not None:
-            if (stripPinOrChan < maxChans/2):
-                vfatHistos[event.vfatN].SetBinContent(maxChans/2-stripPinOrChan,chargeBin,event.Nhits)
-                vfatHistos[event.vfatN].SetBinError(maxChans/2-stripPinOrChan+1,chargeBin,sqrt(event.Nhits))
-                pass
-            else:
-                vfatHistosPanPin2[event.vfatN].SetBinContent(maxChans-stripPinOrChan,chargeBin,event.Nhits)
-                vfatHistosPanPin2[event.vfatN].SetBinError(maxChans-stripPinOrChan,chargeBin,sqrt(event.Nhits))
+    return {
+            "hDetThresh_All":hDetThresh_All,
+            "hDetEffPed_All":hDetEffPed_All,
+            "hDetENC_All":hDetENC_All,
+            "gDetThresh_All":gDetThresh_All,
+            "gDetEffPed_All":gDetEffPed_All,
+            "gDetENC_All":gDetENC_All,
+            "h2DetThresh_All":h2DetThresh_All,
+            "h2DetEffPed_All":h2DetEffPed_All,
+            "h2DetENC_All":h2DetENC_All,
+            "hDetMapThresh":hDetMapThresh,
+            "hDetMapEffPed":hDetMapEffPed,
+            "hDetMapENC":hDetMapENC,
+            "threshSummaryPlotsByiEta":threshSummaryPlotsByiEta,
+            "effPedSummaryPlotsByiEta":effPedSummaryPlotsByiEta,
+            "encSummaryPlotsByiEta":encSummaryPlotsByiEta,
+            "threshRange":(minThreshRange,maxThreshRange)
+            }
+
+def mergeScurveShards(args, scurveFilename, shardDirs, outputDir):
+    """
+    Merges the outputs of anaUltraScurve calls on disjoint vfatLists of the same input scurve TFile scurveFilename, e.g. made by 'ana_scans.py scurve --shardByVFAT', into a single output in outputDir.  The scurveFitTree and the VFAT directories of the output TFiles, and the fitSummary.txt, chConfig.txt and fitStats.json files, are merged.  The Summary directory and the output images are made again from the merged scurveFitTree, so the shards should be analyzed with noPlots.
+    If this is called by a child process sys.stdout will be overwritten and be "outputDir/anaLog.log".  The args namespace is expected to have the following attributes.
+
+    channels - If true output plots are made vs. vfatCH
+    deferPlots - If true the output images are not written, the canvases are left in the RenderQueue store file of outputDir for the caller to render, see renderQueue.py
+    fitWorkers - Number of processes used to write the output images
+    noPlots - If true no output image is written, the output TFile is still produced
+    outfilename - Name of the output TFile of each shard, and of the merged output
+    PanPin - If true output plots are made vs. PanPin
+
+    Returns the same structured numpy array as anaUltraScurve, None if the scurves were not fit.
+
+    Other arguments are:
+
+    scurveFilename - Name of the input TFile analyzed by the shards
+    shardDirs - List of the output directories of the shards
+    outputDir - Directory where the merged output is stored
+    """
+
+    # Check attributes of input args
+    # If not present assign appropriate default arguments
+    if hasattr(args,'channels') is False:
+        args.channels = False
+    if hasattr(args,'deferPlots') is False:
+        args.deferPlots = False
+    if hasattr(args,'fitWorkers') is False:
+        args.fitWorkers = 1
+    if hasattr(args,'noPlots') is False:
+        args.noPlots = False
+    if hasattr(args, 'outfilename') is False:
+        args.outfilename = "SCurveFitData.root"
+    if hasattr(args,'PanPin') is False:
+        args.PanPin = False
+
+    # Redirect sys.stdout and sys.stderr if necessary 
+    from gempython.gemplotting.utils.multiprocUtils import redirectStdOutAndErr
+    redirectStdOutAndErr("mergeScurveShards",outputDir)
+
+    import json, os
+    import numpy as np
+    import ROOT as r
+    import root_numpy as rp
+    r.TH1.SetDefaultSumw2(False)
+    r.gROOT.SetBatch(True)
+    r.gStyle.SetOptStat(1111111)
+
+    # Get the detector type and the number of pulses from the input file
+    inFile = r.TFile(scurveFilename,'read')
+    if not inFile.IsOpen() or inFile.IsZombie():
+        inFile.Close()
+        raise IOError("Unable to open input file {0} check to make sure you have read permissions".format(scurveFilename))
+    scurveTree = inFile.scurveTree
+    listOfBranches = [ branch.GetName() for branch in scurveTree.GetListOfBranches() ]
+    scurveInfo = rp.tree2array(scurveTree, branches=[ branch for branch in ['gemType','Nev'] if branch in listOfBranches ], stop=1)
+    inFile.Close()
+
+    from gempython.gemplotting.mapping.chamberInfo import gemTypeMapping
+    if 'gemType' not in listOfBranches:
+        gemType = "ge11"
+    else:
+        gemType = gemTypeMapping[scurveInfo['gemType'][0]]
+    nPulses = scurveInfo['Nev'][0]
+    from gempython.tools.hw_constants import vfatsPerGemVariant
+    nVFATS = vfatsPerGemVariant[gemType]
+    from gempython.gemplotting.mapping.chamberInfo import CHANNELS_PER_VFAT as maxChans
+
+    # The outputs of the shards are kept open until the merged output is written
+    shardFiles = []
+    for shardDir in shardDirs:
+        shardFile = r.TFile("{0}/{1}".format(shardDir,args.outfilename),'read')
+        if not shardFile.IsOpen() or shardFile.IsZombie():
+            raise IOError("Unable to open {0}/{1} check to make sure the analysis of this shard succeeded".format(shardDir,args.outfilename))
+        shardFiles.append(shardFile)
+        pass
+
+    outF = r.TFile(outputDir+'/'+args.outfilename, 'recreate')
+    if not outF.IsOpen():
+        outF.Close()
+        raise IOError("Unable to open output file {1} check to make sure you have write permissions under {0}".format(outputDir,args.outfilename))
+    if outF.IsZombie():
+        outF.Close()
+        raise IOError("Output file {1} is a Zombie, check to make sure you have write permissions under {0}".format(outputDir,args.outfilename))
+
+    # Concatenate the scurveFitTree of the shards, the entries stay ordered by VFAT position
+    performFit = all([ shardFile.GetListOfKeys().Contains("scurveFitTree") for shardFile in shardFiles ])
+    if performFit:
+        listOfTrees = r.TList()
+        for shardFile in shardFiles:
+            listOfTrees.Add(shardFile.Get("scurveFitTree"))
+            pass
+        outF.cd()
+        scurveFitTree = r.TTree.MergeTrees(listOfTrees)
+        scurveFitTree.Write()
+        pass
+
+    # The VFAT directories of the shards are disjoint, copy their content.  Only
+    # the plots used by the summary images are kept in memory, the other objects,
+    # e.g. the canvases of all scurves of a VFAT, are deleted once copied
+    from gempython.utils.nesteddict import nesteddict as ndict
+    vfatPlotNames = [
+            ("vSummaryPlots","vSummaryPlots{0}"),
+            ("vSummaryPlotsPanPin2","vSummaryPlotsPanPin2_{0}"),
+            ("vSummaryPlotsNoMaskedChan","vSummaryPlotsNoMaskedChan{0}"),
+            ("vSummaryPlotsNoMaskedChanPanPin2","vSummaryPlotsNoMaskedChanPanPin2_{0}"),
+            ("fitSummaryPlots","gFitSummary_VFAT{0}"),
+            ("threshSummaryPlots","gScurveMeanDist_vfat{0}"),
+            ("effPedSummaryPlots","scurveEffPed_vfat{0}"),
+            ("encSummaryPlots","gScurveSigmaDist_vfat{0}")
+            ]
+    vfatPlots = dict( (plotsName, {}) for plotsName, objName in vfatPlotNames )
+    for shardFile in shardFiles:
+        for key in shardFile.GetListOfKeys():
+            if not (key.IsFolder() and key.GetName().startswith("VFAT")):
+                continue
+            vfat = int(key.GetName()[len("VFAT"):])
+            plotsNameOfObj = dict( (objName.format(vfat), plotsName) for plotsName, objName in vfatPlotNames )
+            shardDirVFAT = key.ReadObj()
+            dirVFAT = outF.mkdir(key.GetName())
+            for objKey in shardDirVFAT.GetListOfKeys():
+                obj = objKey.ReadObj()
+                dirVFAT.WriteTObject(obj, objKey.GetName())
+                if objKey.GetName() in plotsNameOfObj:
+                    vfatPlots[plotsNameOfObj[objKey.GetName()]][vfat] = obj
+                else:
+                    r.SetOwnership(obj, True) # deleted with its last python reference
                 pass
             pass
+        pass
+
+    # Remake the distributions of the entire detector from the merged scurveFitTree
+    detSummary = None
+    if performFit:
+        from gempython.gemplotting.utils.anaInfo import mappingNames
+        if ((not args.channels) and (not args.PanPin)):
+            stripChanOrPinType = mappingNames[0]
+        elif args.channels:
+            stripChanOrPinType = mappingNames[2]
         else:
-            vfatHistos[event.vfatN].SetBinContent(stripPinOrChan+1,chargeBin,event.Nhits)
+            stripChanOrPinType = mappingNames[1]
+
+        fitData = rp.tree2array(scurveFitTree, branches=['vfatN','vfatCH','ROBstr','panPin','threshold','noise','ped_eff','fitAttempts','fitFromCache','fitNormChi2'])
+        chanIdx = fitData['vfatN']*maxChans + fitData['vfatCH']
+        allENC = np.zeros(nVFATS*maxChans)
+        allENC[chanIdx] = fitData['noise']
+        allThresh = np.zeros(nVFATS*maxChans)
+        allThresh[chanIdx] = fitData['threshold']
+        # ped_eff is stored as a fraction of the pulses; for the channels that
+        # were not fit anaUltraScurve evaluates the effective pedestal to NaN
+        allEffPed = -1.*np.ones(nVFATS*maxChans)
+        allEffPed[chanIdx] = np.where(fitData['noise'] == 0, np.nan, fitData['ped_eff']*nPulses)
+
+        vfatChanLUT = ndict()
+        for vfat in range(nVFATS):
+            isThisVFAT = (fitData['vfatN'] == vfat)
+            for mapName, bName in zip(mappingNames, ['ROBstr','panPin','vfatCH']):
+                lut = np.zeros(maxChans, dtype=int)
+                lut[fitData['vfatCH'][isThisVFAT]] = fitData[bName][isThisVFAT]
+                vfatChanLUT[vfat][mapName] = lut.tolist()
+                pass
             pass
 
-    return
+        detSummary = makeScurveDetSummaryPlots(allThresh, allEffPed, allENC, vfatChanLUT, stripChanOrPinType, nPulses, gemType=gemType, vfatList=np.unique(fitData['vfatN']).tolist())
+        pass
+
+    # The box plots change the style of the distributions, queue them before writing
+    from gempython.gemplotting.utils.renderQueue import RenderQueue
+    renderQueue = RenderQueue(outputDir, enabled=(not args.noPlots))
+    queueScurveImages(renderQueue, outputDir, vfatPlots, detSummary, nPulses, PanPin=args.PanPin, gemType=gemType)
+    array_fitData = None
+    if performFit:
+        writeScurveDetSummaryPlots(outF, detSummary)
+        list_bNames = ['mask','maskReason','noise','pedestal','ped_eff','threshold','vfatCH','vfatID','vfatN']
+        array_fitData = rp.tree2array(scurveFitTree, branches=list_bNames)
+        pass
+    outF.Close()
+    for shardFile in shardFiles:
+        shardFile.Close()
+        pass
+
+    # Concatenate the columnar sidecars of the shards, see readTreeSidecar()
+    if performFit:
+        from gempython.gemplotting.utils.anautilities import readTreeSidecar, writeTreeSidecar
+        shardSidecars = [ readTreeSidecar("{0}/{1}".format(shardDir,args.outfilename), 'scurveFitTree') for shardDir in shardDirs ]
+        if all([ shardSidecar is not None for shardSidecar in shardSidecars ]):
+            writeTreeSidecar(np.concatenate(shardSidecars), outputDir+'/'+args.outfilename, 'scurveFitTree')
+        pass
+
+    # Concatenate the text files, keeping a single header line
+    for textFilename in ["fitSummary.txt", "chConfig.txt"]:
+        shardTextFilenames = [ "{0}/{1}".format(shardDir,textFilename) for shardDir in shardDirs ]
+        if not all([ os.path.isfile(shardTextFilename) for shardTextFilename in shardTextFilenames ]):
+            continue
+        with open("{0}/{1}".format(outputDir,textFilename),'w') as textFile:
+            for idx,shardTextFilename in enumerate(shardTextFilenames):
+                with open(shardTextFilename,'r') as shardTextFile:
+                    lines = shardTextFile.readlines()
+                textFile.writelines(lines if idx == 0 else lines[1:])
+                pass
+            pass
+        pass
+
+    # Combine the fit statistics, see ScanDataFitter.getFitStatsSummary()
+    shardStatsFilenames = [ "{0}/fitStats.json".format(shardDir) for shardDir in shardDirs ]
+    if performFit and all([ os.path.isfile(shardStatsFilename) for shardStatsFilename in shardStatsFilenames ]):
+        shardStats = []
+        for shardStatsFilename in shardStatsFilenames:
+            with open(shardStatsFilename,'r') as shardStatsFile:
+                shardStats.append(json.load(shardStatsFile))
+            pass
+        fitStatsSummary = dict(shardStats[0])
+        for statName in ["nChannels","nFromCache","attempts","nInvalid","nEmpty","fitTime"]:
+            fitStatsSummary[statName] = sum([ stats[statName] for stats in shardStats ])
+        fitStatsSummary["maxAttempts"] = max([ stats["maxAttempts"] for stats in shardStats ])
+        fitStatsSummary["vfats"] = sorted([ vfatStats for stats in shardStats for vfatStats in stats["vfats"] ], key=lambda vfatStats: vfatStats["vfatN"])
+        fitStatsSummary["slowestChannels"] = sorted([ chanStats for stats in shardStats for chanStats in stats["slowestChannels"] ], key=lambda chanStats: chanStats["fitTime"], reverse=True)[:10]
+
+        # Medians can not be combined, use the merged scurveFitTree
+        normChi2 = fitData['fitNormChi2'][(fitData['fitAttempts'] > 0) | (fitData['fitFromCache'] > 0)]
+        normChi2 = normChi2[np.isfinite(normChi2)]
+        fitStatsSummary["medianNormChi2"] = float(np.median(normChi2)) if len(normChi2) > 0 else None
+        with open(outputDir+'/fitStats.json','w') as fitStatsFile:
+            json.dump(fitStatsSummary, fitStatsFile, indent=2, sort_keys=True)
+        pass
+
+    # Write the output images, unless the caller renders them after all its analyses
+    if args.deferPlots:
+        renderQueue.close()
+    else:
+        renderQueue.render(nWorkers=args.fitWorkers)
+
+    return array_fitData
 
 def plotAllSCurvesOnCanvas(vfatHistos, vfatHistosPanPin2=None, obsName="scurves"):
     """
@@ -1155,3 +1900,282 @@ def plotAllSCurvesOnCanvas(vfatHistos, vfatHistosPanPin2=None, obsName="scurves"
             canv_dict[vfat].Update()
 
     return canv_dict
+
+def queueScurveImages(renderQueue, outputDir, vfatPlots, detSummary=None, nEvts=None, PanPin=False, gemType="ge11"):
+    """
+    Adds the summary images of the anaUltraScurve output to renderQueue.
+
+    renderQueue - RenderQueue the canvases are given to, see renderQueue.py
+    outputDir   - Directory where the images are written
+    vfatPlots   - Dictionary of the plots of each VFAT, keys are the names of the variables used by anaUltraScurve, e.g. 'vSummaryPlots' or 'fitSummaryPlots', values are dictionaries whose keys are VFAT positions.  Only the 'vSummaryPlots' and 'vSummaryPlotsPanPin2' keys are expected if detSummary is None
+    detSummary  - Dictionary of the distributions of the entire detector returned by makeScurveDetSummaryPlots(), None if the scurves were not fit
+    nEvts       - Number of pulses of the scurve scan, used for the range of the effective pedestal box plot
+    PanPin      - If true the plots of each VFAT are split in two halves of the panasonic connector
+    gemType     - String specifying gemType, see keys of vfatsPerGemVariant of gempython.tools.hw_constants
+    """
+
+    import ROOT as r
+    from gempython.gemplotting.utils.anautilities import getSummaryCanvas, getSummaryCanvasByiEta
+    if PanPin:
+        getSummaryCanvas(vfatPlots["vSummaryPlots"], vfatPlots["vSummaryPlotsPanPin2"], '{0}/Summary.png'.format(outputDir), gemType=gemType, write2Disk=True, renderQueue=renderQueue) 
+    else: 
+        getSummaryCanvas(vfatPlots["vSummaryPlots"], None, '{0}/Summary.png'.format(outputDir), gemType=gemType, write2Disk=True, renderQueue=renderQueue)
+
+    if detSummary is None:
+        return
+
+    if PanPin:
+        getSummaryCanvas(vfatPlots["vSummaryPlotsNoMaskedChan"], vfatPlots["vSummaryPlotsNoMaskedChanPanPin2"], '{0}/PrunedSummary.png'.format(outputDir), gemType=gemType, write2Disk=True, renderQueue=renderQueue)
+    else:
+        getSummaryCanvas(vfatPlots["vSummaryPlotsNoMaskedChan"], None, '{0}/PrunedSummary.png'.format(outputDir), gemType=gemType, write2Disk=True, renderQueue=renderQueue)
+    getSummaryCanvas(vfatPlots["fitSummaryPlots"], None, '{0}/fitSummary.png'.format(outputDir), None, drawOpt="APE1", gemType=gemType, write2Disk=True, renderQueue=renderQueue)
+    getSummaryCanvas(vfatPlots["threshSummaryPlots"], None, '{0}/ScurveMeanSummary.png'.format(outputDir), None, drawOpt="AP", gemType=gemType, write2Disk=True, renderQueue=renderQueue)
+    getSummaryCanvas(vfatPlots["effPedSummaryPlots"], None, '{0}/ScurveEffPedSummary.png'.format(outputDir), None, drawOpt="E1", gemType=gemType, write2Disk=True, renderQueue=renderQueue)
+    getSummaryCanvas(vfatPlots["encSummaryPlots"], None, '{0}/ScurveSigmaSummary.png'.format(outputDir), None, drawOpt="AP", gemType=gemType, write2Disk=True, renderQueue=renderQueue)
+    
+    #BoxPlot
+    minThreshRange, maxThreshRange = detSummary["threshRange"]
+    h2DetThresh_All = detSummary["h2DetThresh_All"]
+    canvasBoxPlot_Thresh = r.TCanvas("h2Thresh","h2Thresh",0,0,1200,1000)
+    h2DetThresh_All.SetStats(0)
+    h2DetThresh_All.GetXaxis().SetTitle("VFAT position")
+    h2DetThresh_All.GetYaxis().SetRangeUser(minThreshRange,maxThreshRange)
+    h2DetThresh_All.GetYaxis().SetTitle("Threshold #left(fC#right)")
+    h2DetThresh_All.SetFillColor(400)
+    h2DetThresh_All.Draw("candle1")
+    canvasBoxPlot_Thresh.Update()
+    renderQueue.addCanvas(canvasBoxPlot_Thresh, "{0}/h2ScurveMeanDist_All.png".format(outputDir))
+    canvasBoxPlot_Thresh.Close()
+
+    h2DetEffPed_All = detSummary["h2DetEffPed_All"]
+    canvasBoxPlot_EffPed = r.TCanvas("h2EffPed","h2EffPed",0,0,1200,1000)
+    h2DetEffPed_All.SetStats(0)
+    h2DetEffPed_All.GetXaxis().SetTitle("VFAT position")
+    h2DetEffPed_All.GetYaxis().SetRangeUser(0, nEvts*0.1)
+    h2DetEffPed_All.GetYaxis().SetTitle("Effective Pedestal #left(A.U.#right)")
+    h2DetEffPed_All.SetFillColor(400)
+    h2DetEffPed_All.Draw("candle1")
+    canvasBoxPlot_EffPed.Update()
+    renderQueue.addCanvas(canvasBoxPlot_EffPed, "{0}/h2ScurveEffPedDist_All.png".format(outputDir))
+    canvasBoxPlot_EffPed.Close()
+    
+    h2DetENC_All = detSummary["h2DetENC_All"]
+    canvasBoxPlot_ENC = r.TCanvas("h2ENC","h2ENC",0,0,1200,1000)
+    h2DetENC_All.SetStats(0)
+    h2DetENC_All.GetXaxis().SetTitle("VFAT position")
+    h2DetENC_All.GetYaxis().SetTitle("Noise #left(fC#right)")
+    h2DetENC_All.SetFillColor(400)
+    h2DetENC_All.Draw("candle1")
+    canvasBoxPlot_ENC.Update()
+    renderQueue.addCanvas(canvasBoxPlot_ENC, "{0}/h2ScurveSigmaDist_All.png".format(outputDir))
+    canvasBoxPlot_ENC.Close()
+
+    getSummaryCanvasByiEta(detSummary["threshSummaryPlotsByiEta"], name='{0}/ScurveMeanSummaryByiEta.png'.format(outputDir), drawOpt="AP", gemType=gemType, write2Disk=True, renderQueue=renderQueue)
+    getSummaryCanvasByiEta(detSummary["effPedSummaryPlotsByiEta"], name='{0}/ScurveEffPedSummaryByiEta.png'.format(outputDir), drawOpt="E1", gemType=gemType, write2Disk=True, renderQueue=renderQueue)
+    getSummaryCanvasByiEta(detSummary["encSummaryPlotsByiEta"], name='{0}/ScurveSigmaSummaryByiEta.png'.format(outputDir), drawOpt="AP", gemType=gemType, write2Disk=True, renderQueue=renderQueue)
+    return
+
+def readScurveInput(scurveFilename, vfatList=None, readData=True):
+    """
+    Reads the input of anaUltraScurve from the scurveTree TTree of the input scurve TFile scurveFilename.  The branches identifying the chips are read for all entries, the other branches only for the entries of the VFATs in vfatList.  Branches holding objects, e.g. detName, are not read in scurveData.
+
+    scurveFilename - Name of a TFile containing the scurveTree TTree
+    vfatList - List of VFAT positions whose entries are read, if None all entries are read
+    readData - If false only the branches identifying the chips are read and scurveData is None, e.g. to read the other branches by chunks of entries
+
+    Returns a dictionary with the keys:
+
+        chipIDs - dictionary of the chip ID of each VFAT position, of all VFATs even if vfatList is not None
+        detName - detector name of the first entry, None if there is no detName branch
+        gemType - detector type, e.g. "ge11"
+        listOfBranches - names of the branches of the scurveTree
+        nevts - number of pulses of the scan
+        scurveBranches - names of the branches read in scurveData
+        scurveData - structured numpy array holding the scurveTree entries of the VFATs in vfatList
+    """
+
+    import numpy as np
+    import ROOT as r
+    import root_numpy as rp
+
+    inFile = r.TFile(scurveFilename,'read')
+    if not inFile.IsOpen():
+        inFile.Close()
+        raise IOError("Unable to open input file {0} check to make sure you have read permissions".format(scurveFilename))
+    if inFile.IsZombie():
+        inFile.Close()
+        raise IOError("Input file {0} is a Zombie, check to make sure you have write permissions and file has expected size".format(scurveFilename))
+    scurveTree = inFile.scurveTree
+
+    listOfBranches = [ branch.GetName() for branch in scurveTree.GetListOfBranches() ]
+    scurveBranches = [ branch for branch in [
+        'calSF', 'gemType', 'isCurrentPulse', 'Nev', 'Nhits', 'trimDAC', 'trimPolarity', 'trimRange',
+        'vcal', 'vfatCH', 'vfatID', 'vfatN', 'vth1', 'vth2', 'vthr' ] if branch in listOfBranches ]
+    scurveData = None
+    if readData and vfatList is None:
+        scurveData = rp.tree2array(scurveTree, branches=scurveBranches)
+        chipData = scurveData
+    else:
+        if readData:
+            # Only the entries of the requested VFATs are kept in memory, the chip
+            # ID of all VFATs is still needed for the calibration
+            scurveData = rp.tree2array(scurveTree, branches=scurveBranches,
+                    selection=" || ".join([ "vfatN=={0}".format(vfat) for vfat in vfatList ]))
+            pass
+        chipData = rp.tree2array(scurveTree, branches=[ branch for branch in ['gemType','Nev','vfatID','vfatN'] if branch in listOfBranches ])
+        pass
+
+    detName = None
+    if 'detName' in listOfBranches:
+        detName = rp.tree2array(scurveTree, branches = [ 'detName' ], stop = 1 )[0][0][0]
+    inFile.Close()
+
+    from gempython.gemplotting.mapping.chamberInfo import gemTypeMapping
+    if 'gemType' not in listOfBranches:
+        gemType = "ge11"
+    else:
+        gemType = gemTypeMapping[chipData['gemType'][0]]
+
+    if 'vfatID' in listOfBranches:
+        # One int64 key per (vfatN, vfatID) pair, np.unique(..., axis=0) needs numpy 1.13
+        array_chipKey = np.unique((chipData['vfatN'].astype(np.int64) << 32) | (chipData['vfatID'].astype(np.int64) & 0xffffffff))
+        dict_chipID = {}
+        for chipKey in array_chipKey:
+            dict_chipID[int(chipKey >> 32)]=int(chipKey & 0xffffffff)
+    else:
+        from gempython.tools.hw_constants import vfatsPerGemVariant
+        dict_chipID = { vfat:0 for vfat in range(vfatsPerGemVariant[gemType]) }
+
+    return {
+            "chipIDs":dict_chipID,
+            "detName":detName,
+            "gemType":gemType,
+            "listOfBranches":listOfBranches,
+            "nevts":np.asscalar(np.unique(chipData['Nev'])[0]),
+            "scurveBranches":scurveBranches,
+            "scurveData":scurveData
+            }
+
+def splitScurveFileByLink(scurveFilename, outputDir=None):
+    """
+    Splits the input scurve TFile scurveFilename, whose scurveTree holds the data of several links, e.g. taken on a full AMC, in one TFile per (shelf,slot,link) so that each link can be analyzed by anaUltraScurve on its own.  The (shelf,slot,link) of each entry are read first; if there are several links all other branches are read once and the entries of each link are written to the scurveTree of "outputDir/name_shelfX_slotY_linkZ.root", where name is the name of scurveFilename without its directory and extension.  The directory of scurveFilename is only read.  Files of a link in outputDir which are newer than scurveFilename are kept as they are, e.g. when the output is analyzed again with 'ana_scans.py scurve --remaskOnly'.  Branches holding other objects than the detName string vector are not copied.
+
+    Returns a dictionary whose keys are (shelf,slot,link) tuples and whose values are tuples (filename,detName) of the TFile of each link, detName is None if the input has no detName branch.  The dictionary is empty if the input holds the data of a single link, or has no shelf, slot and link branches.
+
+    scurveFilename - Name of a TFile containing the scurveTree TTree
+    outputDir - Directory where the file of each link is written, e.g. the analysis output directory of scurveFilename.  If None this will be default to $ELOG_PATH
+    """
+
+    import os
+    import numpy as np
+    import ROOT as r
+    import root_numpy as rp
+    from gempython.utils.gemlogger import printYellow
+
+    inFile = r.TFile(scurveFilename,'read')
+    if not inFile.IsOpen() or inFile.IsZombie():
+        inFile.Close()
+        raise IOError("Unable to open input file {0} check to make sure you have read permissions".format(scurveFilename))
+    scurveTree = inFile.scurveTree
+    listOfBranches = [ branch.GetName() for branch in scurveTree.GetListOfBranches() ]
+    geoBranches = ['shelf','slot','link']
+    if not all([ branch in listOfBranches for branch in geoBranches ]):
+        inFile.Close()
+        return {}
+    geoData = rp.tree2array(scurveTree, branches=geoBranches)
+    crateMap, firstEntry = np.unique(geoData, return_index=True)
+    if len(crateMap) < 2:
+        inFile.Close()
+        return {}
+
+    if outputDir is None:
+        from gempython.gemplotting.utils.anautilities import getElogPath
+        outputDir = getElogPath()
+        pass
+    if not os.path.isdir(outputDir):
+        os.makedirs(outputDir)
+
+    linkFiles = {}
+    scurveData = None
+    for entry, idx in zip(crateMap, firstEntry):
+        ohKey = (int(entry['shelf']), int(entry['slot']), int(entry['link']))
+        detName = None
+        if 'detName' in listOfBranches:
+            detName = rp.tree2array(scurveTree, branches=['detName'], start=idx, stop=idx+1)[0][0][0]
+
+        # Files of a previous split of the same input are used as they are
+        linkFilename = "{0}/{1}_shelf{2}_slot{3}_link{4}.root".format(outputDir, os.path.splitext(os.path.basename(scurveFilename))[0], *ohKey)
+        if os.path.isfile(linkFilename) and os.path.getmtime(linkFilename) >= os.path.getmtime(scurveFilename):
+            linkFiles[ohKey] = (linkFilename, detName)
+            continue
+
+        # Read the rest of the input once, the links are taken from memory
+        if scurveData is None:
+            scurveData = rp.tree2array(scurveTree, branches=[ branch for branch in listOfBranches if branch not in geoBranches + ['detName'] ])
+            objBranches = [ name for name in scurveData.dtype.names if scurveData.dtype[name].hasobject ]
+            if len(objBranches) > 0:
+                printYellow("splitScurveFileByLink(): branches {0} of {1} are not copied to the file of each link".format(objBranches, scurveFilename))
+                scurveData = scurveData[[ name for name in scurveData.dtype.names if name not in objBranches ]]
+                pass
+            pass
+        isThisLink = (geoData['shelf'] == entry['shelf']) & (geoData['slot'] == entry['slot']) & (geoData['link'] == entry['link'])
+        linkData = scurveData[isThisLink]
+
+        linkFile = r.TFile(linkFilename, 'recreate')
+        if not linkFile.IsOpen() or linkFile.IsZombie():
+            linkFile.Close()
+            inFile.Close()
+            raise IOError("Unable to open output file {0} check to make sure you have write permissions".format(linkFilename))
+        linkFile.cd()
+        linkTree = rp.array2tree(linkData, name='scurveTree')
+        linkTree = rp.array2tree(geoData[isThisLink], tree=linkTree)
+        if detName is not None:
+            vecDetName = r.vector('string')()
+            vecDetName.push_back(detName)
+            branchDetName = linkTree.Branch('detName', vecDetName)
+            for entryIdx in range(len(linkData)):
+                branchDetName.Fill()
+                pass
+            pass
+        linkTree.Write()
+        linkFile.Close()
+        linkFiles[ohKey] = (linkFilename, detName)
+        pass
+    inFile.Close()
+
+    return linkFiles
+
+def writeScurveDetSummaryPlots(outF, detSummary):
+    """
+    Writes the distributions of the entire detector returned by makeScurveDetSummaryPlots() to the Summary directory of outF
+
+    outF       - TFile, or TDirectory, the Summary directory is created in
+    detSummary - Dictionary returned by makeScurveDetSummaryPlots()
+    """
+
+    dirSummary = outF.mkdir("Summary")
+    dirSummary.cd()
+    detSummary["hDetThresh_All"].Write()
+    detSummary["hDetEffPed_All"].Write()
+    detSummary["hDetENC_All"].Write()
+    
+    detSummary["gDetThresh_All"].Write()
+    detSummary["gDetEffPed_All"].Write()
+    detSummary["gDetENC_All"].Write()
+
+    detSummary["h2DetThresh_All"].Write()
+    detSummary["h2DetEffPed_All"].Write()
+    detSummary["h2DetENC_All"].Write()
+
+    detSummary["hDetMapThresh"].Write()
+    detSummary["hDetMapEffPed"].Write()
+    detSummary["hDetMapENC"].Write()
+
+    for ieta in sorted(detSummary["threshSummaryPlotsByiEta"].keys()):
+        dir_iEta = dirSummary.mkdir("ieta{0}".format(ieta))
+        dir_iEta.cd()
+        detSummary["threshSummaryPlotsByiEta"][ieta].Write()
+        detSummary["effPedSummaryPlotsByiEta"][ieta].Write()
+        detSummary["encSummaryPlotsByiEta"][ieta].Write()
+        pass
+    return
@@ -30,9 +30,11 @@ def anaUltraThreshold(args,thrFilename,GEBtype="short",outputDir=None,fileScurve
     If this is called by a child process sys.stdout will be overwritten and be "outputDir/anaLog.log" if outputDir is not None or "$ELOG_PATH/anaLog.log" if outputDir is None.  If this is called by the MainProcess no changes to sys.stdout will be made.
 
     channels - If true output plots are made vs. vfatCH
+    deferPlots - If true the output images are not written, the canvases are left in the RenderQueue store file of outputDir for the caller to render, see renderQueue.py
     doNotSavePlots - If false saves output TObjects as a .png file to outputDir
     extChanMapping - Name of externally supplied file that specifies the ROBstr:PanPin:vfatCH mapping
     isVFAT2 - True (False) if data is coming from VFAT2(3)
+    noPlots - Same as doNotSavePlots
     PanPin - If true output plots are made vs. PanPin
     pervfat - If true only 1D plots are made
     zscore - selection criterion to use in median absolute deviation outlier identifion algorithm
@@ -54,12 +56,16 @@ def anaUltraThreshold(args,thrFilename,GEBtype="short",outputDir=None,fileScurve
         args.channels = False
     if hasattr(args,'debug') is False:
         args.debug = False
+    if hasattr(args,'deferPlots') is False:
+        args.deferPlots = False
     if hasattr(args,'doNotSavePlots') is False:
         args.doNotSavePlots = False
     if hasattr(args,'extChanMapping') is False:
         args.extChanMapping = None
     if hasattr(args,'isVFAT2') is False:
         args.isVFAT2 = False
+    if hasattr(args,'noPlots') is False:
+        args.noPlots = False
     if hasattr(args,'PanPin') is False:
         args.PanPin = False
     if hasattr(args, 'pervfat') is False:
@@ -80,6 +86,10 @@ def anaUltraThreshold(args,thrFilename,GEBtype="short",outputDir=None,fileScurve
     from gempython.gemplotting.utils.multiprocUtils import redirectStdOutAndErr
     redirectStdOutAndErr("anaUltraLatency",outputDir)
 
+    # Output images are written once the analysis is done
+    from gempython.gemplotting.utils.renderQueue import RenderQueue
+    renderQueue = RenderQueue(outputDir, enabled=(not (args.noPlots or args.doNotSavePlots)))
+
     # Build the channel to strip mapping from the text file
     #from gempython.tools.hw_constants import gemVariants
     import pkg_resources
@@ -285,19 +295,19 @@ def anaUltraThreshold(args,thrFilename,GEBtype="short",outputDir=None,fileScurve
 
     #Save Output
     from gempython.gemplotting.utils.anautilities import getSummaryCanvas, addPlotToCanvas
-    if not args.doNotSavePlots:
-        getSummaryCanvas(dictSummary=dict_h2D_thrDAC, name='{0}/ThreshSummary.png'.format(outputDir), drawOpt="colz", gemType=gemType, write2Disk=True)
+    if renderQueue.enabled:
+        getSummaryCanvas(dictSummary=dict_h2D_thrDAC, name='{0}/ThreshSummary.png'.format(outputDir), drawOpt="colz", gemType=gemType, write2Disk=True, renderQueue=renderQueue)
 
         dict_h2D_thrDACProj = {}
         for vfat in range(0, nVFATS):
             dict_h2D_thrDACProj[vfat] = dict_h2D_thrDAC[vfat].ProjectionY()
             pass
-        getSummaryCanvas(dictSummary=dict_h2D_thrDACProj, name='{0}/VFATSummary.png'.format(outputDir), drawOpt="", gemType=gemType, write2Disk=True)
+        getSummaryCanvas(dictSummary=dict_h2D_thrDACProj, name='{0}/VFATSummary.png'.format(outputDir), drawOpt="", gemType=gemType, write2Disk=True, renderQueue=renderQueue)
 
         #Save thrDACMax Distributions Before/After Outlier Rejection
         canv_vt1Max = getSummaryCanvas(dict_hMaxThrDAC, name="canv_vt1Max", drawOpt="hist", gemType=gemType)
         canv_vt1Max = addPlotToCanvas(canv=canv_vt1Max, content=dict_hMaxThrDAC_NoOutlier, drawOpt="hist", gemType=gemType)
-        canv_vt1Max.SaveAs(outputDir+'/thrDACMaxSummary.png')
+        renderQueue.addCanvas(canv_vt1Max, outputDir+'/thrDACMaxSummary.png')
         
     # Fetch trimDAC & chMask from scurveFitTree
     import numpy as np
@@ -320,8 +330,8 @@ def anaUltraThreshold(args,thrFilename,GEBtype="short",outputDir=None,fileScurve
         if not args.isVFAT2:
             list_bNames.append("trimPolarity")
 
-        from gempython.gemplotting.utils.anautilities import initVFATArray
-        array_VFATSCurveData = rp.root2array(fileScurveFitTree,treename="scurveFitTree",branches=list_bNames)
+        from gempython.gemplotting.utils.anautilities import initVFATArray, readTreeArray
+        array_VFATSCurveData = readTreeArray(fileScurveFitTree,"scurveFitTree",branches=list_bNames)
         dict_vfatTrimMaskData = dict((idx,initVFATArray(array_VFATSCurveData.dtype)) for idx in np.unique(array_VFATSCurveData[list_bNames[0]]))
         for dataPt in array_VFATSCurveData:
             dict_vfatTrimMaskData[dataPt['vfatN']][dataPt[list_bNames[1]]]['mask'] =  dataPt['mask']
@@ -375,10 +385,10 @@ def anaUltraThreshold(args,thrFilename,GEBtype="short",outputDir=None,fileScurve
         pass
 
     #Save output plots new hot channels subtracted off
-    if not args.doNotSavePlots:
+    if renderQueue.enabled:
 
-        getSummaryCanvas(dictSummary=dict_h2D_thrDAC, name='{0}/ThreshPrunedSummary.png'.format(outputDir), drawOpt="colz", gemType=gemType, write2Disk=True)
-        getSummaryCanvas(dictSummary=dict_h2D_thrDACProjPruned, name='{0}/VFATPrunedSummary.png'.format(outputDir), drawOpt="", gemType=gemType, write2Disk=True)
+        getSummaryCanvas(dictSummary=dict_h2D_thrDAC, name='{0}/ThreshPrunedSummary.png'.format(outputDir), drawOpt="colz", gemType=gemType, write2Disk=True, renderQueue=renderQueue)
+        getSummaryCanvas(dictSummary=dict_h2D_thrDACProjPruned, name='{0}/VFATPrunedSummary.png'.format(outputDir), drawOpt="", gemType=gemType, write2Disk=True, renderQueue=renderQueue)
 
     #Now determine what thrDAC to use for configuration.  The first threshold bin with no entries for now.
     #Make a text file readable by TTree::ReadFile
@@ -397,8 +407,13 @@ def anaUltraThreshold(args,thrFilename,GEBtype="short",outputDir=None,fileScurve
                 break
             pass
         pass
+    thrAnaData = rp.tree2array(thrAnaTree)
     outFile.Close()
 
+    # Columnar copy of the thrAnaTree for fast reads, see readTreeSidecar()
+    from gempython.gemplotting.utils.anautilities import writeTreeSidecar
+    writeTreeSidecar(thrAnaData, "{0}/{1}".format(outputDir,args.outfilename), 'thrAnaTree')
+
     txt_vfat = open(outputDir+"/vfatConfig.txt", 'w')
     if args.isVFAT2:
         txt_vfat.write("vfatN/I:vfatID/I:vt1/I:trimRange/I\n")
@@ -475,6 +490,12 @@ def anaUltraThreshold(args,thrFilename,GEBtype="short",outputDir=None,fileScurve
 
     inFile.Close()
 
+    # Write the output images, unless the caller renders them after all its analyses
+    if args.deferPlots:
+        renderQueue.close()
+    else:
+        renderQueue.render()
+
     # Do we return analyzed TTree?
     from multiprocessing import current_process
     if (current_process().name == 'MainProcess'):
@@ -576,7 +597,7 @@ def calibrateThrDAC(args):
     redirectStdOutAndErr("anaUltraThreshold",args.outputDir)
 
     # Get info from input file
-    from gempython.gemplotting.utils.anautilities import getCyclicColor, getDirByAnaType, filePathExists, parseListOfScanDatesFile
+    from gempython.gemplotting.utils.anautilities import getCyclicColor, getDirByAnaType, filePathExists, parseListOfScanDatesFile, readTreeArray
     parsedTuple = parseListOfScanDatesFile(args.inputFile)
     listChamberAndScanDate = parsedTuple[0]
     thrDacName = parsedTuple[1]
@@ -662,13 +683,13 @@ def calibrateThrDAC(args):
 
         # Determine vfatID
         list_bNames = ['vfatN','vfatID']
-        array_vfatData = rp.tree2array(tree=scanFile.scurveFitTree, branches=list_bNames)
+        array_vfatData = readTreeArray(filename, "scurveFitTree", branches=list_bNames)
         array_vfatData = np.unique(array_vfatData)
 
         import os
         # Get scurve data for this arm dac value (used for boxplots)
         list_bNames = ['noise', 'threshold', 'vfatN', 'vthr', 'ped_eff']
-        scurveFitData = rp.tree2array(tree=scanFile.scurveFitTree, branches=list_bNames)
+        scurveFitData = readTreeArray(filename, "scurveFitTree", branches=list_bNames)
 
         #remove channels that fail quality cuts
         scurveFitMask1 = np.logical_or(scurveFitData['noise'] < args.deadChanCutLow,scurveFitData['noise'] > args.deadChanCutHigh)
@@ -938,6 +959,7 @@ def calibrateThrDAC(args):
     ###################
     # Now Make plots & Fit DAC Curves
     ###################
+    from gempython.gemplotting.fitting.fitModels import makeModelTF1
     if args.debug:
         print("| vfatN | coef4 | coef3 | coef2 | coef1 | coef0 | noise | noise_err |")
         print("| :---: | :---: | :---: | :---: | :---: | :---: | :---: | :-------: |")
@@ -1047,10 +1069,21 @@ def calibrateThrDAC(args):
         dict_ScurveMeanVsThrDac[vfat].GetXaxis().SetTitle(thrDacName)
         dict_ScurveMeanVsThrDac[vfat].GetYaxis().SetTitle("Scurve Mean #left(fC#right)")
         dict_ScurveMeanVsThrDac[vfat].Draw("APE1")
-        dict_funcScurveMeanVsThrDac[vfat] = r.TF1("func_{0}".format((dict_ScurveMeanVsThrDac[vfat].GetName()).strip('g')),"[0]*x^4+[1]*x^3+[2]*x^2+[3]*x+[4]",min(perVfatFitRange),max(perVfatFitRange))
+        funcName = "func_{0}".format((dict_ScurveMeanVsThrDac[vfat].GetName()).strip('g'))
+        func_compiled = makeModelTF1("thrDac","{0}_compiled".format(funcName),min(perVfatFitRange),max(perVfatFitRange))
         #require the first derivative to be positive at the lower boundary of the fit range
-        dict_funcScurveMeanVsThrDac[vfat].SetParLimits(3,0,1000000)
-        tgraph_scurveMeanVsThrDacForFit.Fit(dict_funcScurveMeanVsThrDac[vfat],"QR")
+        func_compiled.SetParLimits(3,0,1000000)
+        tgraph_scurveMeanVsThrDacForFit.Fit(func_compiled,"QR")
+
+        # The compiled TF1 is only used to fit, a compiled TF1 written to a
+        # file only keeps a sampling of the function
+        dict_funcScurveMeanVsThrDac[vfat] = makeModelTF1("thrDac",funcName,min(perVfatFitRange),max(perVfatFitRange),compiled=False)
+        for iPar in range(func_compiled.GetNpar()):
+            dict_funcScurveMeanVsThrDac[vfat].SetParameter(iPar,func_compiled.GetParameter(iPar))
+            dict_funcScurveMeanVsThrDac[vfat].SetParError(iPar,func_compiled.GetParError(iPar))
+            pass
+        dict_funcScurveMeanVsThrDac[vfat].SetChisquare(func_compiled.GetChisquare())
+        dict_funcScurveMeanVsThrDac[vfat].SetNDF(func_compiled.GetNDF())
         dict_ScurveMeanVsThrDac[vfat].Write()
         dict_funcScurveMeanVsThrDac[vfat].Write()
 
@@ -1190,7 +1223,7 @@ def calibrateThrDAC(args):
 
     return 0
 
-def sbitRateAnalysis(chamber_config, rateTree, cutOffRate=0.0, debug=False, outfilename='SBitRatePlots.root', scandate='noscandate'):
+def sbitRateAnalysis(chamber_config, rateTree, cutOffRate=0.0, debug=False, outfilename='SBitRatePlots.root', scandate='noscandate', noPlots=False):
     """
     Analyzes a scan taken with sbitRateScanAllLinks(...) from gempython.vfatqc.utils.scanUtils
 
@@ -1213,6 +1246,7 @@ def sbitRateAnalysis(chamber_config, rateTree, cutOffRate=0.0, debug=False, outf
         outfilename     - Name of output TFile to be created
         scandate        - Either a string 'noscandate' or an a datetime object formated as YYYY.MM.DD.hh.mm, e.g
                           returned from "datetime.datetime.now().strftime("%Y.%m.%d.%H.%M")"
+        noPlots         - If true no summary image is written
     """
 
     # Get paths
@@ -1426,7 +1460,10 @@ def sbitRateAnalysis(chamber_config, rateTree, cutOffRate=0.0, debug=False, outf
 
     from gempython.gemplotting.utils.anautilities import getSummaryCanvas
 
-    
+    # Summary images are written once all links are analyzed
+    import os
+    from gempython.gemplotting.utils.renderQueue import RenderQueue, renderQueues
+    dict_renderQueues = {}
     for entry in crateMap:
         ohKey = (entry['shelf'],entry['slot'],entry['link'])
         detName = getDetName(entry)
@@ -1519,24 +1556,31 @@ def sbitRateAnalysis(chamber_config, rateTree, cutOffRate=0.0, debug=False, outf
                 canv_Summary1D.Update()
 
             # Save the graphs
+            if perchannel:
+                canv_Summary = canv_Summary2D
+            else:
+                canv_Summary = canv_Summary1D
             if scandate == 'noscandate':
-                if perchannel:
-                    canv_Summary2D.SaveAs("{0}/{1}/{2}_{1}.png".format(elogPath,detName,canv_Summary2D.GetName()))
-                else:
-                    canv_Summary1D.SaveAs("{0}/{1}/{2}_{1}.png".format(elogPath,detName,canv_Summary1D.GetName()))
+                imageName = "{0}/{1}/{2}_{1}.png".format(elogPath,detName,canv_Summary.GetName())
             else:
                 if perchannel:
                     strDirName = getDirByAnaType("sbitRatech", detName)
-                    canv_Summary2D.SaveAs("{0}/{1}/{2}.png".format(strDirName,scandate,canv_Summary2D.GetName()))
                 else:
                     strDirName = getDirByAnaType("sbitRateor", detName)
-                    canv_Summary1D.SaveAs("{0}/{1}/{2}.png".format(strDirName,scandate,canv_Summary1D.GetName()))
                     pass
+                imageName = "{0}/{1}/{2}.png".format(strDirName,scandate,canv_Summary.GetName())
                 pass
+            if ohKey not in dict_renderQueues:
+                dict_renderQueues[ohKey] = RenderQueue(os.path.dirname(imageName), enabled=(not noPlots))
+            dict_renderQueues[ohKey].addCanvas(canv_Summary, imageName)
             pass
         outputFiles[ohKey].Close()
         pass
 
+    # Write the summary images
+    storeNames = [ renderQueue.close() for renderQueue in dict_renderQueues.values() ]
+    renderQueues([ storeName for storeName in storeNames if storeName is not None ])
+
     for ohKey,innerDictByVFATKey in dict_dacValsBelowCutOff["THR_ARM_DAC"].iteritems():
         if ohKey in detNamesMap:
             detName = detNamesMap[ohKey]